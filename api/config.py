@@ -0,0 +1,19 @@
+import os
+import yaml
+
+_config = None
+
+# Load Configuration
+def load_config():
+    config_path = os.path.join("config", "settings.yaml")
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            return yaml.safe_load(f) or {}
+    return {}
+
+def get_config():
+    """Process-wide settings.yaml, loaded once."""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
@@ -1,14 +1,52 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-
-class ContentSafetyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Logic to check for safety flags, rate limits, or add watermarking headers
-        # For now, we just pass through but this is where the logic lives
-        
-        # Example: Check for specific header or ensure consent param exists in body (hard to do in middleware for streaming body)
-        # So we often just add headers to response
-        
-        response = await call_next(request)
-        response.headers["X-Content-Safety"] = "Watermarked"
-        return response
+from core_models import tracing
+import time
+
+class TracingMiddleware:
+    """
+    Times every HTTP request and collects the spans recorded while serving it
+    (STT, intent, TTS, lip-sync stages... see core_models/tracing.py).
+
+    - Request durations go to the http_request_seconds histogram, by route template.
+    - With server_timing on, the per-stage breakdown is returned in a Server-Timing
+      header (shown in the browser dev tools' Timing tab). Stages finishing after the
+      response starts (streamed bodies, background renders) only reach /metrics.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streaming responses pass through untouched.
+    """
+    def __init__(self, app, metrics=None, server_timing: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace, token = tracing.start_trace()
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(trace, time.perf_counter() - start)
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            tracing.end_trace(token)
+            if self.metrics is not None:
+                # Route template (e.g. /static/{path}) keeps label cardinality bounded
+                route = scope.get("route")
+                self.metrics.histogram(
+                    "http_request_seconds", "HTTP request duration (until the response body is sent)",
+                    route=getattr(route, "path", "unmatched"), method=scope.get("method", ""), status=status["code"],
+                ).observe(time.perf_counter() - start)
+
+def server_timing_header(trace: tracing.Trace, total_seconds: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in trace.totals().items()]
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
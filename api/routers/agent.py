@@ -2,110 +2,133 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from api.services.agent_service import AgentService
-from api.services.orchestrator import Orchestrator
+from api.services.media import media_url, public_url
+from api.services.orchestrator import get_orchestrator
 import os
 
 router = APIRouter()
 agent_service = AgentService()
-orchestrator = Orchestrator()
+orchestrator = get_orchestrator()
 
 class AgentRequest(BaseModel):
     text: str
     context: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None # Conversation state key (one per user/tab)
 
 class AgentResponse(BaseModel):
     render: Optional[Dict[str, Any]] = None
     action: Optional[Dict[str, Any]] = None
     transcript: Optional[str] = None
 
-@router.post("/parse", response_model=AgentResponse)
-async def parse_agent_request(req: AgentRequest):
-    try:
-        # 1. Parse Intent (Mock Gemini)
-        response_payload = await agent_service.parse_intent(req.text, req.context)
+async def render_agent_response(response_payload: dict, stream: bool = False):
+    """
+    Runs the render step for the payload's render instruction (if it asks for TTS):
+    adds video_url/audio_url, or with stream=True a stream_url to a live HLS playlist
+    (video_url instead if the clip is already rendered in full).
+    """
+    render = response_payload.get("render")
+    if render and render.get("tts"):
+        text_to_speak = render.get("text")
+        voice = render.get("voice", "en-US-ChristopherNeural")
+        avatar_id = render.get("avatar_image_id", "male_business_portrait_v1")
         
-        # 2. If 'render' instruction exists and TTS is requested, execute Visual Pipeline
-        render = response_payload.get("render")
-        if render and render.get("tts"):
-            text_to_speak = render.get("text")
-            voice = render.get("voice", "en-US-ChristopherNeural")
-            avatar_id = render.get("avatar_image_id", "male_business_portrait_v1")
-            
-            # Resolve avatar path (assuming it's in public assets or we need the source for Wav2Lip)
-            # Wav2Lip needs a local file path. 
-            # We copied the asset to frontend/react-app/public/assets/male_business_portrait_v1.png
-            # We should validly check where this file is relative to the backend.
-            # Relative to backend root (InteractGEN):
-            avatar_path = os.path.abspath(f"frontend/react-app/public/assets/{avatar_id}.png")
-            
-            if not os.path.exists(avatar_path):
-                 # Fallback code if the specific asset isn't found, maybe use a default or error
-                 # For now, let's assume it exists as we copied it.
-                 pass
-            
-            # Run Orchestrator Pipeline
-            # Note: This is a synchronous block that waits for generation. 
-            # Ideally we'd optimize latency (stream audio first?), but strict requirement is LIP SYNC.
-            # Run Orchestrator Pipeline
-            video_path, session_id = await orchestrator.render_pipeline(
+        # Wav2Lip needs a local file: the avatar assets shipped with the frontend
+        avatar_path = os.path.abspath(f"frontend/react-app/public/assets/{avatar_id}.png")
+        
+        if stream:
+            result = await orchestrator.render_stream(
                 image_path=avatar_path,
                 text=text_to_speak,
                 voice_profile_id=voice,
                 session_id=render.get("session_id")
             )
-            
-            # Return URL to the generated video
-            # The frontend expects 'video_base64' in the sample, but implies 'video_blob' logic.
-            # We will return a URL for better performance and let the frontend load it.
-            # However, to support the simplified sample code provided by the user (which checks video_base64),
-            # we might need to adapt. But sending 2-MB video base64 in JSON is bad.
-            # Let's send 'video_url' and update the frontend to handle it.
-            
-            render["video_url"] = f"http://localhost:8000/static/sessions/{session_id}/final_video.mp4"
-            render["audio_url"] = f"http://localhost:8000/static/sessions/{session_id}/speech.wav"
-            
-            # Clean up base64 keys if they were placeholder
-            # render.pop("video_base64", None) # Not removing, just not adding.
-            
-        return response_payload
+            if result["playlist_path"]:
+                # Not versioned: the playlist keeps growing while segments render
+                render["stream_url"] = public_url(result["playlist_path"])
+            else:
+                # Already rendered in full
+                render["video_url"] = media_url(result["video_path"])
+        else:
+            result = await orchestrator.render(
+                image_path=avatar_path,
+                text=text_to_speak,
+                voice_profile_id=voice,
+                session_id=render.get("session_id")
+            )
+            # Content-versioned and immutable: a repeated clip is served from the browser/CDN cache
+            render["video_url"] = media_url(result['video_path'])
+            render["audio_url"] = media_url(result['audio_path'])
+    return response_payload
+
+@router.post("/parse", response_model=AgentResponse)
+async def parse_agent_request(req: AgentRequest):
+    try:
+        # 1. Parse Intent, 2. render the spoken answer as a talking head
+        response_payload = await agent_service.parse_intent(req.text, req.context, req.session_id)
+        return await render_agent_response(response_payload)
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/parse/stream", response_model=AgentResponse)
+async def parse_agent_request_stream(req: AgentRequest):
+    """
+    Same as /parse, but the talking head is rendered progressively as HLS.
+    Returns as soon as the first segment is ready; 'stream_url' points at a
+    live playlist that keeps growing until the full answer is rendered ('video_url'
+    instead when the answer is already rendered in full).
+    """
+    try:
+        response_payload = await agent_service.parse_intent(req.text, req.context, req.session_id)
+        return await render_agent_response(response_payload, stream=True)
         
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi import UploadFile, File, Form
-from core_models.stt.whisper_engine import get_stt_engine
-import shutil
-import uuid
+from fastapi import UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from api.config import get_config
+from api.services.model_registry import get_model_registry
+from api.services.stt_pool import STTBusyError
+from core_models.stt.audio_io import clip_problem, decode_audio
+from core_models.stt.streaming import WHISPER_SAMPLE_RATE, UtteranceStream
+from core_models.tracing import span
+from core_models.stt.vad import EnergyVAD
+import asyncio
 import json
 
 @router.post("/audio", response_model=AgentResponse)
 async def handle_audio_agent(
     audio: UploadFile = File(...),
-    context: str = Form(default="{}") 
+    context: str = Form(default="{}"),
+    session_id: Optional[str] = Form(default=None)
 ):
     try:
-        # 1. Save Audio
-        session_id = str(uuid.uuid4())
-        audio_path = f"storage/temp_{session_id}.webm" 
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
-            
-        file_size = os.path.getsize(audio_path)
-        print(f"Received Audio: {audio_path} | Size: {file_size} bytes")
+        # 1. Decode the upload in memory (16 kHz float32), off the event loop
+        stt_cfg = get_config().get("stt", {})
+        try:
+            with span("audio_decode"):
+                samples = await asyncio.get_running_loop().run_in_executor(None, decode_audio, audio.file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        print(f"Received Audio: {audio.filename} | {len(samples) / WHISPER_SAMPLE_RATE:.2f}s")
         
-        if file_size < 1000:
-             print("WARNING: Audio file is too small/empty.")
-            
-        # 2. Transcribe (Backend STT)
-        stt = get_stt_engine()
-        transcribed_text = stt.transcribe(audio_path)
+        # 2. Transcribe (Backend STT) on the STT pool, unless the clip is obviously empty
+        problem = clip_problem(
+            samples,
+            min_duration_ms=stt_cfg.get("min_clip_ms", 300),
+            silence_db=stt_cfg.get("silence_db", -50),
+        )
+        if problem:
+            print(f"WARNING: Skipping transcription, audio is {problem}.")
+            transcribed_text = ""
+        else:
+            stt = await get_model_registry().aget("stt")
+            transcribed_text = await stt.transcribe(samples)
         print(f"Transcribed: {transcribed_text}")
-        
-        # Cleanup audio
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
             
         if not transcribed_text:
              # Just return empty if silence, or error
@@ -125,33 +148,176 @@ async def handle_audio_agent(
             ctx = {}
             
         print(f"Parsing intent for: {transcribed_text}")
-        response_payload = await agent_service.parse_intent(transcribed_text, ctx)
+        response_payload = await agent_service.parse_intent(transcribed_text, ctx, session_id)
         print(f"Intent Payload: {response_payload}")
         
-        # 4. Render Pipeline (Copy of logic above)
-        render = response_payload.get("render")
-        if render and render.get("tts"):
-            text_to_speak = render.get("text")
-            voice = render.get("voice", "en-US-ChristopherNeural")
-            avatar_id = render.get("avatar_image_id", "male_business_portrait_v1")
-            
-            avatar_path = os.path.abspath(f"frontend/react-app/public/assets/{avatar_id}.png")
-            
-            video_path, session_id = await orchestrator.render_pipeline(
-                image_path=avatar_path,
-                text=text_to_speak,
-                voice_profile_id=voice,
-                session_id=render.get("session_id")
-            )
-            
-            render["video_url"] = f"http://localhost:8000/static/sessions/{session_id}/final_video.mp4"
-            render["audio_url"] = f"http://localhost:8000/static/sessions/{session_id}/speech.wav"
+        # 4. Render Pipeline
+        await render_agent_response(response_payload)
             
         # Add transcript to response
         response_payload["transcript"] = transcribed_text
         return response_payload
 
+    except HTTPException:
+        raise
+    except STTBusyError as e:
+        # Backpressure: the client should retry shortly rather than queue behind a full pool
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.websocket("/audio/stream")
+async def stream_audio_agent(websocket: WebSocket):
+    """
+    Streaming variant of /audio. The client streams raw PCM16 mono audio while the
+    user speaks; a VAD cuts utterances and each one is parsed as soon as speech ends.
+    
+    Client -> server:
+      binary frames                 PCM16 little-endian mono audio, any chunk size
+      {"type": "config", ...}       optional, before audio: sample_rate, beam_size (up to
+                                    stt.max_beam_size), greedy (final decode), partials (bool),
+                                    context, session_id
+      {"type": "end"}               no more audio: flush, finish pending work, close
+    Server -> client (JSON):
+      {"type": "speech_start", "utterance": n}
+      {"type": "partial", "utterance": n, "text": ...}
+      {"type": "final", "utterance": n, "text": ...}
+      {"type": "agent", "utterance": n, "transcript": ..., "render": ..., "action": ...}
+      {"type": "error", "detail": ...}     failed decode or agent step, or a malformed control message
+    """
+    await websocket.accept()
+    stt_cfg = get_config().get("stt", {})
+    settings = {
+        "sample_rate": stt_cfg.get("sample_rate", 16000),
+        "beam_size": stt_cfg.get("beam_size", 5),
+        "greedy": False,
+        "partials": True,
+        "greedy_partials": stt_cfg.get("greedy_partials", True),
+        "context": {},
+        "session_id": None,
+    }
+    send_lock = asyncio.Lock()
+    finals = asyncio.Queue()
+    background = set()
+    state = {"utterance": 0, "finalized": 0, "partial_busy": False}
+    stream = None
+    
+    async def send(message):
+        async with send_lock:
+            await websocket.send_json(message)
+            
+    async def decode(audio, beam_size, greedy):
+        stt = await get_model_registry().aget("stt")
+        return await stt.transcribe(audio, beam_size=beam_size, greedy=greedy)
+        
+    async def run_partial(utterance, audio):
+        # At most one partial decode at a time: if STT is behind, intermediate partials are skipped
+        try:
+            text = await decode(audio, settings["beam_size"], settings["greedy_partials"])
+            if text and utterance > state["finalized"]:
+                await send({"type": "partial", "utterance": utterance, "text": text})
+        except STTBusyError:
+            # Partials are best-effort: skip this one, the final still gets queued
+            pass
+        except Exception as e:
+            print(f"Streaming STT partial decode failed: {e}")
+            await send({"type": "error", "utterance": utterance, "detail": str(e)})
+        finally:
+            state["partial_busy"] = False
+            
+    async def run_agent(utterance, text):
+        try:
+            response_payload = await agent_service.parse_intent(text, settings["context"], settings["session_id"])
+            await render_agent_response(response_payload)
+            await send({"type": "agent", "utterance": utterance, "transcript": text, **response_payload})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            await send({"type": "error", "utterance": utterance, "detail": str(e)})
+            
+    async def final_worker():
+        # Finals are decoded in order; the agent step runs alongside so the next utterance isn't held up
+        while True:
+            item = await finals.get()
+            if item is None:
+                return
+            utterance, audio = item
+            try:
+                text = await decode(audio, settings["beam_size"], settings["greedy"])
+            except Exception as e:
+                print(f"Streaming STT decode failed: {e}")
+                await send({"type": "error", "utterance": utterance, "detail": str(e)})
+                continue
+            state["finalized"] = utterance
+            await send({"type": "final", "utterance": utterance, "text": text})
+            if text:
+                spawn(run_agent(utterance, text))
+                
+    def handle(events):
+        for event in events:
+            if event["type"] == "speech_start":
+                state["utterance"] += 1
+                spawn(send({"type": "speech_start", "utterance": state["utterance"]}))
+            elif event["type"] == "partial":
+                if settings["partials"] and not state["partial_busy"]:
+                    state["partial_busy"] = True
+                    spawn(run_partial(state["utterance"], event["audio"]))
+            elif event["type"] == "final":
+                finals.put_nowait((state["utterance"], event["audio"]))
+                
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+        
+    worker = asyncio.create_task(final_worker())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                if stream is None:
+                    vad = EnergyVAD(
+                        threshold_db=stt_cfg.get("vad_threshold_db", -45),
+                        margin_db=stt_cfg.get("vad_margin_db", 10),
+                        end_silence_ms=stt_cfg.get("vad_end_silence_ms", 500),
+                    )
+                    stream = UtteranceStream(
+                        input_rate=int(settings["sample_rate"]), vad=vad,
+                        partial_interval_ms=stt_cfg.get("partial_interval_ms", 800),
+                        max_utterance_s=stt_cfg.get("max_utterance_s", 30),
+                    )
+                handle(stream.feed(message["bytes"]))
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                    if not isinstance(control, dict):
+                        raise ValueError("expected a JSON object")
+                    config = {key: control[key] for key in ("sample_rate", "beam_size", "greedy", "partials", "context", "session_id") if key in control}
+                    if "beam_size" in config:
+                        # Clients pick their beam, up to the server's cap
+                        config["beam_size"] = max(1, min(int(config["beam_size"]), stt_cfg.get("max_beam_size", 10)))
+                except (ValueError, TypeError) as e:
+                    await send({"type": "error", "detail": f"Bad control message: {e}"})
+                    continue
+                if control.get("type") == "config":
+                    settings.update(config)
+                elif control.get("type") == "end":
+                    if stream is not None:
+                        handle(stream.flush())
+                    finals.put_nowait(None)
+                    await worker
+                    if background:
+                        await asyncio.gather(*list(background), return_exceptions=True)
+                    await websocket.close()
+                    return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        worker.cancel()
+        for task in list(background):
+            task.cancel()
+
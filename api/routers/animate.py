@@ -7,9 +7,31 @@ import shutil
 
 router = APIRouter()
 
-from api.services.orchestrator import Orchestrator
+from api.services.artifact_store import get_artifact_store
+from api.services.media import media_url, public_url
+from api.services.orchestrator import get_orchestrator
 
-orchestrator = Orchestrator()
+# Shared with the agent router; models load on first render
+orchestrator = get_orchestrator()
+
+def _save_upload(image: UploadFile, audio: Optional[UploadFile]):
+    """Writes the request's image (and audio) to a fresh uploads dir. Returns (image_path, audio_path or None)."""
+    artifacts = get_artifact_store()
+    temp_dir = artifacts.path("uploads", str(uuid.uuid4()))
+    os.makedirs(temp_dir, exist_ok=True)
+
+    image_path = os.path.join(temp_dir, os.path.basename(image.filename or "") or "input.jpg")
+    with open(image_path, "wb") as buffer:
+        shutil.copyfileobj(image.file, buffer)
+
+    audio_path = None
+    if audio:
+        audio_path = os.path.join(temp_dir, os.path.basename(audio.filename or "") or "input.wav")
+        with open(audio_path, "wb") as buffer:
+            shutil.copyfileobj(audio.file, buffer)
+    # Kept for a while (the render may still be reading them), then the janitor removes them
+    artifacts.register(temp_dir, "uploads")
+    return image_path, audio_path
 
 @router.post("/render", response_model=AnimateResponse)
 async def render_talking_head(
@@ -22,21 +44,8 @@ async def render_talking_head(
     if not consent_confirmed:
         raise HTTPException(status_code=400, detail="Consent must be confirmed.")
 
-    # Save inputs
-    temp_id = str(uuid.uuid4())
-    temp_dir = f"storage/temp/{temp_id}"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    image_path = os.path.join(temp_dir, image.filename or "input.jpg")
-    with open(image_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-        
-    audio_path = None
-    if audio:
-        audio_path = os.path.join(temp_dir, audio.filename or "input.wav")
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
-            
+    image_path, audio_path = _save_upload(image, audio)
+
     # Orchestration Logic
     try:
         video_path, session_id = await orchestrator.render_pipeline(
@@ -47,7 +56,38 @@ async def render_talking_head(
         )
         # In a real deployed scenario we'd upload to S3 or serve via static
         # For now assume static mounting
-        return AnimateResponse(video_url=f"/static/sessions/{session_id}/final_video.mp4")
+        return AnimateResponse(video_url=media_url(video_path))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/render/stream", response_model=AnimateResponse)
+async def render_talking_head_stream(
+    image: UploadFile = File(...),
+    text: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    voice_profile_id: Optional[str] = Form(None),
+    consent_confirmed: bool = Form(...)
+):
+    """Progressive /render: returns an HLS playlist URL once the first segment is playable (or the mp4, if already rendered)."""
+    if not consent_confirmed:
+        raise HTTPException(status_code=400, detail="Consent must be confirmed.")
+
+    image_path, audio_path = _save_upload(image, audio)
+
+    try:
+        result = await orchestrator.render_stream(
+            image_path=image_path,
+            text=text,
+            audio_path=audio_path,
+            voice_profile_id=voice_profile_id
+        )
+        if result["playlist_path"] is None:
+            # Already rendered in full: the immutable mp4
+            return AnimateResponse(video_url=media_url(result["video_path"]), metadata={"format": "mp4"})
+        return AnimateResponse(
+            video_url=public_url(result["playlist_path"]),
+            metadata={"format": "hls"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
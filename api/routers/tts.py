@@ -1,4 +1,5 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from api.schemas.common import TTSRequest, TTSResponse
 import uuid
 import os
@@ -6,20 +7,31 @@ import shutil
 
 router = APIRouter()
 
-from core_models.tts.edge_tts_engine import EdgeTTSEngine
-
-tts_engine = EdgeTTSEngine()
+from api.services.artifact_store import get_artifact_store
+from api.services.media import media_url
+from api.services.model_registry import get_model_registry
+from api.services.voice_profiles import voice_options
 
 @router.post("/tts", response_model=TTSResponse)
 async def generate_speech(request: TTSRequest):
-    output_filename = f"{uuid.uuid4()}.wav"
-    output_path = os.path.join("storage/outputs", output_filename)
-    os.makedirs("storage/outputs", exist_ok=True)
+    artifacts = get_artifact_store()
+    output_path = artifacts.path("tts_outputs", f"{uuid.uuid4()}.wav")
     
-    tts_engine.synthesize(request.text, output_path, request.dict())
+    tts_engine = await get_model_registry().aget("tts")
+    await tts_engine.synthesize_async(request.text, output_path, {**request.dict(), **voice_options(request.voice_profile_id)})
+    artifacts.register(output_path, "tts_outputs")
     
     return TTSResponse(
-        audio_url=f"/static/outputs/{output_filename}", 
+        audio_url=media_url(output_path), 
         duration=5.0,
         visemes=[{"time": 0.1, "value": "A"}, {"time": 0.2, "value": "B"}]
     )
+
+@router.post("/tts/stream")
+async def stream_speech(request: TTSRequest):
+    """Streams encoded audio (MP3) to the client while it is still being synthesized."""
+    tts_engine = await get_model_registry().aget("tts")
+    return StreamingResponse(
+        tts_engine.stream_async(request.text, {**request.dict(), **voice_options(request.voice_profile_id)}),
+        media_type="audio/mpeg"
+    )
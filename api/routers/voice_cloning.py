@@ -1,25 +1,78 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from api.schemas.common import CloneVoiceResponse
+from api.schemas.common import CloneVoiceResponse, CloneVoiceBatchResponse, VoiceMatch, IdentifyVoiceResponse
+from api.services.artifact_store import get_artifact_store
+from api.services.executor import get_execution_layer
+from api.services.model_registry import get_model_registry
+from api.services.voice_profiles import get_voice_profiles
+from core_models.stt.audio_io import decode_audio
+from typing import List, Optional
+import asyncio
 import uuid
 import os
 import shutil
 
 router = APIRouter()
 
-@router.post("/clone-voice", response_model=CloneVoiceResponse)
-async def clone_voice_profile(file: UploadFile = File(...)):
-    # Save the file
-    upload_dir = "storage/voice_samples"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(upload_dir, f"{file_id}_{file.filename}")
-    
+async def _decode(file: UploadFile):
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, decode_audio, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{file.filename}: {e}")
+
+async def _embed(clips):
+    encoder = await get_model_registry().aget("speaker_encoder")
+    return await get_execution_layer().run("speaker_encoder", encoder.embed_batch, clips)
+
+def _keep_sample(file: UploadFile, file_id: str) -> str:
+    # Reference clips are kept next to the profiles (e.g. for a cloning TTS later)
+    artifacts = get_artifact_store()
+    file_path = artifacts.path("voice_samples", f"{file_id}_{os.path.basename(file.filename or 'sample')}")
+    file.file.seek(0)
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
-        
-    from core_models.voice_cloning.encoder import SpeakerEncoder
-    encoder = SpeakerEncoder()
-    profile_id = encoder.embed_speaker(file_path)
-    
-    return CloneVoiceResponse(voice_profile_id=profile_id)
+    artifacts.register(file_path, "voice_samples")
+    return file_path
+
+async def _enroll(files: List[UploadFile], voice: Optional[str]) -> List[CloneVoiceResponse]:
+    clips = [await _decode(f) for f in files]
+    embeddings = await _embed(clips)
+
+    file_ids = [str(uuid.uuid4()) for _ in files]
+    metas = [{"name": f.filename, "voice": voice, "sample_id": file_id} for f, file_id in zip(files, file_ids)]
+    results = get_voice_profiles().enroll_many(embeddings, metas)
+
+    responses = []
+    for f, file_id, (profile_id, similarity) in zip(files, file_ids, results):
+        if similarity is None:
+            _keep_sample(f, file_id)
+            responses.append(CloneVoiceResponse(voice_profile_id=profile_id))
+        else:
+            responses.append(CloneVoiceResponse(
+                voice_profile_id=profile_id, similarity=round(similarity, 4),
+                message="Matched an existing voice profile",
+            ))
+    return responses
+
+@router.post("/clone-voice", response_model=CloneVoiceResponse)
+async def clone_voice_profile(file: UploadFile = File(...), voice: Optional[str] = Form(None)):
+    """
+    Enrolls a reference clip as a voice profile. voice is the TTS voice the profile speaks with.
+    A clip matching an already enrolled voice returns that profile (with its similarity).
+    """
+    return (await _enroll([file], voice))[0]
+
+@router.post("/clone-voice/batch", response_model=CloneVoiceBatchResponse)
+async def clone_voice_profiles(files: List[UploadFile] = File(...), voice: Optional[str] = Form(None)):
+    """One profile per clip; all clips are embedded in shared encoder passes."""
+    return CloneVoiceBatchResponse(profiles=await _enroll(files, voice))
+
+@router.post("/voice-profiles/identify", response_model=IdentifyVoiceResponse)
+async def identify_voice(file: UploadFile = File(...), k: int = Form(5)):
+    """Nearest enrolled profiles to the voice in a clip."""
+    embedding = (await _embed([await _decode(file)]))[0]
+    store = get_voice_profiles()
+    matches = []
+    for profile_id, similarity in store.nearest(embedding, k=max(1, min(k, 50))):
+        profile = store.get(profile_id)
+        matches.append(VoiceMatch(voice_profile_id=profile_id, similarity=round(similarity, 4), name=profile.get("name")))
+    return IdentifyVoiceResponse(matches=matches)
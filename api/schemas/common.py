@@ -23,6 +23,18 @@ class TTSResponse(ResponseBase):
 # --- Voice Cloning ---
 class CloneVoiceResponse(ResponseBase):
     voice_profile_id: str
+    similarity: Optional[float] = None # Set when the clip matched an existing profile
+
+class CloneVoiceBatchResponse(ResponseBase):
+    profiles: List[CloneVoiceResponse]
+
+class VoiceMatch(BaseModel):
+    voice_profile_id: str
+    similarity: float
+    name: Optional[str] = None
+
+class IdentifyVoiceResponse(ResponseBase):
+    matches: List[VoiceMatch]
 
 # --- Animate ---
 class AnimateRequest(BaseModel):
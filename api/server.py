@@ -1,7 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import yaml
 import os
 import sys
 
@@ -11,15 +10,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-# Load Configuration
-def load_config():
-    config_path = os.path.join("config", "settings.yaml")
-    if os.path.exists(config_path):
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
-    return {}
+from api.config import get_config
 
-config = load_config()
+config = get_config()
 
 app = FastAPI(
     title=config.get("app_name", "InteractGEN"),
@@ -27,7 +20,10 @@ app = FastAPI(
     version=config.get("version", "1.0.0"),
 )
 
-from api.middleware import ContentSafetyMiddleware
+from api.middleware import TracingMiddleware
+from api.services.metrics import get_metrics
+
+metrics_cfg = config.get("metrics", {})
 
 # CORS Middleware
 app.add_middleware(
@@ -37,7 +33,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(ContentSafetyMiddleware)
+app.add_middleware(
+    TracingMiddleware,
+    metrics=get_metrics() if metrics_cfg.get("enabled", True) else None,
+    server_timing=metrics_cfg.get("server_timing", True),
+)
 
 from api.routers import tts, voice_cloning, animate, agent
 
@@ -48,11 +48,56 @@ app.include_router(agent.router, prefix="/agent", tags=["Agent"])
 
 from fastapi.staticfiles import StaticFiles
 
+from api.services.artifact_store import get_artifact_store, run_janitor
+from api.services.media import MediaFiles, get_media_versions
+
+# Content-versioned, immutable URLs for rendered media (see api/services/media.py); /static
+# stays for files that still change (live HLS playlists) and old links
+app.mount("/media", MediaFiles(get_media_versions(), config.get("media", {}).get("accel_redirect_prefix"), get_artifact_store()), name="media")
 app.mount("/static", StaticFiles(directory="storage"), name="static")
 
+@app.on_event("startup")
+async def start_model_warm_up():
+    # Models otherwise load on first use; warming in the background keeps startup instant
+    import asyncio
+    from api.services.model_registry import get_model_registry, warm_up_models
+    names = warm_up_models()
+    if names:
+        asyncio.create_task(get_model_registry().warm_up(names))
+
+@app.on_event("startup")
+async def start_storage_janitor():
+    # Age/size budgets per artifact class under storage/ (see api/services/artifact_store.py)
+    import asyncio
+    interval = config.get("storage", {}).get("janitor_interval_seconds", 600)
+    if interval:
+        asyncio.create_task(run_janitor(get_artifact_store(), interval))
+
+@app.on_event("shutdown")
+def shutdown_execution_layer():
+    from api.services.executor import get_execution_layer
+    get_execution_layer().shutdown(wait=False)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    from fastapi import HTTPException
+    from fastapi.responses import PlainTextResponse
+    if not metrics_cfg.get("enabled", True):
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "version": config.get("version")}
+    from api.services.render_cache import get_render_cache
+    from api.services.model_registry import get_model_registry
+    return {
+        "status": "ok",
+        "version": config.get("version"),
+        "models": get_model_registry().stats(),
+        "stt": get_model_registry().get("stt").stats() if get_model_registry().is_loaded("stt") else None,
+        "render_cache": get_render_cache().stats(),
+        "storage": get_artifact_store().stats(),
+    }
 
 if __name__ == "__main__":
     uvicorn.run(
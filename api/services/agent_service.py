@@ -1,27 +1,51 @@
 from typing import Dict, Any, Optional
 import os
-import google.generativeai as genai
 import json
-import pyautogui
+import re
 import time
 import subprocess
-from PIL import Image
-from api.services.conversation_manager import conversation_manager
+from api.services.conversation_manager import DEFAULT_SESSION, conversation_manager
+from api.services.intent_router import intent_router, app_router
+from api.services.llm_client import llm_client_from_config
+from api.services.executor import get_execution_layer
+from api.services.screen_capture import get_screen_capture
+from api.services.ui_locator import get_ui_locator
+from api.config import get_config
+from core_models.tracing import span
+
+# google.generativeai and pyautogui are slow to import (and pyautogui needs a display),
+# so they are imported on first use rather than when the API starts
+
+GROUNDING_PROMPT = """
+Find the element on the screen matching the description: '{query}'.
+Return a JSON object with a single bounding box in [ymin, xmin, ymax, xmax] format (0-1000 scale) and the label.
+Format: {{ "box_2d": [ymin, xmin, ymax, xmax], "label": "found element" }}
+If not found, return empty JSON {{}}.
+Only return JSON.
+"""
+DESCRIBE_PROMPT = "Describe this webpage in detail for a blind user. Focus on the main content and key actions available. Keep it under 50 words."
 
 class AgentService:
-    def __init__(self):
+    def __init__(self, llm=None, locator=None):
         self.api_key = os.getenv("GEMINI_API_KEY")
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
-            self.vision_model = genai.GenerativeModel('gemini-1.5-flash-latest')
+        # Injectable (e.g. an LLMClient over FakeLLMBackend); otherwise built from `llm:` in settings.yaml
+        self._llm = llm
+        # Local grounding (UILocator); None = from `grounding:` in settings.yaml
+        self._locator = locator
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = llm_client_from_config(get_config().get("llm", {}), self.api_key)
+        return self._llm
+
     async def handle_conversation_state(self, session_id: str, state: Dict, text: str):
         intent = state.get("intent")
         step = state.get("step")
 
         if intent == "git_clone" and step == "ask_directory":
             target_dir = text.strip()
-            conversation_manager.clear_state(session_id)
+            await conversation_manager.clear_state(session_id)
             return {
                 "render": {
                     "type": "render",
@@ -36,499 +60,433 @@ class AgentService:
             }
         return {"render": {"text": "I lost my train of thought. Let's start over."}}
 
+    async def _locate_locally(self, frame, text: str):
+        locator = self._locator or get_ui_locator()
+        if locator is None:
+            return None
+        try:
+            with span("grounding.local"):
+                return await get_execution_layer().run("grounding", locator.locate, frame, text)
+        except Exception as e:
+            # No tesseract, bad template... the vision model still answers
+            print(f"Local grounding unavailable: {e}")
+            return None
+
     async def handle_visual_grounding(self, text: str):
-        screenshot_path = "storage/temp_grounding.png"
         try:
-            pyautogui.screenshot(screenshot_path)
-            img = Image.open(screenshot_path)
-            
-            prompt = f"""
-            Find the element on the screen matching the description: '{text}'.
-            Return a JSON object with a single bounding box in [ymin, xmin, ymax, xmax] format (0-1000 scale) and the label.
-            Format: {{ "box_2d": [ymin, xmin, ymax, xmax], "label": "found element" }}
-            If not found, return empty JSON {{}}.
-            Only return JSON.
-            """
-            
-            response = self.vision_model.generate_content([prompt, img])
-            print(f"Grounding Raw Response: {response.text}")
-            
-            import re
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group(0))
-                box = data.get("box_2d")
+            capture = get_screen_capture()
+            with span("screen_capture"):
+                frame = await get_execution_layer().run("screen_capture", capture.capture)
+
+            # Fast path: OCR / template match on the frame, tens of ms against seconds for the model
+            element = await self._locate_locally(frame, text)
+            if element is not None:
+                print(f"Grounding (local {element.source}, {element.confidence:.2f}): '{element.label}'")
+                box = element.box_2d(frame.image.size)
+            else:
+                # Cached per (query, screen): the same question about an unchanged screen costs no call
+                response_text = await self.llm.generate(
+                    "grounding", [GROUNDING_PROMPT.format(query=text), frame.part()],
+                    query=text, image_hash=frame.phash,
+                )
+                print(f"Grounding Raw Response: {response_text}")
+
+                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+                box = json.loads(json_match.group(0)).get("box_2d") if json_match else None
+
+            if box:
+                screen_w, screen_h = frame.screen_size
+                ymin, xmin, ymax, xmax = box
+                x = (xmin / 1000) * screen_w
+                y = (ymin / 1000) * screen_h
+                w = ((xmax - xmin) / 1000) * screen_w
+                h = ((ymax - ymin) / 1000) * screen_h
+                
+                highlights = [{
+                    "x": int(x), "y": int(y), 
+                    "width": int(w), "height": int(h), 
+                    "label": text
+                }]
                 
-                if box:
-                    screen_w, screen_h = pyautogui.size()
-                    ymin, xmin, ymax, xmax = box
-                    x = (xmin / 1000) * screen_w
-                    y = (ymin / 1000) * screen_h
-                    w = ((xmax - xmin) / 1000) * screen_w
-                    h = ((ymax - ymin) / 1000) * screen_h
-                    
-                    highlights = [{
-                        "x": int(x), "y": int(y), 
-                        "width": int(w), "height": int(h), 
-                        "label": text
-                    }]
-                    
-                    return {
-                        "render": {
-                            "type": "render",
-                            "text": f"I found it right here.",
-                            "tts": True,
-                            "highlights": highlights,
-                            "avatar_image_id": "male_business_portrait_v1"
-                        }
+                return {
+                    "render": {
+                        "type": "render",
+                        "text": f"I found it right here.",
+                        "tts": True,
+                        "highlights": highlights,
+                        "avatar_image_id": "male_business_portrait_v1"
                     }
+                }
             return {"render": {"text": "I couldn't locate that on the screen.", "tts": True}}
         except Exception as e:
             print(f"Grounding Error: {e}")
             return {"render": {"text": "I had trouble seeing the screen.", "tts": True}}
 
-    async def parse_intent(self, text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        return await self._parse_intent_logic(text, context)
+    async def parse_intent(self, text: str, context: Dict[str, Any] = None, session_id: str = None) -> Dict[str, Any]:
+        # Includes any screen capture / Gemini call the intent makes (also recorded on their own)
+        with span("agent"):
+            return await self._parse_intent_logic(text, context, session_id)
 
-    async def _parse_intent_logic(self, text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def _parse_intent_logic(self, text: str, context: Dict[str, Any] = None, session_id: str = None) -> Dict[str, Any]:
         """
         Parses user text into structured intent using Gemini (Mocked for now).
+        Keyword intents are resolved in a single pass by the compiled intent_router
+        (see INTENT_TABLE for phrases and priorities) and dispatched to _intent_<name>.
+        Conversation state is keyed by the client's session id (clients that don't send one share a slot).
         """
         print(f"Agent received text: {text}")
-        session_id = "default_session" # For now, single user
+        context = context or {}
+        session_id = session_id or context.get("session_id") or DEFAULT_SESSION
         text_lower = text.lower()
         
         # --- 0. CHECK ACTIVE CONVERSATION STATE ---
-        state = conversation_manager.get_state(session_id)
+        state = await conversation_manager.get_state(session_id)
         if state:
             return await self.handle_conversation_state(session_id, state, text)
 
-        # -1. VISUAL GROUNDING (New Phase 26)
-        grounding_keywords = ["where is", "show me", "highlight", "find the", "point to"]
-        if any(x in text_lower for x in grounding_keywords):
-            return await self.handle_visual_grounding(text)
-
-        # -1. VISION ANALYSIS (New Phase 25)
-        vision_keywords = [
-            "info about", "about this page", "about this website", 
-            "what is on", "summary of", "describe this", 
-            "what is going on", "tell me about it", "look at this"
-        ]
-        
-        if any(x in text_lower for x in vision_keywords):
-             screenshot_path = "storage/temp_vision.png"
-             try:
-                 # 1. Capture Screen
-                 pyautogui.screenshot(screenshot_path)
-                 
-                 # 2. Analyze with Gemini Vision
-                 img = Image.open(screenshot_path)
-                 response = self.vision_model.generate_content(["Describe this webpage in detail for a blind user. Focus on the main content and key actions available. Keep it under 50 words.", img])
-                 description = response.text
-             except Exception as e:
-                 import traceback
-                 traceback.print_exc()
-                 print(f"Vision Error: {e}")
-                 description = f"I'm sorry, I couldn't analyze the screen. Error: {str(e)[:50]}"
-                 
-             return {
-                 "render": {
-                     "type": "render",
-                     "text": description,
-                     "tts": True,
-                     "voice": "en-US-ChristopherNeural",
-                     "avatar_image_id": "male_business_portrait_v1",
-                     "session_id": f"vision_{int(time.time())}"
-                 }
-             }
-
-        # --- 1. GIT CLONE INTENT (Multi-Turn) ---
-        if "clone this repo" in text_lower or "clone repository" in text_lower:
-             conversation_manager.set_intent(session_id, "git_clone", "ask_directory")
-             return {
-                 "render": {
-                     "type": "ask",
-                     "text": "Sure, I can clone this repository. Which directory should I clone it into?",
-                     "tts": True,
-                     "avatar_image_id": "male_business_portrait_v1",
-                     "session_id": "generic_sure" # Reusing 'Sure, I can do that' + custom text? 
-                     # Wait, if text differs, TTS differs. Session ID collision!
-                     # If I set session_id to "generic_which_dir", text MUST match PREDEFINED_RESPONSES.
-                 }
-             }
-
-        if "clone this repo" in text_lower or "clone repository" in text_lower:
-             import re
-             import shutil
-             
-             # Helper to get clipboard
-             def get_clipboard():
-                 try:
-                     # Use PowerShell to get clipboard content
-                     res = subprocess.run(["powershell", "-command", "Get-Clipboard"], capture_output=True, text=True)
-                     return res.stdout.strip()
-                 except:
-                     return ""
+        # Best intent first; a handler returning None (e.g. fill_form with nothing to
+        # extract) hands over to the next matching intent, like the old if-chain did
+        for intent in intent_router.matches(text_lower):
+            handler = getattr(self, f"_intent_{intent}")
+            response = await handler(text, text_lower, context, session_id)
+            if response is not None:
+                return response
 
-             # 1. Parse Directory
-             dir_match = re.search(r"(?:in|into|to)\s+(not the\s+)?(my\s+)?([\w\s]+)", text_lower)
-             target_dir_name = "cloned_repo"
-             
-             if dir_match:
-                 raw_dir = dir_match.group(3).strip().lower()
-                 raw_dir = raw_dir.replace("folder", "").replace("directory", "").strip()
-                 target_dir_name = raw_dir
-             
-             # 2. Resolve Path
-             home = os.path.expanduser("~")
-             if "download" in target_dir_name:
-                 base_path = os.path.join(home, "Downloads")
-             elif "document" in target_dir_name:
-                 base_path = os.path.join(home, "Documents")
-             elif "desktop" in target_dir_name:
-                 base_path = os.path.join(home, "Desktop")
-             else:
-                 base_path = os.path.join(home, "Downloads") # Default to Downloads
-             
-             print(f"DEBUG: Clone Target: {target_dir_name} -> {base_path}")
+        return self._fallback_response(context)
 
-             # 3. Get URL (Try to grab from browser)
-             # Focus Address Bar -> Copy
-             try:
-                 # Attempt to switch back to browser (Alt+Tab) just in case overlay stole focus
-                 print("DEBUG: Switching focus (Alt+Tab)...")
-                 pyautogui.hotkey('alt', 'tab')
-                 time.sleep(0.5) 
-                 
-                 pyautogui.hotkey('ctrl', 'l')
-                 time.sleep(0.2)
-                 pyautogui.hotkey('ctrl', 'c')
-                 time.sleep(0.2)
-                 repo_url = get_clipboard()
-                 print(f"DEBUG: Clipboard URL: '{repo_url}'")
-                 
-                 # Basic validation
-                 if not repo_url or "http" not in repo_url:
-                     raise ValueError("Clipboard does not contain a valid URL")
-                     
-                 # Extract repo name for folder if generic target
-                 if target_dir_name == "cloned_repo":
-                     repo_name = repo_url.split("/")[-1].replace(".git", "")
-                     final_path = os.path.join(base_path, repo_name)
-                 else:
-                     final_path = os.path.join(base_path, target_dir_name)
+    # -1. VISUAL GROUNDING (New Phase 26)
+    async def _intent_visual_grounding(self, text, text_lower, context, session_id):
+        return await self.handle_visual_grounding(text)
 
-                 # 4. Execute Clone
-                 # Run in background so we don't block
-                 cmd = f'git clone {repo_url} "{final_path}"'
-                 print(f"DEBUG: Executing: {cmd}")
-                 subprocess.Popen(cmd, shell=True)
-                 
-                 return {
-                    "render": {
-                        "type": "render",
-                        "text": f"Cloning {repo_url} into {final_path}.",
-                        "tts": True,
-                        "avatar_image_id": "male_business_portrait_v1",
-                        "session_id": "generic_sure"
-                    },
-                    "action": None # Handled on backend
-                }
-             except Exception as e:
-                 print(f"Clone Error: {e}")
-                 return {
-                     "render": {
-                         "type": "render",
-                         "text": "I couldn't get the URL or run the command. Make sure you are on a GitHub page.",
-                         "tts": True
-                     }
-                 }
-
-        # 0. DESKTOP AUTOMATION (Enhancement Phase)
-        if "open" in text_lower or "start" in text_lower or "go to" in text_lower:
-             import re
-             
-             # Clean input
-             cmd = text_lower.replace("open ", "").replace("start ", "").replace("go to ", "").strip()
-             
-             # URL Detection Regex
-             # Fixed: Escaped hyphen or placed at end to avoid range error
-             url_match = re.search(r'(https?://)?(www\.)?[\w-]+\.[a-z]{2,}(/[\w\-./?%&=]*)?', text_lower)
-             url = url_match.group(0) if url_match else None
-             
-             # App Detection
-             is_chrome = "chrome" in text_lower or "browser" in text_lower
-             is_brave = "brave" in text_lower
-             is_edge = "edge" in text_lower
-             is_notepad = "notepad" in text_lower
-             is_calc = "calculator" in text_lower
-             is_vscode = "vs code" in text_lower or "code" in text_lower
-             is_spotify = "spotify" in text_lower
-             
-             response_text = ""
+    # -1. VISION ANALYSIS (New Phase 25)
+    async def _intent_vision_analysis(self, text, text_lower, context, session_id):
+        try:
+            # 1. Capture Screen (in memory, downscaled and encoded once)
+            capture = get_screen_capture()
+            with span("screen_capture"):
+                frame = await get_execution_layer().run("screen_capture", capture.capture)
+            
+            # 2. Analyze with Gemini Vision (cached while the screen looks the same)
+            description = await self.llm.generate("describe_screen", [DESCRIBE_PROMPT, frame.part()], image_hash=frame.phash)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"Vision Error: {e}")
+            description = f"I'm sorry, I couldn't analyze the screen. Error: {str(e)[:50]}"
+            
+        return {
+            "render": {
+                "type": "render",
+                "text": description,
+                "tts": True,
+                "voice": "en-US-ChristopherNeural",
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": f"vision_{int(time.time())}"
+            }
+        }
 
-             # Browser Logic (Chrome, Brave, Edge)
-             browser_cmd = "chrome" if is_chrome else "brave" if is_brave else "msedge" if is_edge else None
-             import webbrowser
+    # --- 1. GIT CLONE INTENT (Multi-Turn) ---
+    async def _intent_git_clone(self, text, text_lower, context, session_id):
+        await conversation_manager.set_intent(session_id, "git_clone", "ask_directory")
+        return {
+            "render": {
+                "type": "ask",
+                "text": "Sure, I can clone this repository. Which directory should I clone it into?",
+                "tts": True,
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "generic_sure"
+            }
+        }
 
-             if browser_cmd and url:
-                 target_url = url if url.startswith("http") else f"https://{url}"
-                 # Specific browser launch
-                 subprocess.Popen(f'start {browser_cmd} "{target_url}"', shell=True)
-                 response_text = f"Opening {browser_cmd.capitalize()} to {url}."
-                 
-             elif url and "go to" in text_lower:
-                 # "Go to youtube.com" (Default Browser)
-                 target_url = url if url.startswith("http") else f"https://{url}"
-                 webbrowser.open(target_url) 
-                 response_text = f"Navigating to {url}."
-                 
-             elif browser_cmd:
-                 subprocess.Popen(f"start {browser_cmd}", shell=True)
-                 response_text = f"Opening {browser_cmd.capitalize()}."
-                 
-             elif is_notepad:
-                 subprocess.Popen("notepad.exe")
-                 response_text = "Opening Notepad."
-                 
-             elif is_calc:
-                 subprocess.Popen("calc.exe")
-                 response_text = "Opening Calculator."
-                 
-             elif is_vscode:
-                 subprocess.Popen("code", shell=True)
-                 response_text = "Opening VS Code."
-                 
-             elif is_spotify:
-                 subprocess.Popen("start spotify", shell=True)
-                 response_text = "Opening Spotify."
-                 
-             else:
-                 # Generic Fallback (Type Search)
-                 app_name = cmd.split(" and ")[0] # Handle "open X and Y" roughly
-                 try:
-                     pyautogui.press('win')
-                     time.sleep(0.5)
-                     pyautogui.write(app_name)
-                     time.sleep(0.5)
-                     pyautogui.press('enter')
-                     response_text = f"Searching for {app_name}."
-                 except Exception as e:
-                     response_text = "I couldn't execute that command."
+    # 0. DESKTOP AUTOMATION (Enhancement Phase)
+    async def _intent_desktop_command(self, text, text_lower, context, session_id):
+        # Clean input
+        cmd = text_lower.replace("open ", "").replace("start ", "").replace("go to ", "").strip()
+        
+        # URL Detection Regex
+        # Fixed: Escaped hyphen or placed at end to avoid range error
+        url_match = re.search(r'(https?://)?(www\.)?[\w-]+\.[a-z]{2,}(/[\w\-./?%&=]*)?', text_lower)
+        url = url_match.group(0) if url_match else None
+        
+        # App Detection (word-boundary matches, see APP_TABLE)
+        apps = set(app_router.matches(text_lower))
+        is_chrome = "chrome" in apps
+        is_brave = "brave" in apps
+        is_edge = "edge" in apps
+        is_notepad = "notepad" in apps
+        is_calc = "calculator" in apps
+        is_vscode = "vscode" in apps
+        is_spotify = "spotify" in apps
+        
+        response_text = ""
 
-             return {
-                 "render": {
-                     "type": "render",
-                     "text": response_text,
-                     "tts": True,
-                     "voice": "en-US-ChristopherNeural",
-                     "avatar_image_id": "male_business_portrait_v1",
-                     "session_id": f"desktop_cmd_{int(time.time())}"
-                 }
-             }
-             
-        # 1. Signup Flow (Chain: Open Modal -> Switch to Signup)
-        if "sign up" in text_lower or "create account" in text_lower or "sign me up" in text_lower:
-            return {
-                "render": {
-                    "type": "render",
-                    "text": "Opening the registration form for you.",
-                    "tts": True,
-                    "voice": "en-US-ChristopherNeural",
-                    "avatar_image_id": "male_business_portrait_v1",
-                    "session_id": "signup_v1"
-                },
-                "action": {
-                    "type": "action",
-                    "action_type": "chain",
-                    "actions": [
-                        {
-                            "action_type": "ensure_open",
-                            "target": "body",
-                            "class_name": "show-popup",
-                            "target_name": "Login Modal"
-                        },
-                        {
-                            "action_type": "click",
-                            "target": "#signup-link",
-                            "target_name": "Switch to Signup"
-                        }
-                    ]
-                }
-            }
+        # Browser Logic (Chrome, Brave, Edge)
+        browser_cmd = "chrome" if is_chrome else "brave" if is_brave else "msedge" if is_edge else None
+        import webbrowser
 
-        # 1b. Form Filling Intent (Username/Password)
-        if "username is" in text_lower or "password is" in text_lower:
-            payload = {}
-            import re
+        if browser_cmd and url:
+            target_url = url if url.startswith("http") else f"https://{url}"
+            # Specific browser launch
+            subprocess.Popen(f'start {browser_cmd} "{target_url}"', shell=True)
+            response_text = f"Opening {browser_cmd.capitalize()} to {url}."
             
-            # Extract username
-            u_match = re.search(r"username is (\w+)", text_lower)
-            if u_match:
-                payload["username"] = u_match.group(1)
-                
-            # Extract password (simple regex)
-            p_match = re.search(r"password is (\S+)", text_lower)
-            if p_match:
-                payload["password"] = p_match.group(1)
+        elif url and "go to" in text_lower:
+            # "Go to youtube.com" (Default Browser)
+            target_url = url if url.startswith("http") else f"https://{url}"
+            webbrowser.open(target_url) 
+            response_text = f"Navigating to {url}."
+            
+        elif browser_cmd:
+            subprocess.Popen(f"start {browser_cmd}", shell=True)
+            response_text = f"Opening {browser_cmd.capitalize()}."
+            
+        elif is_notepad:
+            subprocess.Popen("notepad.exe")
+            response_text = "Opening Notepad."
+            
+        elif is_calc:
+            subprocess.Popen("calc.exe")
+            response_text = "Opening Calculator."
+            
+        elif is_vscode:
+            subprocess.Popen("code", shell=True)
+            response_text = "Opening VS Code."
+            
+        elif is_spotify:
+            subprocess.Popen("start spotify", shell=True)
+            response_text = "Opening Spotify."
+            
+        else:
+            # Generic Fallback (Type Search)
+            app_name = cmd.split(" and ")[0] # Handle "open X and Y" roughly
+            try:
+                import pyautogui
+                pyautogui.press('win')
+                time.sleep(0.5)
+                pyautogui.write(app_name)
+                time.sleep(0.5)
+                pyautogui.press('enter')
+                response_text = f"Searching for {app_name}."
+            except Exception as e:
+                response_text = "I couldn't execute that command."
 
-            if payload:
-                return {
-                    "render": {
-                        "type": "render",
-                        "text": f"Filling the form with: {', '.join(payload.keys())}",
-                        "tts": True,
-                        "voice": "en-US-ChristopherNeural", 
-                        "avatar_image_id": "male_business_portrait_v1"
+        return {
+            "render": {
+                "type": "render",
+                "text": response_text,
+                "tts": True,
+                "voice": "en-US-ChristopherNeural",
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": f"desktop_cmd_{int(time.time())}"
+            }
+        }
+        
+    # 1. Signup Flow (Chain: Open Modal -> Switch to Signup)
+    async def _intent_signup(self, text, text_lower, context, session_id):
+        return {
+            "render": {
+                "type": "render",
+                "text": "Opening the registration form for you.",
+                "tts": True,
+                "voice": "en-US-ChristopherNeural",
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "signup_v1"
+            },
+            "action": {
+                "type": "action",
+                "action_type": "chain",
+                "actions": [
+                    {
+                        "action_type": "ensure_open",
+                        "target": "body",
+                        "class_name": "show-popup",
+                        "target_name": "Login Modal"
                     },
-                    "action": {
-                        "type": "action",
-                        "action_type": "fill_form",
-                        "payload": payload,
-                        "confirm_message": f"Fill form with {payload}?"
+                    {
+                        "action_type": "click",
+                        "target": "#signup-link",
+                        "target_name": "Switch to Signup"
                     }
-                }
-            
-        # 2. Join Exam Flow
-        if "join exam" in text_lower or "take exam" in text_lower or "start exam" in text_lower:
-            return {
-                "render": {
-                    "type": "render",
-                    "text": "Navigating to the Exam Interface.",
-                    "tts": True,
-                    "voice": "en-US-ChristopherNeural",
-                    "avatar_image_id": "male_business_portrait_v1",
-                    "session_id": "join_exam_v1"
-                },
-                "action": {
-                    "type": "action",
-                    "action_type": "navigate",
-                    "payload": { "route": "/monitoring/" },
-                    "confirmation_required": False
-                }
+                ]
             }
+        }
+
+    # 1b. Form Filling Intent (Username/Password)
+    async def _intent_fill_form(self, text, text_lower, context, session_id):
+        payload = {}
+        
+        # Extract username
+        u_match = re.search(r"username is (\w+)", text_lower)
+        if u_match:
+            payload["username"] = u_match.group(1)
             
-        # 3. Dashboard Flow (and Sub-navigation)
-        if "dashboard" in text_lower:
-             # Just go to main dashboard view
-             return {
-                "render": {
-                    "type": "render",
-                    "text": "Taking you to your Dashboard.",
-                    "tts": True,
-                    "voice": "en-US-ChristopherNeural",
-                    "avatar_image_id": "male_business_portrait_v1",
-                    "session_id": "dashboard_v1"
-                },
-                "action": {
-                    "type": "action",
-                    "action_type": "chain",
-                    "actions": [
-                         # Ensure we are on the page first, then click (optional, but good for robustness)
-                         {"action_type": "navigate", "payload": {"route": "/users/"}},
-                         {"action_type": "click", "target": "#dashboard-link", "target_name": "Dashboard Tab"}
-                    ]
-                }
-            }
+        # Extract password (simple regex)
+        p_match = re.search(r"password is (\S+)", text_lower)
+        if p_match:
+            payload["password"] = p_match.group(1)
+
+        if not payload:
+            # Nothing extractable: let the next matching intent handle it
+            return None
             
-        if any(x in text_lower for x in ["create exam", "create an exam", "create a test", "create new exam", "new room", "create test", "make an exam"]):
-             is_dashboard = "/users/" in context.get("current_page", "")
-             
-             if is_dashboard:
-                 action = {"type": "action", "action_type": "click", "target": "#create-exam-room-link", "target_name": "Create Exam Tab"}
-             else:
-                 action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=create-exam-room-link"}}
-             
-             return {
-                "render": {"type": "render", "text": "Opening Create Exam Room section.", "tts": True},
-                "action": action
+        return {
+            "render": {
+                "type": "render",
+                "text": f"Filling the form with: {', '.join(payload.keys())}",
+                "tts": True,
+                "voice": "en-US-ChristopherNeural", 
+                "avatar_image_id": "male_business_portrait_v1"
+            },
+            "action": {
+                "type": "action",
+                "action_type": "fill_form",
+                "payload": payload,
+                "confirm_message": f"Fill form with {payload}?"
             }
-            
-        if "manage student" in text_lower or "students" in text_lower:
-             is_dashboard = "/users/" in context.get("current_page", "")
-             if is_dashboard:
-                 action = {"type": "action", "action_type": "click", "target": "#manage-student-link", "target_name": "Manage Students Tab"}
-             else:
-                 action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=manage-student-link"}}
-                 
-             return {
-                "render": {"type": "render", "text": "Showing Manage Students section.", "tts": True},
-                "action": action
+        }
+        
+    # 2. Join Exam Flow
+    async def _intent_join_exam(self, text, text_lower, context, session_id):
+        return {
+            "render": {
+                "type": "render",
+                "text": "Navigating to the Exam Interface.",
+                "tts": True,
+                "voice": "en-US-ChristopherNeural",
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "join_exam_v1"
+            },
+            "action": {
+                "type": "action",
+                "action_type": "navigate",
+                "payload": { "route": "/monitoring/" },
+                "confirmation_required": False
             }
-            
-        if "logs" in text_lower or "report" in text_lower:
-             is_dashboard = "/users/" in context.get("current_page", "")
-             
-             if is_dashboard:
-                 action = {"type": "action", "action_type": "click", "target": "#log-reports-link", "target_name": "Logs Tab"}
-             else:
-                 action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=log-reports-link"}}
-                 
-             return {
-                "render": {"type": "render", "text": "Opening Logs and Reports.", "tts": True},
-                "action": action
+        }
+        
+    # 3. Dashboard Flow (and Sub-navigation)
+    async def _intent_dashboard(self, text, text_lower, context, session_id):
+        # Just go to main dashboard view
+        return {
+            "render": {
+                "type": "render",
+                "text": "Taking you to your Dashboard.",
+                "tts": True,
+                "voice": "en-US-ChristopherNeural",
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "dashboard_v1"
+            },
+            "action": {
+                "type": "action",
+                "action_type": "chain",
+                "actions": [
+                     # Ensure we are on the page first, then click (optional, but good for robustness)
+                     {"action_type": "navigate", "payload": {"route": "/users/"}},
+                     {"action_type": "click", "target": "#dashboard-link", "target_name": "Dashboard Tab"}
+                ]
             }
+        }
+        
+    async def _intent_create_exam(self, text, text_lower, context, session_id):
+        is_dashboard = "/users/" in context.get("current_page", "")
+        
+        if is_dashboard:
+            action = {"type": "action", "action_type": "click", "target": "#create-exam-room-link", "target_name": "Create Exam Tab"}
+        else:
+            action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=create-exam-room-link"}}
+        
+        return {
+            "render": {"type": "render", "text": "Opening Create Exam Room section.", "tts": True},
+            "action": action
+        }
+        
+    async def _intent_manage_students(self, text, text_lower, context, session_id):
+        is_dashboard = "/users/" in context.get("current_page", "")
+        if is_dashboard:
+            action = {"type": "action", "action_type": "click", "target": "#manage-student-link", "target_name": "Manage Students Tab"}
+        else:
+            action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=manage-student-link"}}
             
-        if "logout" in text_lower or "sign out" in text_lower:
-             return {
-                "render": {"type": "render", "text": "Logging you out.", "tts": True, "session_id": "generic_done"},
-                "action": {"type": "action", "action_type": "click", "target": ".logout", "target_name": "Logout Button"}
-            }
+        return {
+            "render": {"type": "render", "text": "Showing Manage Students section.", "tts": True},
+            "action": action
+        }
+        
+    async def _intent_logs(self, text, text_lower, context, session_id):
+        is_dashboard = "/users/" in context.get("current_page", "")
+        
+        if is_dashboard:
+            action = {"type": "action", "action_type": "click", "target": "#log-reports-link", "target_name": "Logs Tab"}
+        else:
+            action = {"type": "action", "action_type": "navigate", "payload": {"route": "/users/?agent_click=log-reports-link"}}
+            
+        return {
+            "render": {"type": "render", "text": "Opening Logs and Reports.", "tts": True},
+            "action": action
+        }
+        
+    async def _intent_logout(self, text, text_lower, context, session_id):
+        return {
+            "render": {"type": "render", "text": "Logging you out.", "tts": True, "session_id": "generic_done"},
+            "action": {"type": "action", "action_type": "click", "target": ".logout", "target_name": "Logout Button"}
+        }
 
-        # 4. General Navigation
-        if "home" in text_lower or "main page" in text_lower:
-             return {
-                "render": {"type": "render", "text": "Going Home.", "tts": True, "session_id": "navigation_going_home"},
-                "action": {"type": "action", "action_type": "navigate", "payload": {"route": "/"}}
-            }
-        if "about us" in text_lower or "about company" in text_lower:  # Restricted
-             return {
-                "render": {"type": "render", "text": "Showing About Us.", "tts": True, "session_id": "generic_opening"},
-                "action": {"type": "action", "action_type": "navigate", "payload": {"route": "/#about"}}
-            }
+    # 4. General Navigation
+    async def _intent_home(self, text, text_lower, context, session_id):
+        return {
+            "render": {"type": "render", "text": "Going Home.", "tts": True, "session_id": "navigation_going_home"},
+            "action": {"type": "action", "action_type": "navigate", "payload": {"route": "/"}}
+        }
 
-        # 5. Login Flow
-        if "log in" in text_lower or "login" in text_lower:
-            return {
-                "render": {
-                    "type": "render",
-                    "text": "Okay, opening the login screen.",
-                    "tts": True,
-                    "avatar_image_id": "male_business_portrait_v1",
-                    "session_id": "auth_login"
-                },
-                "action": {
-                    "type": "action",
-                    "action_type": "click",
-                    "target": ".login-btn",
-                    "target_name": "Login Button",
-                    "confirmation_required": False
-                }
+    async def _intent_about_us(self, text, text_lower, context, session_id):  # Restricted
+        return {
+            "render": {"type": "render", "text": "Showing About Us.", "tts": True, "session_id": "generic_opening"},
+            "action": {"type": "action", "action_type": "navigate", "payload": {"route": "/#about"}}
+        }
+
+    # 5. Login Flow
+    async def _intent_login(self, text, text_lower, context, session_id):
+        return {
+            "render": {
+                "type": "render",
+                "text": "Okay, opening the login screen.",
+                "tts": True,
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "auth_login"
+            },
+            "action": {
+                "type": "action",
+                "action_type": "click",
+                "target": ".login-btn",
+                "target_name": "Login Button",
+                "confirmation_required": False
             }
-            
-        # 3. Stop Flow
-        if "stop" in text_lower:
-             return {
-                "render": {
-                    "type": "render",
-                    "text": "Stops speaking.",
-                    "stop_playback": True
-                }
+        }
+        
+    # 3. Stop Flow
+    async def _intent_stop(self, text, text_lower, context, session_id):
+        return {
+            "render": {
+                "type": "render",
+                "text": "Stops speaking.",
+                "stop_playback": True
             }
+        }
 
-        # 4. Greeting Flow
-        if any(x in text_lower for x in ["hello", "hi", "hey"]):
-            return {
-                "render": {
-                    "type": "render",
-                    "text": "Hi, how can I help you today?",
-                    "tts": True,
-                    "avatar_image_id": "male_business_portrait_v1",
-                    "session_id": "generic_listening" # or 'greeting_v1' if we want custom
-                }
+    # 4. Greeting Flow
+    async def _intent_greeting(self, text, text_lower, context, session_id):
+        return {
+            "render": {
+                "type": "render",
+                "text": "Hi, how can I help you today?",
+                "tts": True,
+                "avatar_image_id": "male_business_portrait_v1",
+                "session_id": "generic_listening" # or 'greeting_v1' if we want custom
             }
+        }
 
-        # 5. Default / Clarify (Context Aware)
+    # 5. Default / Clarify (Context Aware)
+    def _fallback_response(self, context):
         current_page = context.get("current_page", "") if context else ""
         
         fallback_text = "I'm not sure I understood. Do you want to sign up or log in?"
@@ -0,0 +1,279 @@
+from typing import Dict, Optional
+import asyncio
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from api.config import get_config
+from api.services.metrics import get_metrics
+
+MB = 1024 * 1024
+HOUR = 3600
+
+# Artifact class -> where it lives under the storage root, what one artifact is (a file, or
+# a directory of files), and default budgets (overridable under `storage.classes:`).
+# None = no limit. Render cache audio/video have their own budgets (`render_cache:`).
+DEFAULT_CLASSES = {
+    "uploads": {"dir": "temp", "unit": "dir", "max_mb": 2048, "max_age_hours": 24},            # /v1/render inputs
+    "tts_outputs": {"dir": "outputs", "unit": "file", "max_mb": 1024, "max_age_hours": 24 * 7}, # /v1/tts results
+    "voice_samples": {"dir": "voice_samples", "unit": "file", "max_mb": None, "max_age_hours": None},
+    "streams": {"dir": "cache/stream", "unit": "dir", "max_mb": 4096, "max_age_hours": 24},    # progressive HLS renders
+    # Per-session stream directories of older versions (storage/sessions/<uuid>), no longer written
+    "sessions": {"dir": "sessions", "unit": "dir", "max_mb": None, "max_age_hours": 24},
+}
+
+def shard(name: str) -> str:
+    """Two-level fan-out ("ab/cd") from a hash of the name, so no directory grows past a few thousand entries."""
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return os.path.join(digest[:2], digest[2:4])
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    """
+    Where request artifacts (uploads, TTS outputs, voice samples, HLS streams) are written,
+    and a SQLite index of them: (path, kind, size, created, last access, pinned).
+
+    - path_for(kind, name) gives a hash-sharded location under the class directory and
+      path(kind, name) also creates its parent, for writers; register() records the
+      artifact once written.
+    - touch() notes an access in memory; last-access times are written on the next sweep
+      (one transaction, not one per request).
+    - sweep() (the janitor, run periodically by run_janitor) deletes the class's
+      artifacts older than max_age_hours, then the least recently used ones until it is
+      within max_mb. Pinned artifacts are never deleted.
+    - reconcile() indexes files already on disk (older layouts, other processes) and
+      drops rows whose files are gone. Runs at startup.
+
+    SQLite in WAL mode, like the sessions store, so several worker processes can share it.
+    The index lives outside root: everything under the storage root is served at /static.
+    """
+    def __init__(self, root: str = "storage", index_path: str = "data/artifacts.db", classes: Dict[str, dict] = None):
+        self.root = os.path.abspath(root)
+        self.classes = {}
+        for kind, defaults in DEFAULT_CLASSES.items():
+            self.classes[kind] = {**defaults, **((classes or {}).get(kind) or {})}
+        for kind, cfg in (classes or {}).items():
+            self.classes.setdefault(kind, {"unit": "file", "max_mb": None, "max_age_hours": None, **cfg})
+
+        self.index_path = index_path or "data/artifacts.db"
+        legacy_index = os.path.join(self.root, "artifacts.db")
+        if os.path.abspath(self.index_path) != legacy_index and os.path.exists(legacy_index):
+            print(f"Warning: {legacy_index} is an old artifact index inside the served storage root. Delete it (and its -wal/-shm files).")
+        self._lock = threading.Lock()
+        self._accessed = {} # rel path -> last access, written by sweep()
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts (path TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL, pinned INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_kind_access ON artifacts (kind, pinned, last_access)")
+
+        # Stats
+        self.deleted = {kind: 0 for kind in self.classes}
+        self.freed_bytes = {kind: 0 for kind in self.classes}
+        self.last_sweep = None
+
+    def class_dir(self, kind: str) -> str:
+        return os.path.join(self.root, self.classes[kind]["dir"])
+
+    def path_for(self, kind: str, name: str) -> str:
+        """Sharded path of an artifact. Touches nothing on disk, so lookups don't leave empty shard directories behind."""
+        return os.path.join(self.class_dir(kind), shard(name), name)
+
+    def path(self, kind: str, name: str) -> str:
+        """path_for() for a new artifact: parent directories are created, the artifact itself is not."""
+        path = self.path_for(kind, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def register(self, path: str, kind: str, pinned: bool = False):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO artifacts (path, kind, size, created, last_access, pinned) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, last_access = excluded.last_access, "
+                "pinned = MAX(pinned, excluded.pinned)",
+                (self._rel(path), kind, _size(path), now, now, int(pinned)),
+            )
+
+    def pin(self, path: str, pinned: bool = True):
+        with self._lock:
+            self._conn.execute("UPDATE artifacts SET pinned = ? WHERE path = ?", (int(pinned), self._rel(path)))
+
+    def touch(self, path: str):
+        rel = self._rel(path)
+        if not rel.startswith(os.pardir):
+            self._accessed[rel] = time.time()
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _remove(self, rel: str) -> bool:
+        path = os.path.join(self.root, rel)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                return False
+        return True
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Enforces every class's age and size budgets. Returns artifacts deleted per class.
+        Filesystem work happens outside the lock, so register() calls from requests never wait on it.
+        """
+        now = time.time()
+        removed = {}
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            self._conn.executemany("UPDATE artifacts SET last_access = MAX(last_access, ?) WHERE path = ?",
+                                   [(t, rel) for rel, t in accessed.items()])
+        for kind, cfg in self.classes.items():
+            if cfg["unit"] == "dir":
+                # Directories keep growing after register() (streams render in the background)
+                sizes = [(_size(os.path.join(self.root, rel)), rel)
+                         for rel, in self._query("SELECT path FROM artifacts WHERE kind = ?", (kind,))]
+                with self._lock:
+                    self._conn.executemany("UPDATE artifacts SET size = ? WHERE path = ?", sizes)
+
+            victims = {}
+            if cfg.get("max_age_hours") is not None:
+                cutoff = now - cfg["max_age_hours"] * HOUR
+                victims.update(self._query(
+                    "SELECT path, size FROM artifacts WHERE kind = ? AND pinned = 0 AND last_access < ?", (kind, cutoff)))
+            if cfg.get("max_mb") is not None:
+                budget = cfg["max_mb"] * MB
+                total = self._query("SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE kind = ?", (kind,))[0][0]
+                total -= sum(victims.values())
+                if total > budget:
+                    # Least recently used first
+                    for rel, size in self._query(
+                            "SELECT path, size FROM artifacts WHERE kind = ? AND pinned = 0 ORDER BY last_access", (kind,)):
+                        if total <= budget:
+                            break
+                        if rel not in victims:
+                            victims[rel] = size
+                            total -= size
+
+            deleted = [(rel, size) for rel, size in victims.items() if self._remove(rel)]
+            with self._lock:
+                self._conn.executemany("DELETE FROM artifacts WHERE path = ?", [(rel,) for rel, _ in deleted])
+            self.deleted[kind] = self.deleted.get(kind, 0) + len(deleted)
+            self.freed_bytes[kind] = self.freed_bytes.get(kind, 0) + sum(size for _, size in deleted)
+            removed[kind] = len(deleted)
+        self.last_sweep = now
+        return removed
+
+    def reconcile(self) -> int:
+        """Indexes artifacts found on disk but not in the index; forgets indexed ones that are gone. Returns how many were added."""
+        added = []
+        for kind, cfg in self.classes.items():
+            class_dir = self.class_dir(kind)
+            units = set()
+            for dirpath, _, filenames in os.walk(class_dir):
+                if not filenames:
+                    continue
+                if cfg["unit"] == "dir":
+                    if dirpath != class_dir:
+                        units.add(dirpath)
+                else:
+                    units.update(os.path.join(dirpath, name) for name in filenames)
+            if kind == "uploads":
+                # Audio uploads of older versions were written straight into storage/
+                units.update(glob.glob(os.path.join(self.root, "temp_*.*")))
+            for path in units:
+                st = os.stat(path)
+                added.append((self._rel(path), kind, _size(path), st.st_mtime, st.st_mtime))
+        with self._lock:
+            before = self._conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO artifacts (path, kind, size, created, last_access, pinned) VALUES (?, ?, ?, ?, ?, 0)", added)
+            gone = [(rel,) for rel, in self._conn.execute("SELECT path FROM artifacts").fetchall()
+                    if not os.path.exists(os.path.join(self.root, rel))]
+            self._conn.executemany("DELETE FROM artifacts WHERE path = ?", gone)
+            self._conn.execute("COMMIT")
+            after = self._conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+        return after - before + len(gone)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(pinned), 0) FROM artifacts GROUP BY kind").fetchall()
+        usage = {kind: (count, size, pinned) for kind, count, size, pinned in rows}
+        classes = {}
+        for kind, cfg in self.classes.items():
+            count, size, pinned = usage.get(kind, (0, 0, 0))
+            classes[kind] = {
+                "artifacts": count,
+                "bytes": size,
+                "pinned": pinned,
+                "budget_bytes": int(cfg["max_mb"] * MB) if cfg.get("max_mb") is not None else None,
+                "max_age_hours": cfg.get("max_age_hours"),
+                "deleted": self.deleted.get(kind, 0),
+                "freed_bytes": self.freed_bytes.get(kind, 0),
+            }
+        return {"classes": classes, "last_sweep": self.last_sweep}
+
+def _collect_artifacts(store: ArtifactStore):
+    def collect():
+        for kind, stats in store.stats()["classes"].items():
+            yield "gauge", "storage_artifact_bytes", "Bytes on disk per artifact class", {"kind": kind}, stats["bytes"]
+            yield "gauge", "storage_artifacts", "Indexed artifacts per class", {"kind": kind}, stats["artifacts"]
+            yield "counter", "storage_janitor_deleted_total", "Artifacts deleted by the janitor", {"kind": kind}, stats["deleted"]
+    return collect
+
+async def run_janitor(store: ArtifactStore, interval_seconds: float):
+    """Background loop: reconcile once, then sweep every interval_seconds (on a worker thread)."""
+    loop = asyncio.get_running_loop()
+    added = await loop.run_in_executor(None, store.reconcile)
+    if added:
+        print(f"Storage janitor: indexed {added} artifacts already on disk")
+    while True:
+        try:
+            removed = await loop.run_in_executor(None, store.sweep)
+            if any(removed.values()):
+                print(f"Storage janitor: deleted {removed}")
+        except Exception as e:
+            print(f"Storage janitor error: {e}")
+        await asyncio.sleep(interval_seconds)
+
+# Singleton instance
+_artifact_store = None
+
+def get_artifact_store() -> ArtifactStore:
+    global _artifact_store
+    if _artifact_store is None:
+        cfg = get_config().get("storage", {})
+        _artifact_store = ArtifactStore(
+            root=cfg.get("local_path", "storage"),
+            index_path=cfg.get("index_path"),
+            classes=cfg.get("classes"),
+        )
+        get_metrics().add_collector(_collect_artifacts(_artifact_store))
+    return _artifact_store
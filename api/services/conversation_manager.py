@@ -1,33 +1,49 @@
 from typing import Dict, Any, Optional
-import uuid
+import asyncio
+from api.services.session_store import SessionStore, get_session_store
+
+DEFAULT_SESSION = "default_session"
 
 class ConversationManager:
     """
     Manages multi-turn conversation state.
-    In-memory storage for simplicity (can be upgraded to Redis/DB).
+    State lives in a SessionStore (in-memory LRU, SQLite or Redis, see `sessions:` in
+    settings.yaml), keyed by the client's session id and expiring after a TTL.
+    Methods are coroutines: SQLite and Redis calls run in a worker thread, off the event loop.
     """
-    def __init__(self):
-        # Maps session_id (or user_id) -> State Dict
-        self._sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, store: SessionStore = None):
+        # Resolved on first use so importing doesn't open a database
+        self._store = store
+
+    @property
+    def store(self) -> SessionStore:
+        if self._store is None:
+            self._store = get_session_store()
+        return self._store
+
+    async def _call(self, method: str, *args):
+        store = self.store
+        if not store.blocking:
+            return getattr(store, method)(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, getattr(store, method), *args)
 
-    def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
-        return self._sessions.get(session_id)
+    async def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call("get", session_id)
 
-    def update_state(self, session_id: str, new_state: Dict[str, Any]):
-        if session_id not in self._sessions:
-            self._sessions[session_id] = {}
-        self._sessions[session_id].update(new_state)
+    async def update_state(self, session_id: str, new_state: Dict[str, Any]):
+        state = await self._call("get", session_id) or {}
+        state.update(new_state)
+        await self._call("set", session_id, state)
 
-    def clear_state(self, session_id: str):
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+    async def clear_state(self, session_id: str):
+        await self._call("delete", session_id)
 
-    def set_intent(self, session_id: str, intent: str, step: str = "start", data: Dict = None):
-        self._sessions[session_id] = {
+    async def set_intent(self, session_id: str, intent: str, step: str = "start", data: Dict = None):
+        await self._call("set", session_id, {
             "intent": intent,
             "step": step,
             "data": data or {}
-        }
+        })
 
 # Global Instance
 conversation_manager = ConversationManager()
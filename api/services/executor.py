@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+
+from api.config import get_config
+from core_models.tracing import in_context
+
+# Pool name -> default worker count (overridable under `execution:` in settings.yaml)
+#   lip_sync:        CPU-bound torch/OpenCV work, keep close to the number of model replicas you can afford
+#   speaker_encoder: d-vector embedding for voice enrollment / identification
+#   lip_sync_stream: progressive (HLS) renders, which hold a worker for the whole clip,
+#                    kept apart so they can't starve /v1/render on the lip_sync pool
+#   grounding:       OCR / template matching for local UI element lookup
+#   screen_capture:  screen grab + downscale + encode for the vision intents
+# (STT has its own pool sized by the `stt:` settings, see api/services/stt_pool.py)
+DEFAULT_WORKERS = {
+    "lip_sync": 1,
+    "lip_sync_stream": 1,
+    "speaker_encoder": 1,
+    "grounding": 1,
+    "screen_capture": 1,
+}
+
+class ExecutionLayer:
+    """
+    Runs blocking model work off the asyncio event loop.
+
+    Each workload class gets its own bounded pool so a long lip-sync render can
+    never starve TTS or STT, and none of them block the loop serving /health.
+    torch, OpenCV and CTranslate2 release the GIL in their heavy kernels, so
+    dedicated worker threads give real parallelism without re-loading models
+    in separate processes.
+    """
+    def __init__(self, workers: Dict[str, int] = None):
+        workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.workers = workers
+        self._pools = {
+            name: ThreadPoolExecutor(max_workers=max(1, int(count)), thread_name_prefix=f"exec-{name}")
+            for name, count in workers.items()
+        }
+
+    def pool(self, name: str) -> ThreadPoolExecutor:
+        if name not in self._pools:
+            raise KeyError(f"Unknown execution pool '{name}'. Available: {list(self._pools)}")
+        return self._pools[name]
+
+    async def run(self, pool: str, fn: Callable, *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) executed on the named pool (in the caller's context, so spans reach its trace)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool(pool), in_context(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._pools.values():
+            executor.shutdown(wait=wait)
+
+# Singleton instance
+_execution_layer = None
+
+def get_execution_layer() -> ExecutionLayer:
+    global _execution_layer
+    if _execution_layer is None:
+        _execution_layer = ExecutionLayer(get_config().get("execution", {}))
+    return _execution_layer
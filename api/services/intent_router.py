@@ -0,0 +1,148 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import re
+
+# Declarative intent table: (intent, priority, trigger phrases).
+# Lower priority wins when several intents match the same utterance. Phrases match on
+# word boundaries ("hi" does not fire inside "this"), case-insensitively, with any run of
+# whitespace between words.
+INTENT_TABLE: List[Tuple[str, int, Sequence[str]]] = [
+    ("visual_grounding", 10, ["where is", "show me", "highlight", "find the", "point to"]),
+    ("vision_analysis", 20, [
+        "info about", "about this page", "about this website",
+        "what is on", "summary of", "describe this",
+        "what is going on", "tell me about it", "look at this",
+    ]),
+    ("git_clone", 30, ["clone this repo", "clone this repository", "clone repository"]),
+    ("signup", 40, ["sign up", "create account", "create an account", "sign me up"]),
+    ("fill_form", 50, ["username is", "password is"]),
+    ("join_exam", 60, ["join exam", "take exam", "start exam"]),
+    ("dashboard", 70, ["dashboard"]),
+    ("create_exam", 80, ["create exam", "create an exam", "create a test", "create new exam", "new room", "create test", "make an exam"]),
+    ("manage_students", 90, ["manage student", "manage students", "students"]),
+    ("logs", 100, ["logs", "report", "reports"]),
+    ("logout", 110, ["logout", "log out", "sign out"]),
+    ("home", 120, ["home", "homepage", "main page"]),
+    ("about_us", 130, ["about us", "about company"]),
+    ("login", 140, ["log in", "login"]),
+    # Generic verbs rank below every site-specific intent, so "go to dashboard" or
+    # "start exam" reach their own handlers instead of desktop automation
+    ("desktop_command", 150, ["open", "start", "go to"]),
+    ("stop", 160, ["stop"]),
+    ("greeting", 170, ["hello", "hi", "hey"]),
+]
+
+# Apps the desktop_command handler knows how to launch
+APP_TABLE: List[Tuple[str, int, Sequence[str]]] = [
+    ("chrome", 10, ["chrome", "browser"]),
+    ("brave", 20, ["brave"]),
+    ("edge", 30, ["edge"]),
+    ("notepad", 40, ["notepad"]),
+    ("calculator", 50, ["calculator"]),
+    ("vscode", 60, ["vs code", "vscode", "visual studio code", "code"]),
+    ("spotify", 70, ["spotify"]),
+]
+
+_LEAF = ""
+
+# Every ASCII character \w doesn't match, as one character class: the scan can skip to
+# the next separator in C instead of testing a lookbehind at every position
+_ASCII_SEPARATOR = "[" + re.escape("".join(chr(c) for c in range(128) if not re.match(r"\w", chr(c)))) + "]"
+
+def _normalize(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+def _trie_pattern(node: dict, best: dict) -> str:
+    """
+    Regex for a phrase trie. Branches are ordered by the best priority reachable
+    through them, so at any start position the highest-priority phrase is the one
+    that matches. Each phrase ends in an empty named group that identifies it.
+    """
+    branches = []
+    for ch, child in node.items():
+        if ch == _LEAF:
+            branches.append((best[id(node), _LEAF], rf"(?!\w)(?P<p{child}>)"))
+        else:
+            piece = r"\s+" if ch == " " else re.escape(ch)
+            branches.append((best[id(child)], piece + _trie_pattern(child, best)))
+    branches.sort(key=lambda b: b[0])
+    if len(branches) == 1:
+        return branches[0][1]
+    return "(?:" + "|".join(pattern for _, pattern in branches) + ")"
+
+
+class IntentRouter:
+    """
+    Compiles an intent table into one regex, so an utterance is scanned once and the
+    highest-priority intent among all matches wins.
+
+    The phrases are merged into a character trie (shared prefixes like "create ..." or
+    "log ..." are only tested once) and the whole thing is wrapped in a word-start
+    lookbehind plus a lookahead: matching is zero-width, so every word start is tried
+    and a phrase can never swallow the start of another one.
+
+    ASCII text (nearly every utterance) is scanned with a second copy of the regex that
+    starts with a separator character instead of the lookbehind, against " " + text:
+    Python's re has a fast skip loop for a leading character class but not for a
+    lookbehind, so only word starts get the trie tested.
+    """
+    def __init__(self, table: List[Tuple[str, int, Sequence[str]]]):
+        self.priorities: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+        trie: dict = {}
+        for intent, priority, phrases in table:
+            if intent in self.priorities:
+                raise ValueError(f"Duplicate intent '{intent}' in table")
+            self.priorities[intent] = priority
+            for phrase in phrases:
+                node = trie
+                for ch in _normalize(phrase):
+                    node = node.setdefault(ch, {})
+                if _LEAF in node:
+                    # Same phrase listed twice: the higher-priority intent keeps it
+                    if self.priorities[self._names[f"p{node[_LEAF]}"]] <= priority:
+                        continue
+                node[_LEAF] = len(self._names)
+                self._names[f"p{node[_LEAF]}"] = intent
+
+        best: dict = {}
+        def rank(node):
+            ranks = []
+            for ch, child in node.items():
+                if ch == _LEAF:
+                    best[id(node), _LEAF] = self.priorities[self._names[f"p{child}"]]
+                    ranks.append(best[id(node), _LEAF])
+                else:
+                    ranks.append(rank(child))
+            best[id(node)] = min(ranks)
+            return best[id(node)]
+        rank(trie)
+
+        body = _trie_pattern(trie, best)
+        self._pattern = re.compile(r"(?<!\w)(?=" + body + ")")
+        self._ascii_pattern = re.compile(_ASCII_SEPARATOR + "(?=" + body + ")")
+
+    def _scan(self, text: str):
+        text = text.lower()
+        if text.isascii():
+            return self._ascii_pattern.finditer(" " + text)
+        return self._pattern.finditer(text)
+
+    def matches(self, text: str) -> List[str]:
+        """Every intent that wins at some word start in text, best first."""
+        found = {self._names[m.lastgroup] for m in self._scan(text)}
+        return sorted(found, key=lambda name: self.priorities[name])
+
+    def match(self, text: str) -> Optional[str]:
+        """The winning intent for text, or None."""
+        best = None
+        best_priority = None
+        for m in self._scan(text):
+            name = self._names[m.lastgroup]
+            priority = self.priorities[name]
+            if best is None or priority < best_priority:
+                best, best_priority = name, priority
+        return best
+
+# Compiled once at import
+intent_router = IntentRouter(INTENT_TABLE)
+app_router = IntentRouter(APP_TABLE)
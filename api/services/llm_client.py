@@ -0,0 +1,228 @@
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+import asyncio
+import threading
+import time
+
+from api.config import get_config
+from api.services.metrics import get_metrics
+from api.services.screen_capture import hamming
+from api.services.single_flight import SingleFlight
+from core_models.tracing import span
+
+class LLMTimeoutError(TimeoutError):
+    """No answer (from any hedged attempt) within the call's deadline."""
+
+
+class GeminiBackend:
+    """google.generativeai through its async client. The SDK is imported on first call."""
+    def __init__(self, model_name: str = "gemini-1.5-flash-latest", api_key: str = None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+
+    def _client(self):
+        if self._model is None:
+            if not self.api_key:
+                raise RuntimeError("GEMINI_API_KEY is not set")
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def generate(self, parts: List[Any]) -> str:
+        response = await self._client().generate_content_async(parts)
+        return response.text
+
+
+class FakeLLMBackend:
+    """
+    Local stand-in for tests and load runs: answers with responder(parts) (or a fixed
+    text) after latency seconds. latency may be a callable, e.g. to make some calls slow.
+    """
+    def __init__(self, responder: Callable[[List[Any]], str] = None, latency=0.0, text: str = "{}"):
+        self.responder = responder
+        self.latency = latency
+        self.text = text
+        self.calls = 0
+
+    async def generate(self, parts: List[Any]) -> str:
+        self.calls += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        await asyncio.sleep(latency)
+        return self.responder(parts) if self.responder else self.text
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+class LLMClient:
+    """
+    The one way AgentService talks to the LLM.
+
+    - Responses are cached per (prompt template, normalized query, screenshot hash) for
+      ttl_seconds. A screenshot within image_change_threshold bits of a cached one counts
+      as the same screen, so "describe this" twice on the same page costs one call.
+    - Identical calls already in flight are coalesced (SingleFlight).
+    - At most max_concurrency calls run at once; each call has a deadline (timeout_seconds).
+    - Hedging: if an attempt hasn't answered after hedge_after_seconds and a concurrency
+      slot is free, a second identical attempt starts; the first answer wins and the other
+      is cancelled. Trades a little extra load for a shorter tail.
+    """
+    def __init__(self, backend, ttl_seconds: float = 300, max_entries: int = 256, timeout_seconds: float = 20,
+                 max_concurrency: int = 4, hedge_after_seconds: Optional[float] = None,
+                 image_change_threshold: int = 4, metrics=None):
+        self.backend = backend
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.timeout = timeout_seconds
+        self.hedge_after = hedge_after_seconds
+        self.image_change_threshold = image_change_threshold
+        self.metrics = metrics
+        self._semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self._cache = OrderedDict() # (template, query, image_hash) -> (stored_at, text)
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def generate(self, template: str, parts: List[Any], query: str = "", image_hash: Optional[int] = None) -> str:
+        """
+        template names the prompt (e.g. "describe_screen"); query is the user's words that
+        vary it; image_hash the screenshot's perceptual hash, if one is attached.
+        """
+        query = normalize_query(query)
+        cached = self._lookup(template, query, image_hash)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        async def _call():
+            text = await self._call(template, parts)
+            self._store(template, query, image_hash, text)
+            return text
+
+        return await self._flights.do(f"{template}\x1f{query}\x1f{image_hash}", _call)
+
+    def _lookup(self, template, query, image_hash) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            for key in list(self._cache):
+                stored_at, text = self._cache[key]
+                if now - stored_at > self.ttl:
+                    del self._cache[key]
+                    continue
+                if key[0] != template or key[1] != query:
+                    continue
+                if key[2] == image_hash or (
+                        key[2] is not None and image_hash is not None and hamming(key[2], image_hash) <= self.image_change_threshold):
+                    self._cache.move_to_end(key)
+                    return text
+        return None
+
+    def _store(self, template, query, image_hash, text):
+        with self._lock:
+            self._cache[(template, query, image_hash)] = (time.time(), text)
+            self._cache.move_to_end((template, query, image_hash))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    async def _attempt(self, parts):
+        async with self._semaphore:
+            return await self.backend.generate(parts)
+
+    async def _call(self, template: str, parts: List[Any]) -> str:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.timeout
+        self.calls += 1
+        first = asyncio.ensure_future(self._attempt(parts))
+        tasks = {first}
+        hedged = self.hedge_after is None
+        error = None
+        try:
+            with span(f"llm.{template}"):
+                while tasks:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise LLMTimeoutError(f"LLM call '{template}' took longer than {self.timeout}s")
+                    wait = remaining if hedged else min(remaining, max(0.0, start + self.hedge_after - loop.time()))
+                    done, tasks = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is not first:
+                                self.hedge_wins += 1
+                            return task.result()
+                        error = task.exception()
+                    if not hedged and not done:
+                        hedged = True
+                        # Only hedge with spare capacity: under load a duplicate just adds to the queue
+                        if not self._semaphore.locked():
+                            self.hedges += 1
+                            tasks.add(asyncio.ensure_future(self._attempt(parts)))
+                self.errors += 1
+                raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.metrics is not None:
+                self.metrics.histogram("llm_latency_seconds", "LLM call latency (cache misses, hedging included)",
+                                       template=template).observe(loop.time() - start)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "coalesced": self._flights.coalesced,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "cache_entries": len(self._cache),
+        }
+
+def _collect_llm(client: LLMClient):
+    def collect():
+        stats = client.stats()
+        yield "counter", "llm_cache_hits_total", "LLM responses served from cache", {}, stats["hits"]
+        yield "counter", "llm_cache_misses_total", "LLM lookups that missed the cache", {}, stats["misses"]
+        yield "counter", "llm_calls_total", "LLM calls made (before hedging)", {}, stats["calls"]
+        yield "counter", "llm_hedges_total", "Hedged duplicate LLM attempts", {}, stats["hedges"]
+        yield "counter", "llm_timeouts_total", "LLM calls past their deadline", {}, stats["timeouts"]
+        yield "counter", "llm_errors_total", "LLM calls that failed", {}, stats["errors"]
+    return collect
+
+def llm_client_from_config(cfg: dict, api_key: str = None) -> LLMClient:
+    backend_name = cfg.get("backend", "gemini")
+    if backend_name == "gemini":
+        backend = GeminiBackend(cfg.get("model", "gemini-1.5-flash-latest"), api_key)
+    elif backend_name == "fake":
+        backend = FakeLLMBackend(latency=cfg.get("fake_latency_seconds", 0.0))
+    else:
+        raise ValueError(f"Unknown llm.backend '{backend_name}'. Available: gemini, fake")
+    metrics = get_metrics()
+    client = LLMClient(
+        backend,
+        ttl_seconds=cfg.get("cache_ttl_seconds", 300),
+        max_entries=cfg.get("cache_entries", 256),
+        timeout_seconds=cfg.get("timeout_seconds", 20),
+        max_concurrency=cfg.get("max_concurrency", 4),
+        hedge_after_seconds=cfg.get("hedge_after_seconds"),
+        image_change_threshold=cfg.get("image_change_threshold", 4),
+        metrics=metrics,
+    )
+    metrics.add_collector(_collect_llm(client))
+    return client
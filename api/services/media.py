@@ -0,0 +1,199 @@
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from api.config import get_config
+
+# Render cache entries are already named by their content key (see render_cache.py)
+CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64})\.\w+$")
+VERSION_LENGTH = 16
+CHUNK_SIZE = 256 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)", re.ASCII)
+
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+class MediaVersions:
+    """
+    Content version (hex digest prefix) of files under root, for versioned URLs.
+    Render cache entries use the key in their name; other files are hashed once per
+    (mtime, size) and memoized.
+    """
+    def __init__(self, root: str = "storage"):
+        self.root = os.path.abspath(root)
+        self._memo = {} # path -> (mtime_ns, size, version)
+        self._lock = threading.Lock()
+
+    def relpath(self, path: str) -> str:
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel.startswith(os.pardir):
+            raise ValueError(f"{path} is not under {self.root}")
+        return rel.replace(os.sep, "/")
+
+    def version(self, path: str, st: os.stat_result = None) -> str:
+        match = CONTENT_ADDRESSED.match(os.path.basename(path))
+        if match:
+            return match.group(1)[:VERSION_LENGTH]
+        st = st or os.stat(path)
+        with self._lock:
+            cached = self._memo.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        version = h.hexdigest()[:VERSION_LENGTH]
+        with self._lock:
+            self._memo[path] = (st.st_mtime_ns, st.st_size, version)
+        return version
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end exclusive) for a single "bytes=" range; None to send the whole file
+    (no header, several ranges, or an invalid one like "bytes=500-100": RFC 9110 says to
+    ignore those). Raises ValueError if unsatisfiable ("bytes=-0", or starting past the end).
+    """
+    match = BYTE_RANGE.fullmatch(header.replace(" ", "")) if header else None
+    if match is None or match.group(1) == match.group(2) == "":
+        return None # malformed (or several ranges): ignore it
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(f"range {header} selects no bytes")
+        return max(0, size - length), size
+    start = int(first)
+    if last and int(last) < start:
+        return None # invalid rather than unsatisfiable: ignore it
+    if start >= size:
+        raise ValueError(f"range {header} outside 0-{size}")
+    end = min(int(last) + 1, size) if last else size
+    return start, end
+
+
+class MediaFiles:
+    """
+    Serves /media/<version>/<path under storage> (plain ASGI app, mounted by the server).
+
+    - The version is a content digest, so the URL changes whenever the bytes do and
+      responses are cacheable forever (Cache-Control: immutable, strong ETag = version).
+      A URL whose version doesn't match the file on disk any more is a 404.
+    - If-None-Match -> 304; Range / If-Range -> 206 with one byte range (video seeks).
+    - Body: the server's zero-copy ASGI extension when it offers one (zerocopysend,
+      pathsend), else X-Accel-Redirect to a reverse proxy (accel_redirect_prefix), else
+      chunked reads off the event loop.
+    """
+    def __init__(self, versions: MediaVersions, accel_redirect_prefix: Optional[str] = None, artifacts=None):
+        self.versions = versions
+        self.accel_redirect_prefix = accel_redirect_prefix
+        self.artifacts = artifacts # ArtifactStore: served files count as accessed for the janitor's LRU
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            return await self._empty(send, 405, [(b"allow", b"GET, HEAD")])
+
+        # Newer Starlette keeps the full path in a mount and puts the mount prefix in root_path
+        request_path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and request_path.startswith(root_path + "/"):
+            request_path = request_path[len(root_path):]
+        version, _, rel = request_path.lstrip("/").partition("/")
+        path = os.path.abspath(os.path.join(self.versions.root, rel))
+        if not rel or not path.startswith(self.versions.root + os.sep) or not os.path.isfile(path):
+            return await self._empty(send, 404)
+        st = os.stat(path)
+        current = await asyncio.get_running_loop().run_in_executor(None, self.versions.version, path, st)
+        if version != current:
+            return await self._empty(send, 404)
+        if self.artifacts is not None:
+            self.artifacts.touch(path)
+
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        etag = f'"{version}"'
+        headers = [
+            (b"etag", etag.encode("latin-1")),
+            (b"cache-control", IMMUTABLE.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+        ]
+        if etag in [t.strip() for t in request_headers.get("if-none-match", "").split(",")] or request_headers.get("if-none-match") == "*":
+            return await self._empty(send, 304, headers)
+
+        size = st.st_size
+        byte_range = None
+        if request_headers.get("if-range", etag) == etag:
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except ValueError:
+                return await self._empty(send, 416, headers + [(b"content-range", f"bytes */{size}".encode("latin-1"))])
+        start, end = byte_range or (0, size)
+        status = 206 if byte_range else 200
+        if byte_range:
+            headers.append((b"content-range", f"bytes {start}-{end - 1}/{size}".encode("latin-1")))
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        headers.append((b"content-type", content_type.encode("latin-1")))
+
+        if self.accel_redirect_prefix and scope["method"] == "GET":
+            # nginx (or similar) sends the file itself, with sendfile, honouring the Range header
+            location = self.accel_redirect_prefix.rstrip("/") + "/" + rel
+            headers = [h for h in headers if h[0] != b"content-range"]
+            return await self._empty(send, 200, headers + [(b"x-accel-redirect", location.encode("utf-8"))])
+
+        headers.append((b"content-length", str(end - start).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] == "HEAD":
+            return await send({"type": "http.response.body", "body": b""})
+        await self._send_file(scope, send, path, start, end, whole=not byte_range)
+
+    async def _send_file(self, scope, send, path, start, end, whole):
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": end - start})
+            return
+        if whole and "http.response.pathsend" in extensions:
+            return await send({"type": "http.response.pathsend", "path": path})
+
+        loop = asyncio.get_running_loop()
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, min(CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                more = bool(chunk) and remaining > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    break
+
+    async def _empty(self, send, status, headers=()):
+        await send({"type": "http.response.start", "status": status, "headers": list(headers) + [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+# Singleton instance
+_media_versions = None
+
+def get_media_versions() -> MediaVersions:
+    global _media_versions
+    if _media_versions is None:
+        _media_versions = MediaVersions(get_config().get("media", {}).get("root", "storage"))
+    return _media_versions
+
+def media_url(path: str) -> str:
+    """Content-versioned URL for a file under storage/, on media.base_url (e.g. a CDN)."""
+    versions = get_media_versions()
+    base_url = get_config().get("media", {}).get("base_url", "").rstrip("/")
+    return f"{base_url}/media/{versions.version(path)}/{versions.relpath(path)}"
+
+def public_url(path: str) -> str:
+    """Unversioned /static URL on media.base_url, for files that still change (live HLS playlists)."""
+    base_url = get_config().get("media", {}).get("base_url", "").rstrip("/")
+    return f"{base_url}/static/{get_media_versions().relpath(path)}"
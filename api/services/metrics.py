@@ -0,0 +1,205 @@
+from typing import Sequence
+import bisect
+import threading
+
+from core_models import tracing
+
+# Upper bounds in seconds, for request-sized work (STT decodes, LLM calls)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+# Upper bounds for queue lengths
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus style: cumulative counts per upper bound,
+    plus sum and count). Cheap enough to observe on every request from any thread.
+    """
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1) # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (None if empty or past the last bucket)."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, value_sum = self.count, self.sum
+        cumulative = {}
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            cumulative[f"{bound:g}"] = seen
+        cumulative["+Inf"] = total
+        return {
+            "count": total,
+            "sum": round(value_sum, 4),
+            "mean": round(value_sum / total, 4) if total else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    """
+    Histograms by (name, labels) plus collectors read at scrape time, rendered in the
+    Prometheus text format for /metrics.
+
+    A collector is a callable returning (kind, name, help, labels, value) samples, where
+    kind is "counter", "gauge" or "histogram" (value is then a Histogram). That lets the
+    existing stats (render cache hits, pool queues...) be exported without double counting.
+    """
+    def __init__(self, prefix: str = "interactgen_"):
+        self.prefix = prefix
+        self._histograms = {} # (name, sorted label items) -> Histogram
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS, **labels) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                    self._help.setdefault(name, help)
+        return histogram
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def _samples(self):
+        for (name, labels), histogram in list(self._histograms.items()):
+            yield "histogram", name, self._help.get(name, ""), dict(labels), histogram
+        for collector in self._collectors:
+            try:
+                yield from collector()
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+
+    def render(self) -> str:
+        families = {} # name -> (kind, help, [(labels, value)]), first-seen order
+        for kind, name, help, labels, value in self._samples():
+            families.setdefault(name, (kind, help, []))[2].append((labels, value))
+
+        lines = []
+        for name, (kind, help, samples) in families.items():
+            full = self.prefix + name
+            if help:
+                lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, value in samples:
+                if kind == "histogram":
+                    snapshot = value.snapshot()
+                    for bound, count in snapshot["buckets"].items():
+                        lines.append(f"{full}_bucket{_labels({**labels, 'le': bound})} {count}")
+                    lines.append(f"{full}_sum{_labels(labels)} {snapshot['sum']}")
+                    lines.append(f"{full}_count{_labels(labels)} {snapshot['count']}")
+                else:
+                    lines.append(f"{full}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    return f"{float(value):g}" if isinstance(value, float) else str(int(value))
+
+# --- Default collectors (imports are deferred; nothing is loaded just to be measured) ---
+def _collect_render_cache():
+    from api.services.render_cache import get_render_cache
+    from api.services.orchestrator import render_flights
+    for tier, stats in get_render_cache().stats().items():
+        yield "counter", "render_cache_hits_total", "Render cache hits", {"tier": tier}, stats["hits"]
+        yield "counter", "render_cache_misses_total", "Render cache misses", {"tier": tier}, stats["misses"]
+        yield "counter", "render_cache_evictions_total", "Render cache evictions", {"tier": tier}, stats["evictions"]
+        yield "gauge", "render_cache_bytes", "Render cache size on disk", {"tier": tier}, stats["bytes"]
+    yield "gauge", "renders_in_flight", "Distinct renders running (identical requests are coalesced)", {}, render_flights.stats()["in_flight"]
+
+def _collect_models():
+    from api.services.model_registry import get_model_registry
+    registry = get_model_registry()
+    for name, stats in registry.stats()["models"].items():
+        yield "gauge", "model_loaded", "1 if the model is loaded", {"model": name}, 1 if stats.get("loaded") else 0
+        if stats.get("load_seconds") is not None:
+            yield "gauge", "model_load_seconds", "Time the model took to load", {"model": name}, stats["load_seconds"]
+
+    if registry.is_loaded("stt"):
+        pool = registry.get("stt")
+        yield "gauge", "stt_in_flight", "Transcriptions running or queued", {}, pool.in_flight
+        yield "gauge", "stt_queue_depth", "Transcriptions waiting for a free STT worker", {}, pool.waiting
+        yield "counter", "stt_rejected_total", "Transcriptions rejected because the queue was full", {}, pool.rejected
+        yield "histogram", "stt_queue_depth_on_arrival", "Queue depth seen by each transcription", {}, pool.queue_depth
+        yield "histogram", "stt_queue_wait_seconds", "Time transcriptions waited for a worker", {}, pool.queue_wait
+        yield "histogram", "stt_latency_seconds", "Transcription time on a worker", {}, pool.latency
+
+    if registry.is_loaded("lip_sync"):
+        engine = registry.get("lip_sync")
+        avatar = engine.avatar_cache.stats()
+        yield "counter", "avatar_cache_hits_total", "Prepared-avatar cache hits", {}, avatar["hits"]
+        yield "counter", "avatar_cache_misses_total", "Prepared-avatar cache misses", {}, avatar["misses"]
+        if engine.scheduler is not None:
+            batching = engine.scheduler.stats()
+            yield "gauge", "lip_sync_batch_queue_items", "Work items waiting for a batched forward pass", {}, batching["queued_items"]
+            yield "gauge", "lip_sync_batch_active_renders", "Renders sharing the batch scheduler", {}, batching["active_sessions"]
+            yield "gauge", "lip_sync_batch_avg_frames", "Average frames per batched forward pass", {}, batching["avg_batch_frames"]
+
+def _collect_execution():
+    from api.services.executor import get_execution_layer
+    layer = get_execution_layer()
+    for name in layer.workers:
+        yield "gauge", "execution_queue_depth", "Jobs waiting for a worker thread", {"pool": name}, layer.pool(name)._work_queue.qsize()
+
+def _collect_sessions():
+    from api.services.conversation_manager import conversation_manager
+    stats = conversation_manager.store.stats()
+    if "sessions" in stats:
+        yield "gauge", "sessions", "Live conversation sessions", {"backend": stats["backend"]}, stats["sessions"]
+
+# Singleton instance
+_metrics = None
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics
+    if _metrics is None:
+        metrics = MetricsRegistry()
+        for collector in (_collect_render_cache, _collect_models, _collect_execution, _collect_sessions):
+            metrics.add_collector(collector)
+        # Every span (see core_models/tracing.py) lands in one histogram per stage
+        tracing.add_listener(lambda stage, seconds: metrics.histogram(
+            "stage_seconds", "Time spent per pipeline stage", stage=stage).observe(seconds))
+        _metrics = metrics
+    return _metrics
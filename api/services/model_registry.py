@@ -0,0 +1,171 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+import asyncio
+import os
+import threading
+import time
+
+from api.config import get_config
+
+MB = 1024 * 1024
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it can't be measured here."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        # Linux without psutil
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide home for model engines.
+
+    Engines are registered as factories and only built on first get() (or by
+    warm_up() in the background), so importing the API is cheap and every router
+    shares the same instance instead of loading its own copy of the weights.
+
+    Loads are serialized: besides guaranteeing one instance per process, that keeps
+    the resident-memory delta recorded for each model from mixing with another load.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._versions: Dict[str, Union[str, Callable[[], str]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_stats: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any], version: Union[str, Callable[[], str]] = None):
+        """
+        version (string or callable) lets callers get the engine version, e.g. for
+        cache keys, without loading the model. Defaults to the instance's engine_version.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            if version is not None:
+                self._versions[name] = version
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """Return the engine, loading it on first use. Blocking: call from a worker thread or use aget()."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            if name not in self._factories:
+                raise KeyError(f"Unknown model '{name}'. Registered: {list(self._factories)}")
+
+            print(f"Loading model '{name}'...")
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                model = self._factories[name]()
+            except Exception as e:
+                # Not cached: the next call retries (e.g. after the weights are downloaded)
+                self._load_stats[name] = {"loaded": False, "error": str(e)}
+                raise
+            load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+
+            self._models[name] = model
+            self._load_stats[name] = {
+                "loaded": True,
+                "load_seconds": round(load_seconds, 3),
+                "rss_delta_mb": round((rss_after - rss_before) / MB, 1) if rss_before is not None and rss_after is not None else None,
+                "loaded_at": time.time(),
+            }
+            print(f"Model '{name}' loaded in {load_seconds:.2f}s")
+            return model
+
+    async def aget(self, name: str) -> Any:
+        """get() that loads off the event loop."""
+        if name in self._models:
+            return self._models[name]
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def version(self, name: str) -> str:
+        model = self._models.get(name)
+        if model is not None:
+            return model.engine_version
+        version = self._versions.get(name)
+        if version is None:
+            return self.get(name).engine_version
+        return version() if callable(version) else version
+
+    async def warm_up(self, names: Iterable[str]):
+        """Load models in the background (e.g. right after startup); failures are logged, not raised."""
+        for name in names:
+            try:
+                await self.aget(name)
+            except Exception as e:
+                print(f"Warm-up of model '{name}' failed: {e}")
+
+    def stats(self) -> dict:
+        stats = {}
+        for name in self._factories:
+            stats[name] = self._load_stats.get(name, {"loaded": False})
+        rss = _rss_bytes()
+        return {
+            "models": stats,
+            "process_rss_mb": round(rss / MB, 1) if rss is not None else None,
+        }
+
+# --- Default engines (imports are deferred so registering costs nothing) ---
+def _tts_factory():
+    from core_models.tts.edge_tts_engine import EdgeTTSEngine
+    return EdgeTTSEngine()
+
+def _tts_version():
+    from core_models.tts.edge_tts_engine import EdgeTTSEngine
+    return EdgeTTSEngine.engine_version
+
+def _lip_sync_factory():
+    from core_models.lip_sync.wav2lip import Wav2LipEngine
+    cfg = get_config().get("lip_sync", {})
+    return Wav2LipEngine(batching=cfg.get("batching"), inference=cfg.get("inference"))
+
+def _lip_sync_version():
+    # Same as the loaded engine's: select_backend never swaps the configured backend for another
+    from core_models.lip_sync.settings import engine_version_for
+    inference = get_config().get("lip_sync", {}).get("inference") or {}
+    return engine_version_for(backend=inference.get("backend", "eager"))
+
+def _stt_factory():
+    # Pool of faster-whisper instances sized by the `stt:` settings
+    from api.services.stt_pool import stt_pool_from_config
+    return stt_pool_from_config()
+
+def _speaker_encoder_factory():
+    from core_models.voice_cloning.encoder import SpeakerEncoder
+    from api.services.voice_profiles import get_voice_profiles
+    return SpeakerEncoder(enroll=lambda embedding, meta: get_voice_profiles().enroll(embedding, meta)[0])
+
+# Singleton instance
+_model_registry = None
+
+def get_model_registry() -> ModelRegistry:
+    global _model_registry
+    if _model_registry is None:
+        registry = ModelRegistry()
+        registry.register("tts", _tts_factory, version=_tts_version)
+        registry.register("lip_sync", _lip_sync_factory, version=_lip_sync_version)
+        registry.register("stt", _stt_factory)
+        registry.register("speaker_encoder", _speaker_encoder_factory)
+        _model_registry = registry
+    return _model_registry
+
+def warm_up_models():
+    """Names listed under `models: warm_up:` in settings.yaml."""
+    return get_config().get("models", {}).get("warm_up", []) or []
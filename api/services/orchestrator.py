@@ -1,36 +1,235 @@
-from core_models.tts.edge_tts_engine import EdgeTTSEngine
-from core_models.lip_sync.wav2lip import Wav2LipEngine
+from collections import OrderedDict
+from core_models.lip_sync.hls import HLSPlaylist
+from api.services.artifact_store import get_artifact_store
+from api.services.executor import get_execution_layer
+from api.services.model_registry import get_model_registry
+from api.services.render_cache import get_render_cache, cache_key, file_digest
+from api.services.single_flight import SingleFlight
+from api.services.voice_profiles import voice_options
+from api.config import get_config
+from core_models.tracing import record, span
+import asyncio
 import os
+import shutil
+import time
 import uuid
 
+def make_render_keys(tts_version: str, lip_sync_version: str, avatar_digest: str,
+                     text: str = None, audio_path: str = None, voice_profile_id: str = None):
+    """
+    (audio_key, video_key) for the render cache. Shared with pre_generate_assets.py so
+    batch-rendered clips land exactly where the server looks for them.
+    """
+    if text and not audio_path:
+        audio_key = cache_key("tts", tts_version, voice_profile_id, text)
+    elif audio_path:
+        audio_key = cache_key("upload", file_digest(audio_path))
+    else:
+        raise ValueError("Either text or audio must be provided")
+    video_key = cache_key("video", lip_sync_version, audio_key, avatar_digest)
+    return audio_key, video_key
+
+# Digests of avatar images kept per Orchestrator; the few shipped avatars stay hot
+AVATAR_DIGEST_ENTRIES = 256
+
+# Global Instance: shared by every Orchestrator so identical renders coalesce process-wide
+render_flights = SingleFlight(timeout=get_config().get("render", {}).get("coalesce_timeout_seconds"))
+
 class Orchestrator:
-    def __init__(self):
-        self.tts = EdgeTTSEngine()
-        self.lip_sync = Wav2LipEngine()
+    def __init__(self, tts=None, lip_sync=None, cache=None, artifacts=None):
+        # Engines/cache are injectable so load tests can run without model weights.
+        # Otherwise they come from the shared model registry, loaded on first use.
+        self._tts = tts
+        self._lip_sync = lip_sync
+        self.models = get_model_registry()
+        self.executor = get_execution_layer()
+        self.cache = cache or get_render_cache()
+        self._artifacts = artifacts # HLS stream directories (ArtifactStore); None = the shared one
+        self._avatar_digests = OrderedDict() # (path, mtime, size) -> digest, LRU (uploads add a new path per request)
         
-    async def render_pipeline(self, image_path: str, text: str = None, audio_path: str = None, voice_profile_id: str = None, session_id: str = None):
+        # Progressive (HLS) rendering: short first segment for fast start, longer ones after
+        self.stream_first_chunk_seconds = 1.0
+        self.stream_chunk_seconds = 3.0
+        
+    @property
+    def artifacts(self):
+        if self._artifacts is None:
+            self._artifacts = get_artifact_store()
+        return self._artifacts
+
+    @property
+    def tts(self):
+        return self._tts if self._tts is not None else self.models.get("tts")
+
+    @property
+    def lip_sync(self):
+        # Blocking on first use (loads the checkpoint): only touch it from the lip_sync pool
+        return self._lip_sync if self._lip_sync is not None else self.models.get("lip_sync")
+
+    def _engine_version(self, name: str) -> str:
+        # Cache keys need the version, not the model: a cache hit never loads weights
+        engine = {"tts": self._tts, "lip_sync": self._lip_sync}[name]
+        return engine.engine_version if engine is not None else self.models.version(name)
+
+    def _avatar_digest(self, image_path: str) -> str:
+        # Avatars are re-used every turn; only re-hash when the file changes
+        st = os.stat(image_path)
+        memo_key = (image_path, st.st_mtime_ns, st.st_size)
+        digest = self._avatar_digests.get(memo_key)
+        if digest is None:
+            digest = file_digest(image_path)
+            self._avatar_digests[memo_key] = digest
+            while len(self._avatar_digests) > AVATAR_DIGEST_ENTRIES:
+                self._avatar_digests.popitem(last=False)
+        else:
+            self._avatar_digests.move_to_end(memo_key)
+        return digest
+
+    def _render_keys(self, image_path: str, text: str = None, audio_path: str = None, voice_profile_id: str = None):
+        """(audio_key, video_key) for a request, computed without rendering anything."""
+        return make_render_keys(
+            self._engine_version("tts"), self._engine_version("lip_sync"), self._avatar_digest(image_path),
+            text=text, audio_path=audio_path, voice_profile_id=voice_profile_id
+        )
+
+    async def _resolve_audio(self, audio_key: str, text: str = None, audio_path: str = None, voice_profile_id: str = None) -> str:
+        """TTS output comes from / goes into the audio cache tier; uploaded audio is used as-is."""
+        if audio_path:
+            return audio_path
+            
+        async def _synthesize(tmp_path):
+            tts = self._tts if self._tts is not None else await self.models.aget("tts")
+            with span("tts"):
+                await tts.synthesize_async(text, tmp_path, voice_options(voice_profile_id))
+            
+        return await self.cache.get_or_create("audio", audio_key, ".wav", _synthesize)
+
+    async def render(self, image_path: str, text: str = None, audio_path: str = None, voice_profile_id: str = None, session_id: str = None) -> dict:
+        """
+        Full TTS + lip-sync pipeline backed by the content-addressed render cache.
+        Identical (text, voice, avatar, engine versions) requests share one audio and one video file,
+        whatever session_id they come with, and concurrent identical requests are coalesced
+        onto a single in-flight render.
+        Returns {"video_path", "audio_path", "session_id"}.
+        """
         if not session_id:
             session_id = str(uuid.uuid4())
             
-        output_dir = f"storage/sessions/{session_id}"
-        video_output_path = os.path.join(output_dir, "final_video.mp4")
+        audio_key, video_key = self._render_keys(image_path, text, audio_path, voice_profile_id)
+        
+        async def _render():
+            # 1. Audio Generation (if text provided)
+            resolved_audio = await self._resolve_audio(audio_key, text, audio_path, voice_profile_id)
+            
+            # 2. Lip Sync Animation
+            async def _animate(tmp_path):
+                submitted = time.perf_counter()
+                
+                def _run():
+                    record("lip_sync.queue", time.perf_counter() - submitted)
+                    with span("lip_sync"):
+                        self.lip_sync.animate(image_path, resolved_audio, tmp_path)
+                        
+                await self.executor.run("lip_sync", _run)
+                
+            video_path = await self.cache.get_or_create("video", video_key, ".mp4", _animate)
+            return {"video_path": video_path, "audio_path": resolved_audio}
+            
+        with span("render"):
+            result = await render_flights.do(f"render:{video_key}", _render)
+        return {**result, "session_id": session_id}
         
-        # Check cache
-        if os.path.exists(output_dir) and os.path.exists(video_output_path):
-             return video_output_path, session_id
+    async def render_pipeline(self, image_path: str, text: str = None, audio_path: str = None, voice_profile_id: str = None, session_id: str = None):
+        result = await self.render(image_path, text, audio_path, voice_profile_id, session_id)
+        return result["video_path"], result["session_id"]
 
-        os.makedirs(output_dir, exist_ok=True)
+    async def render_stream(self, image_path: str, text: str = None, audio_path: str = None, voice_profile_id: str = None, session_id: str = None):
+        """
+        Progressive variant of render_pipeline. Renders the clip as HLS segments on the
+        lip_sync_stream pool and returns as soon as the first segment is playable; the
+        playlist keeps growing until EXT-X-ENDLIST is written.
+        Returns {"playlist_path", "video_path", "session_id"}: video_path (and no playlist)
+        when the finished clip is already in the video cache.
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+            
+        audio_key, video_key = self._render_keys(image_path, text, audio_path, voice_profile_id)
         
-        # 1. Audio Generation (if text provided)
-        if text and not audio_path:
-            audio_path = os.path.join(output_dir, "speech.wav")
-            # In a real app we would load the voice profile here
-            self.tts.synthesize(text, audio_path, {"voice_profile": voice_profile_id})
+        # Already rendered in full (by /render or pre-generation): no need to stream it
+        video_tier = self.cache.tier("video")
+        video_path = video_tier.peek(video_key, ".mp4")
+        if video_path:
+            video_tier.record(hit=True)
+            return {"playlist_path": None, "video_path": video_path, "session_id": session_id}
+        
+        # Streams are content-addressed like the final video (sharded, aged out by the storage janitor)
+        stream_dir = self.artifacts.path_for("streams", video_key)
+        playlist_path = os.path.join(stream_dir, "index.m3u8")
+        
+        # Check cache (a playlist still being written is fine, players treat it as live;
+        # it only exists once its first segment does)
+        if os.path.exists(playlist_path):
+            self.artifacts.touch(stream_dir)
+            return {"playlist_path": playlist_path, "video_path": None, "session_id": session_id}
             
-        if not audio_path:
-            raise ValueError("Either text or audio must be provided")
+        # Concurrent identical requests wait for the same first segment
+        await render_flights.do(
+            f"stream:{video_key}",
+            lambda: self._start_stream(image_path, text, audio_path, voice_profile_id, audio_key, stream_dir, playlist_path)
+        )
+        return {"playlist_path": playlist_path, "video_path": None, "session_id": session_id}
+
+    async def _start_stream(self, image_path, text, audio_path, voice_profile_id, audio_key, stream_dir, playlist_path):
+        """Kicks off the segment renderer and returns once the first segment is in the playlist."""
+        if os.path.exists(playlist_path):
+            return
             
-        # 2. Lip Sync Animation
-        self.lip_sync.animate(image_path, audio_path, video_output_path)
+        # 1. Audio Generation (if text provided)
+        audio_path = await self._resolve_audio(audio_key, text, audio_path, voice_profile_id)
+        
+        os.makedirs(stream_dir, exist_ok=True)
+        
+        # 2. Lip Sync Animation, segment by segment
+        loop = asyncio.get_running_loop()
+        first_segment = loop.create_future()
         
-        return video_output_path, session_id
+        def _resolve(error):
+            if not first_segment.done():
+                first_segment.set_result(error)
+        
+        def _run():
+            playlist = HLSPlaylist(playlist_path, target_duration=max(self.stream_first_chunk_seconds, self.stream_chunk_seconds))
+            try:
+                for index, segment_path, duration in self.lip_sync.animate_chunks(
+                    image_path, audio_path, stream_dir,
+                    first_chunk_seconds=self.stream_first_chunk_seconds,
+                    chunk_seconds=self.stream_chunk_seconds,
+                ):
+                    playlist.add_segment(segment_path, duration)
+                    if index == 0:
+                        loop.call_soon_threadsafe(_resolve, None)
+                playlist.finish()
+            except Exception as e:
+                print(f"Stream render failed for {stream_dir}: {e}")
+                # Drop the partial stream so the next request re-renders instead of hitting a dead playlist
+                shutil.rmtree(stream_dir, ignore_errors=True)
+                loop.call_soon_threadsafe(_resolve, e)
+                
+        # Not awaited: the rest of the segments keep rendering after we return. Own pool: a stream
+        # holds its worker for the whole clip, which would starve /v1/render on the lip_sync pool
+        self.executor.pool("lip_sync_stream").submit(_run)
+        
+        error = await first_segment
+        if error is not None:
+            raise error
+        self.artifacts.register(stream_dir, "streams")
+
+# Singleton instance (routers share it, and with it the engines and avatar digests)
+_orchestrator = None
+
+def get_orchestrator() -> Orchestrator:
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = Orchestrator()
+    return _orchestrator
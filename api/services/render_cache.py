@@ -0,0 +1,263 @@
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from api.config import get_config
+from api.services.single_flight import SingleFlight
+
+MB = 1024 * 1024
+# Written by pre_generate_assets.py; the files it lists are never evicted.
+# Private like sessions.db and artifacts.db: keep it out of the served storage root
+PREGEN_MANIFEST = "data/pregen_manifest.json"
+
+ENTRY_NAME = re.compile(r"^[0-9a-f]{64}\.\w+$")
+STALE_TMP_SECONDS = 3600
+
+# Tier name -> default disk budget in MB (overridable under `render_cache:` in settings.yaml)
+DEFAULT_BUDGETS_MB = {
+    "audio": 512,
+    "video": 4096,
+}
+
+def cache_key(*parts) -> str:
+    """Stable key for any combination of strings/None (text, voice, avatar hash, engine version...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(b"\x00" if part is None else str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PinnedAssets:
+    """
+    Files listed in the pre-generation manifest, re-read whenever the manifest changes.
+    The manifest stores them relative to the storage root; paths() returns them absolute.
+    """
+    def __init__(self, manifest_path: str, storage_root: str = "storage"):
+        self.manifest_path = manifest_path
+        self.storage_root = storage_root
+        self._mtime = None
+        self._paths = frozenset()
+
+    def paths(self) -> frozenset:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return frozenset()
+        if mtime != self._mtime:
+            try:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                return self._paths # mid-write: keep the previous list
+            self._paths = frozenset(
+                os.path.abspath(os.path.join(self.storage_root, entry[field])) for entry in manifest.values()
+                for field in ("audio_path", "video_path") if entry.get(field)
+            )
+            self._mtime = mtime
+        return self._paths
+
+
+class CacheTier:
+    """
+    One directory of content-addressed files with an on-disk size budget.
+    Entries are tracked in an LRU OrderedDict (rebuilt from file mtimes on startup);
+    hits bump the file mtime so the order survives restarts. Pinned (pre-generated)
+    entries count towards the budget but are never evicted.
+    """
+    def __init__(self, name: str, root: str, budget_bytes: int, pinned: PinnedAssets = None):
+        self.name = name
+        self.root = os.path.join(root, name)
+        self.budget_bytes = budget_bytes
+        self.pinned = pinned
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict() # path -> size
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                st = os.stat(path)
+                if not ENTRY_NAME.match(name):
+                    # Temp file from a crashed render (recent ones may belong to another worker)
+                    if time.time() - st.st_mtime > STALE_TMP_SECONDS:
+                        os.remove(path)
+                    continue
+                found.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self.total_bytes += size
+
+    def path_for(self, key: str, ext: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.root, key[:2], f"{key}{ext}")
+
+    def peek(self, key: str, ext: str) -> Optional[str]:
+        """Return the cached path (and bump its LRU position) without touching the hit/miss counters."""
+        path = self.path_for(key, ext)
+        with self._lock:
+            if not os.path.exists(path):
+                if path in self._entries:
+                    self.total_bytes -= self._entries.pop(path)
+                return None
+            if path not in self._entries:
+                # Written by another worker/process (e.g. the batch pre-generator): adopt it
+                size = os.path.getsize(path)
+                self._entries[path] = size
+                self.total_bytes += size
+            self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, key: str, ext: str) -> Optional[str]:
+        path = self.peek(key, ext)
+        self.record(path is not None)
+        return path
+
+    def tmp_path_for(self, key: str, ext: str) -> str:
+        final_path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # Keep the real extension last so tools that sniff it (ffmpeg) still work
+        return os.path.join(os.path.dirname(final_path), f"{key}.{uuid.uuid4().hex}.part{ext}")
+
+    def commit(self, key: str, ext: str, tmp_path: str) -> str:
+        """Atomically publish tmp_path as the entry for key, then enforce the budget."""
+        final_path = self.path_for(key, ext)
+        os.replace(tmp_path, final_path)
+        size = os.path.getsize(final_path)
+        with self._lock:
+            self.total_bytes -= self._entries.pop(final_path, 0)
+            self._entries[final_path] = size
+            self.total_bytes += size
+            victims = []
+            if self.total_bytes > self.budget_bytes:
+                pinned = self.pinned.paths() if self.pinned is not None else frozenset()
+                for path in list(self._entries):
+                    if self.total_bytes <= self.budget_bytes:
+                        break
+                    if path == final_path or os.path.abspath(path) in pinned:
+                        continue
+                    self.total_bytes -= self._entries.pop(path)
+                    self.evictions += 1
+                    victims.append(path)
+        for path in victims:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return final_path
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class RenderCache:
+    """
+    Content-addressed cache for rendered artifacts (TTS audio, final video).
+
+    get_or_create() returns the cached file for a key or runs the producer once:
+    concurrent callers for the same key are coalesced onto the same render. Producers write to a temp path that is atomically
+    renamed into place, so a reader never sees a partially written file.
+    """
+    def __init__(self, root: str = "storage/cache", budgets_mb: Dict[str, int] = None,
+                 manifest_path: Optional[str] = None, storage_root: str = "storage"):
+        budgets_mb = {**DEFAULT_BUDGETS_MB, **(budgets_mb or {})}
+        self.root = root
+        # No manifest, no pins
+        self.pinned = PinnedAssets(manifest_path, storage_root) if manifest_path else None
+        self.tiers = {name: CacheTier(name, root, int(mb * MB), self.pinned) for name, mb in budgets_mb.items()}
+        self.flights = SingleFlight()
+
+    def tier(self, name: str) -> CacheTier:
+        return self.tiers[name]
+
+    async def get_or_create(self, tier: str, key: str, ext: str,
+                            producer: Callable[[str], Awaitable[None]]) -> str:
+        """
+        producer(tmp_path) must write the artifact to tmp_path.
+        Returns the final cached path.
+        """
+        cache_tier = self.tiers[tier]
+        path = cache_tier.peek(key, ext)
+        if path:
+            cache_tier.record(hit=True)
+            return path
+
+        flight_key = f"{tier}:{key}"
+        if self.flights.in_flight(flight_key):
+            # Served by the render already in progress
+            cache_tier.record(hit=True)
+
+        async def _produce():
+            # Another worker may have committed it between our peek and now
+            path = cache_tier.peek(key, ext)
+            if path:
+                return path
+            cache_tier.record(hit=False)
+            tmp_path = cache_tier.tmp_path_for(key, ext)
+            try:
+                await producer(tmp_path)
+                return cache_tier.commit(key, ext, tmp_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        return await self.flights.do(flight_key, _produce)
+
+    def stats(self) -> dict:
+        return {name: tier.stats() for name, tier in self.tiers.items()}
+
+# Singleton instance (shared by every Orchestrator so locks and counters are process-wide)
+_render_cache = None
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        cfg = get_config().get("render_cache", {})
+        budgets = {k[:-len("_budget_mb")]: v for k, v in cfg.items() if k.endswith("_budget_mb")}
+        _render_cache = RenderCache(
+            root=cfg.get("root", "storage/cache"), budgets_mb=budgets,
+            manifest_path=cfg.get("manifest_path", PREGEN_MANIFEST),
+            storage_root=get_config().get("media", {}).get("root", "storage"),
+        )
+    return _render_cache
@@ -0,0 +1,93 @@
+from typing import Tuple
+import io
+import time
+
+import numpy as np
+
+from api.config import get_config
+
+# 16x16 difference hash = 256 bits. 8x8 (the usual 64-bit dHash) is too coarse for
+# screens: two pages with the same layout hash almost alike.
+HASH_SIZE = 16
+
+class PyAutoGUISource:
+    """The real desktop. pyautogui is imported on first use (it needs a display)."""
+    def grab(self):
+        import pyautogui
+        return pyautogui.screenshot() # PIL image, in memory
+
+    def size(self) -> Tuple[int, int]:
+        # Logical screen size: the coordinate space click/highlight positions live in
+        import pyautogui
+        return tuple(pyautogui.size())
+
+
+class ScreenFrame:
+    """One capture: downscaled image, its encoded bytes (done once) and a perceptual hash."""
+    def __init__(self, image, data: bytes, mime_type: str, screen_size: Tuple[int, int], phash: int):
+        self.image = image
+        self.data = data
+        self.mime_type = mime_type
+        self.screen_size = screen_size
+        self.phash = phash
+        self.captured_at = time.time()
+
+    def part(self) -> dict:
+        """Inline image part for Gemini generate_content (sent as-is, no re-encode)."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+def dhash(image, hash_size: int = HASH_SIZE) -> int:
+    """Difference hash: hash_size^2 bits of 'is this pixel brighter than its right neighbour' on a tiny grayscale thumbnail."""
+    from PIL import Image
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ScreenCapture:
+    """
+    In-memory screen captures for the vision intents.
+
+    capture() grabs the screen, downscales it to max_dim on the longest side, encodes
+    it once (JPEG or WebP) and hashes it. The hash lets the LLM layer (llm_client.py)
+    reuse answers about a screen that hasn't meaningfully changed.
+
+    source: anything with grab() -> PIL image and size() -> (w, h); swap in a fake to
+    run without a display.
+    """
+    def __init__(self, source=None, max_dim: int = 1280, image_format: str = "JPEG", quality: int = 80):
+        self.source = source or PyAutoGUISource()
+        self.max_dim = max_dim
+        self.image_format = image_format.upper()
+        self.quality = quality
+
+    def capture(self) -> ScreenFrame:
+        from PIL import Image
+        image = self.source.grab()
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        # reducing_gap: cheap integer reduce first, then a proper resample of the remainder
+        image.thumbnail((self.max_dim, self.max_dim), Image.BILINEAR, reducing_gap=2.0)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.image_format, quality=self.quality)
+        return ScreenFrame(image, buffer.getvalue(), f"image/{self.image_format.lower()}",
+                           self.source.size(), dhash(image))
+
+# Singleton instance
+_screen_capture = None
+
+def get_screen_capture() -> ScreenCapture:
+    global _screen_capture
+    if _screen_capture is None:
+        cfg = get_config().get("screen_capture", {})
+        _screen_capture = ScreenCapture(
+            max_dim=cfg.get("max_dim", 1280),
+            image_format=cfg.get("format", "JPEG"),
+            quality=cfg.get("quality", 80),
+        )
+    return _screen_capture
@@ -0,0 +1,169 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from api.config import get_config
+
+class SessionStore(ABC):
+    """
+    Key -> JSON-serializable dict with a TTL, refreshed on every write.
+    Backends: MemorySessionStore (per process), SQLiteSessionStore (shared by the
+    workers of one host), RedisSessionStore (shared by any number of hosts).
+    """
+    # Calls do I/O (disk, network): async callers run them in a worker thread
+    blocking = True
+
+    def __init__(self, ttl_seconds: float = 1800):
+        self.ttl = ttl_seconds
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "ttl_seconds": self.ttl}
+
+
+class MemorySessionStore(SessionStore):
+    """LRU-bounded dict: at most max_sessions entries, the least recently used go first."""
+    blocking = False
+
+    def __init__(self, ttl_seconds: float = 1800, max_sessions: int = 10000):
+        super().__init__(ttl_seconds)
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Copy: callers mutate what they get, like with the other backends
+            return json.loads(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, json.dumps(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {**super().stats(), "sessions": len(self._entries), "max_sessions": self.max_sessions, "evictions": self.evictions}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    One table in a local SQLite file (WAL mode, so several worker processes can share it).
+    Expired rows are ignored on read and purged every purge_every writes.
+    """
+    def __init__(self, path: str = "data/sessions.db", ttl_seconds: float = 1800, purge_every: int = 200):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sessions WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._purge()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def _purge(self):
+        self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        return {**super().stats(), "sessions": count, "path": self.path}
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Redis strings with EX, so Redis itself does the expiry (and maxmemory the bounding).
+    client: anything with get/set(ex=)/delete, e.g. redis.Redis or fakeredis.FakeRedis for tests.
+    """
+    def __init__(self, url: str = "redis://localhost:6379/0", ttl_seconds: float = 1800,
+                 key_prefix: str = "interactgen:session:", client=None):
+        super().__init__(ttl_seconds)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        raw = self.client.get(self.key_prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.key_prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.key_prefix + key)
+
+def session_store_from_config(cfg: Dict[str, Any]) -> SessionStore:
+    backend = cfg.get("backend", "memory")
+    ttl = cfg.get("ttl_seconds", 1800)
+    if backend == "memory":
+        return MemorySessionStore(ttl, max_sessions=cfg.get("max_sessions", 10000))
+    if backend == "sqlite":
+        return SQLiteSessionStore(cfg.get("sqlite_path", "data/sessions.db"), ttl)
+    if backend == "redis":
+        return RedisSessionStore(cfg.get("redis_url", "redis://localhost:6379/0"), ttl, cfg.get("key_prefix", "interactgen:session:"))
+    raise ValueError(f"Unknown sessions.backend '{backend}'. Available: memory, sqlite, redis")
+
+# Singleton instance
+_session_store = None
+
+def get_session_store() -> SessionStore:
+    global _session_store
+    if _session_store is None:
+        _session_store = session_store_from_config(get_config().get("sessions", {}))
+    return _session_store
@@ -0,0 +1,65 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts fn() as a separate task; everyone who arrives
+    while it is running awaits the same future and gets the same result or exception.
+    Because the work runs in its own task, a caller that times out or disconnects
+    does not cancel the render for the others.
+    """
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.executions = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks = set() # strong refs: the loop only keeps weak ones to running tasks
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Await fn() once per key. timeout (default: self.timeout) bounds how long this
+        caller waits; on expiry asyncio.TimeoutError is raised but the shared work continues.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            # Mark exceptions as retrieved even if every waiter has already timed out
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+            self.executions += 1
+            task = asyncio.ensure_future(self._run(key, future, fn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.coalesced += 1
+
+        timeout = self.timeout if timeout is None else timeout
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _run(self, key: str, future: asyncio.Future, fn: Callable[[], Awaitable[Any]]):
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
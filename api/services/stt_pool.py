@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+import asyncio
+import queue
+import time
+
+from api.config import get_config
+from api.services.metrics import DEPTH_BUCKETS, Histogram
+from core_models import tracing
+
+class STTBusyError(RuntimeError):
+    """Raised instead of queueing when the STT pool's wait queue is full."""
+
+
+class STTPool:
+    """
+    N faster-whisper instances behind a bounded queue.
+
+    Every instance runs up to num_workers decodes at once (faster-whisper's own
+    num_workers), so instances * num_workers transcriptions run in parallel on a
+    dedicated thread pool. Up to max_queue more wait for a slot; beyond that
+    transcribe() fails fast with STTBusyError so callers can answer 503 instead
+    of piling up requests that would time out anyway.
+
+    Queue depth (seen by each request on arrival), queue wait and decode latency
+    are kept as histograms for sizing the pool (see stats(), exposed on /health).
+    """
+    def __init__(self, engine_factory: Callable[[], object], instances: int = 1, num_workers: int = 1, max_queue: int = 8):
+        instances = max(1, int(instances))
+        num_workers = max(1, int(num_workers))
+        self.engines = [engine_factory() for _ in range(instances)]
+        self.engine_version = getattr(self.engines[0], "engine_version", "faster-whisper")
+        self.capacity = instances * num_workers
+        self.max_queue = max(0, int(max_queue))
+
+        # One token per decode slot; spreads work over instances round-robin
+        self._slots = queue.Queue()
+        for _ in range(num_workers):
+            for engine in self.engines:
+                self._slots.put(engine)
+        self._executor = ThreadPoolExecutor(max_workers=self.capacity, thread_name_prefix="stt")
+
+        # Only touched from the event loop
+        self.in_flight = 0
+        self.rejected = 0
+
+        self.queue_depth = Histogram(DEPTH_BUCKETS)
+        self.queue_wait = Histogram()
+        self.latency = Histogram()
+
+    @property
+    def waiting(self) -> int:
+        return max(0, self.in_flight - self.capacity)
+
+    async def transcribe(self, audio, **options) -> str:
+        """STTEngine.transcribe() on a free instance. Raises STTBusyError when the queue is full."""
+        waiting = self.waiting
+        if self.in_flight >= self.capacity and waiting >= self.max_queue:
+            self.rejected += 1
+            raise STTBusyError(f"STT pool busy ({self.in_flight} in flight, capacity {self.capacity} + queue {self.max_queue})")
+        self.queue_depth.observe(waiting)
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, tracing.in_context(self._run, time.perf_counter(), audio, options))
+        finally:
+            self.in_flight -= 1
+
+    def _run(self, submitted: float, audio, options: dict) -> str:
+        start = time.perf_counter()
+        self.queue_wait.observe(start - submitted)
+        tracing.record("stt.queue", start - submitted)
+        engine = self._slots.get()
+        try:
+            return engine.transcribe(audio, **options)
+        finally:
+            self._slots.put(engine)
+            self.latency.observe(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "instances": len(self.engines),
+            "capacity": self.capacity,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queue_depth": self.queue_depth.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+def stt_pool_from_config() -> STTPool:
+    """Builds the pool (loading every instance) from the `stt:` section of settings.yaml."""
+    from core_models.stt.whisper_engine import STTEngine
+
+    cfg = get_config().get("stt", {})
+    num_workers = cfg.get("num_workers", 1)
+    return STTPool(
+        lambda: STTEngine(
+            model_size=cfg.get("model_size", "base"),
+            device=cfg.get("device", "cpu"),
+            compute_type=cfg.get("compute_type", "int8"),
+            cpu_threads=cfg.get("cpu_threads", 0),
+            num_workers=num_workers,
+        ),
+        instances=cfg.get("instances", 1),
+        num_workers=num_workers,
+        max_queue=cfg.get("max_queue", 8),
+    )
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+import os
+import re
+import threading
+
+import numpy as np
+
+from api.config import get_config
+from api.services.metrics import get_metrics
+from api.services.screen_capture import hamming
+from core_models.tracing import span
+
+# Words in "where is the login button" that say how to point, not what to point at
+FILLER_WORDS = {
+    "where", "is", "are", "the", "a", "an", "show", "me", "highlight", "find", "point", "to",
+    "at", "please", "can", "you", "could", "on", "screen", "this", "page", "my",
+}
+# Element kinds: kept out of the OCR match (a "login button" usually just reads "Login"),
+# but still used to pick a template named e.g. "login_button"
+ELEMENT_WORDS = {"button", "link", "tab", "icon", "field", "box", "menu", "input", "option", "checkbox"}
+
+class UIElement:
+    """A labelled box on a screen frame, in frame (downscaled image) pixels."""
+    def __init__(self, label: str, box: Tuple[int, int, int, int], confidence: float, source: str, line=None):
+        self.label = label
+        self.box = box # x, y, width, height
+        self.confidence = confidence # 0-1
+        self.source = source # "ocr" | "template"
+        self.line = line # OCR line id, for joining neighbouring words into multi-word labels
+
+    def box_2d(self, image_size: Tuple[int, int]) -> List[int]:
+        """[ymin, xmin, ymax, xmax] on the 0-1000 scale the vision model answers in."""
+        width, height = image_size
+        x, y, w, h = self.box
+        return [round(y * 1000 / height), round(x * 1000 / width),
+                round((y + h) * 1000 / height), round((x + w) * 1000 / width)]
+
+def query_terms(query: str) -> Tuple[str, str]:
+    """("login", "login button") for "where is the Login button?": (label to read, label with element kind)."""
+    words = [w for w in re.findall(r"[a-z0-9@.\-']+", query.lower()) if w not in FILLER_WORDS]
+    label = " ".join(w for w in words if w not in ELEMENT_WORDS)
+    return label, " ".join(words)
+
+def similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class TesseractOCR:
+    """Word boxes from Tesseract (pytesseract, imported on first use; needs the tesseract binary)."""
+    def __init__(self, min_word_confidence: float = 40, lang: str = "eng"):
+        self.min_word_confidence = min_word_confidence
+        self.lang = lang
+
+    def read(self, image) -> List[UIElement]:
+        import pytesseract
+        data = pytesseract.image_to_data(image.convert("L"), lang=self.lang, output_type=pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data["text"]):
+            text = text.strip()
+            conf = float(data["conf"][i])
+            if not text or conf < self.min_word_confidence:
+                continue
+            box = (data["left"][i], data["top"][i], data["width"][i], data["height"][i])
+            line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            words.append(UIElement(text.lower(), box, conf / 100, "ocr", line))
+        return words
+
+def _join(words: List[UIElement]) -> UIElement:
+    x0 = min(w.box[0] for w in words)
+    y0 = min(w.box[1] for w in words)
+    x1 = max(w.box[0] + w.box[2] for w in words)
+    y1 = max(w.box[1] + w.box[3] for w in words)
+    return UIElement(" ".join(w.label for w in words), (x0, y0, x1 - x0, y1 - y0),
+                     min(w.confidence for w in words), "ocr")
+
+def label_index(words: List[UIElement], max_words: int = 4) -> List[UIElement]:
+    """Every run of up to max_words consecutive words on a line becomes a candidate label."""
+    lines = OrderedDict()
+    for word in words:
+        lines.setdefault(word.line if word.line is not None else id(word), []).append(word)
+    labels = []
+    for line in lines.values():
+        for start in range(len(line)):
+            for end in range(start + 1, min(len(line), start + max_words) + 1):
+                labels.append(line[start] if end == start + 1 else _join(line[start:end]))
+    return labels
+
+
+class UILocator:
+    """
+    Local grounding for "where is / show me / highlight" requests, tried before the vision model.
+
+    - OCR reads the frame once; the word boxes (and runs of neighbouring words) form a
+      label index kept per screen, keyed by the frame's perceptual hash, so follow-up
+      questions about the same screen skip OCR too.
+    - Templates: PNG crops of known UI elements (icons without text, say) in templates_dir,
+      named after their label ("settings_icon.png"), matched with OpenCV at a few scales.
+    - locate() returns the best match, or None when nothing reaches min_confidence
+      (the caller then asks the vision model).
+
+    ocr: anything with read(PIL image) -> list of UIElement (word boxes); swap in a fake
+    to run without tesseract.
+    """
+    def __init__(self, ocr=None, templates_dir: Optional[str] = None, min_confidence: float = 0.75,
+                 template_threshold: float = 0.85, template_scales=(1.0, 0.75, 0.5),
+                 index_entries: int = 8, image_change_threshold: int = 4):
+        self.ocr = ocr or TesseractOCR()
+        self.min_confidence = min_confidence
+        self.template_threshold = template_threshold
+        self.template_scales = tuple(template_scales)
+        self.index_entries = index_entries
+        self.image_change_threshold = image_change_threshold
+        self.templates = self._load_templates(templates_dir)
+        self._indexes = OrderedDict() # phash -> [UIElement]
+        self._lock = threading.Lock()
+
+        # Stats
+        self.local_hits = 0
+        self.misses = 0
+        self.index_hits = 0
+
+    def _load_templates(self, templates_dir):
+        templates = {}
+        if not templates_dir or not os.path.isdir(templates_dir):
+            return templates
+        import cv2
+        for name in sorted(os.listdir(templates_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in (".png", ".jpg", ".jpeg"):
+                continue
+            image = cv2.imread(os.path.join(templates_dir, name), cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                templates[stem.replace("_", " ").replace("-", " ").lower()] = image
+        print(f"UILocator: {len(templates)} UI templates from {templates_dir}")
+        return templates
+
+    def labels(self, frame) -> List[UIElement]:
+        """The label index for this screen (OCR runs once per distinct screen)."""
+        with self._lock:
+            for phash in list(self._indexes):
+                if hamming(phash, frame.phash) <= self.image_change_threshold:
+                    self._indexes.move_to_end(phash)
+                    self.index_hits += 1
+                    return self._indexes[phash]
+        with span("grounding.ocr"):
+            labels = label_index(self.ocr.read(frame.image))
+        with self._lock:
+            self._indexes[frame.phash] = labels
+            while len(self._indexes) > self.index_entries:
+                self._indexes.popitem(last=False)
+        return labels
+
+    def locate(self, frame, query: str) -> Optional[UIElement]:
+        label, full_label = query_terms(query)
+        if not full_label:
+            return None
+        candidates = []
+        if label:
+            best_text = max(self.labels(frame), key=lambda e: similarity(label, e.label), default=None)
+            if best_text is not None:
+                score = similarity(label, best_text.label) * best_text.confidence
+                candidates.append(UIElement(best_text.label, best_text.box, score, "ocr"))
+        template = self._match_template(frame, full_label)
+        if template is not None:
+            candidates.append(template)
+
+        best = max(candidates, key=lambda e: e.confidence, default=None)
+        if best is None or best.confidence < self.min_confidence:
+            self.misses += 1
+            return None
+        self.local_hits += 1
+        return best
+
+    def _match_template(self, frame, full_label: str) -> Optional[UIElement]:
+        names = [name for name in self.templates if similarity(full_label, name) >= 0.8]
+        if not names:
+            return None
+        import cv2
+        with span("grounding.template"):
+            screen = cv2.cvtColor(np.asarray(frame.image), cv2.COLOR_RGB2GRAY)
+            best = None
+            for name in names:
+                template = self.templates[name]
+                # Templates are cropped from full-resolution screens; the frame is downscaled
+                base = frame.image.size[0] / frame.screen_size[0]
+                for scale in self.template_scales:
+                    factor = base * scale
+                    h, w = int(template.shape[0] * factor), int(template.shape[1] * factor)
+                    if h < 8 or w < 8 or h > screen.shape[0] or w > screen.shape[1]:
+                        continue
+                    resized = cv2.resize(template, (w, h), interpolation=cv2.INTER_AREA)
+                    _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(screen, resized, cv2.TM_CCOEFF_NORMED))
+                    if best is None or score > best.confidence:
+                        best = UIElement(name, (x, y, w, h), float(score), "template")
+        if best is None or best.confidence < self.template_threshold:
+            return None
+        return best
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "fallbacks": self.misses,
+            "local_rate": (self.local_hits / lookups) if lookups else 0.0,
+            "index_hits": self.index_hits,
+            "templates": len(self.templates),
+        }
+
+def _collect_ui_locator(locator: UILocator):
+    def collect():
+        stats = locator.stats()
+        yield "counter", "grounding_local_hits_total", "Grounding requests answered by the local locator", {}, stats["local_hits"]
+        yield "counter", "grounding_fallbacks_total", "Grounding requests passed on to the vision model", {}, stats["fallbacks"]
+    return collect
+
+# Singleton instance
+_ui_locator = None
+
+def get_ui_locator() -> Optional[UILocator]:
+    """None when local grounding is turned off (every request goes to the vision model)."""
+    global _ui_locator
+    cfg = get_config().get("grounding", {})
+    if not cfg.get("local_enabled", True):
+        return None
+    if _ui_locator is None:
+        _ui_locator = UILocator(
+            ocr=TesseractOCR(min_word_confidence=cfg.get("ocr_min_word_confidence", 40), lang=cfg.get("ocr_lang", "eng")),
+            templates_dir=cfg.get("templates_dir", "storage/ui_templates"),
+            min_confidence=cfg.get("min_confidence", 0.75),
+            template_threshold=cfg.get("template_threshold", 0.85),
+            index_entries=cfg.get("index_entries", 8),
+            image_change_threshold=cfg.get("image_change_threshold", 4),
+        )
+        get_metrics().add_collector(_collect_ui_locator(_ui_locator))
+    return _ui_locator
@@ -0,0 +1,221 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from api.config import get_config
+
+try:
+    import fcntl
+except ImportError: # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+EMBEDDINGS_FILE = "embeddings.f32"
+INDEX_FILE = "profiles.json"
+LOCK_FILE = "profiles.lock"
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock shared by every process using the store (flock on a side file)."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class VoiceProfileStore:
+    """
+    Voice profiles: speaker embeddings plus a little metadata.
+
+    Embeddings live as raw float32 rows in one append-only file, memory-mapped for
+    reads, so get() is a dict lookup plus a row view with no parsing or copying.
+    profiles.json maps profile id -> row and metadata (name, the TTS voice to speak
+    with, the kept reference clip); it is rewritten atomically after each append, and rows past
+    its row count (an append that crashed before the rewrite) are truncated before the next one.
+
+    Several worker processes can share a store: enrolls hold an flock on profiles.lock
+    around the append and the index rewrite, and every read first checks whether
+    profiles.json changed on disk (one stat) and reloads it if so.
+
+    nearest() is an exact cosine-similarity scan over the mapped matrix (embeddings
+    are L2-normalized, so it is one matrix-vector product). enroll() uses it to
+    return the existing profile instead of a new one for a voice already enrolled.
+    """
+    def __init__(self, root: str, dim: int = 256, dedup_threshold: float = 0.85):
+        self.root = root
+        self.dim = dim
+        self.dedup_threshold = dedup_threshold
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._embeddings_path = os.path.join(root, EMBEDDINGS_FILE)
+        self._index_path = os.path.join(root, INDEX_FILE)
+        self._lock_path = os.path.join(root, LOCK_FILE)
+        if not os.path.exists(self._embeddings_path):
+            open(self._embeddings_path, "ab").close()
+        self.profiles: Dict[str, dict] = {}
+        self._row_ids: List[Optional[str]] = []
+        self._index_version = None # (inode, mtime_ns, size) of the profiles.json last read
+        self._remap(0)
+        self._sync()
+
+    def _sync(self):
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        """Reloads profiles.json if it changed since the last read (another worker enrolled). Caller holds _lock."""
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            return
+        if (st.st_ino, st.st_mtime_ns, st.st_size) == self._index_version:
+            return
+        with open(self._index_path, "r") as f:
+            st = os.fstat(f.fileno())
+            index = json.load(f)
+        if index.get("dim", self.dim) != self.dim:
+            raise ValueError(f"Voice profile store {self.root} holds {index['dim']}-d embeddings, expected {self.dim}")
+        rows = index.get("rows", 0)
+        row_ids = [None] * rows
+        for profile_id, meta in index.get("profiles", {}).items():
+            row_ids[meta["row"]] = profile_id
+        self.profiles = index.get("profiles", {})
+        self._row_ids = row_ids
+        self._remap(rows)
+        self._index_version = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _remap(self, rows: int):
+        self.rows = rows
+        self._matrix = np.memmap(self._embeddings_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else np.zeros((0, self.dim), dtype=np.float32)
+
+    def _write_index(self):
+        tmp_path = f"{self._index_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "rows": self.rows, "profiles": self.profiles}, f)
+        os.replace(tmp_path, self._index_path)
+        st = os.stat(self._index_path)
+        self._index_version = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def __len__(self):
+        self._sync()
+        return len(self.profiles)
+
+    def __contains__(self, profile_id) -> bool:
+        self._sync()
+        return profile_id in self.profiles
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """Profile metadata plus its embedding (a read-only view into the mapped file), or None."""
+        self._sync()
+        meta = self.profiles.get(profile_id)
+        if meta is None:
+            return None
+        return {**meta, "id": profile_id, "embedding": self._matrix[meta["row"]]}
+
+    def nearest(self, embedding: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """Up to k (profile_id, cosine similarity) pairs, most similar first."""
+        self._sync()
+        return self._nearest(embedding, k)
+
+    def _nearest(self, embedding: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        matrix, row_ids = self._matrix, self._row_ids
+        if not len(matrix):
+            return []
+        scores = matrix @ np.asarray(embedding, dtype=np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(row_ids[i], float(scores[i])) for i in top]
+
+    def enroll(self, embedding: np.ndarray, meta: dict = None, dedup: bool = True) -> Tuple[str, Optional[float]]:
+        """Returns (profile_id, similarity). similarity is set when an existing profile matched instead."""
+        return self.enroll_many([embedding], [meta], dedup)[0]
+
+    def enroll_many(self, embeddings: Sequence[np.ndarray], metas: Sequence[dict] = None, dedup: bool = True) -> List[Tuple[str, Optional[float]]]:
+        """
+        Adds many profiles with one append and one index write. With dedup, a clip whose
+        voice matches an existing profile (or an earlier clip of the same batch) at or above
+        dedup_threshold maps to that profile instead.
+        """
+        metas = list(metas or [None] * len(embeddings))
+        with self._lock, _file_lock(self._lock_path):
+            # Rows are numbered from what is on disk now, not what this process last saw
+            self._refresh()
+            results = []
+            new_rows = []
+            new_ids = []
+            for embedding, meta in zip(embeddings, metas):
+                embedding = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+                if dedup:
+                    match = self._match(embedding, new_rows, new_ids)
+                    if match is not None:
+                        results.append(match)
+                        continue
+                profile_id = uuid.uuid4().hex
+                self.profiles[profile_id] = {
+                    **(meta or {}),
+                    "row": self.rows + len(new_rows),
+                    "created_at": time.time(),
+                }
+                new_rows.append(embedding)
+                new_ids.append(profile_id)
+                results.append((profile_id, None))
+
+            if new_rows:
+                with open(self._embeddings_path, "r+b") as f:
+                    f.truncate(self.rows * self.dim * 4) # drop rows of an append that crashed before its index write
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.stack(new_rows).astype(np.float32).tobytes())
+                self._row_ids.extend(new_ids)
+                self._remap(self.rows + len(new_rows))
+                self._write_index()
+            return results
+
+    def _match(self, embedding, pending_rows, pending_ids) -> Optional[Tuple[str, float]]:
+        best = self._nearest(embedding, k=1)
+        if pending_rows:
+            scores = np.stack(pending_rows) @ embedding
+            i = int(np.argmax(scores))
+            if not best or scores[i] > best[0][1]:
+                best = [(pending_ids[i], float(scores[i]))]
+        if best and best[0][1] >= self.dedup_threshold:
+            return best[0]
+        return None
+
+    def stats(self) -> dict:
+        self._sync()
+        return {"profiles": len(self.profiles), "rows": self.rows, "dim": self.dim}
+
+# Singleton instance
+_voice_profiles = None
+
+def get_voice_profiles() -> VoiceProfileStore:
+    global _voice_profiles
+    if _voice_profiles is None:
+        cfg = get_config().get("voice_profiles", {})
+        _voice_profiles = VoiceProfileStore(
+            cfg.get("root", "data/voice_profiles"),
+            dedup_threshold=cfg.get("dedup_threshold", 0.85),
+        )
+    return _voice_profiles
+
+def voice_options(voice_profile_id: Optional[str]) -> dict:
+    """
+    TTS options for a voice_profile_id. Enrolled profiles resolve to their TTS voice and
+    d-vector (an O(1) read from the mapped store); anything else is passed through as a
+    TTS voice name, as before.
+    """
+    if not voice_profile_id:
+        return {"voice_profile": None}
+    profile = get_voice_profiles().get(voice_profile_id)
+    if profile is None:
+        return {"voice_profile": voice_profile_id}
+    return {"voice_profile": profile.get("voice"), "speaker_embedding": profile["embedding"]}
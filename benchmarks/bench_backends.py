@@ -0,0 +1,71 @@
+"""
+Wav2Lip CPU inference backends: parity and throughput.
+
+For each backend (eager, torchscript, compile, onnx, int8) builds it from the real
+checkpoint, reports PSNR against eager output and frames/sec at the given batch
+sizes. Needs torch + the Wav2Lip checkpoint (onnx/int8 also need onnx + onnxruntime).
+
+Usage: python benchmarks/bench_backends.py [--backends eager onnx int8] [--batch-sizes 8 32]
+                                           [--intra-op 4] [--inter-op 1] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_models.lip_sync.backends import BACKENDS, EagerBackend, build_backend, check_parity, configure_threads, sample_inputs
+
+def measure_fps(backend, batch_size, seconds):
+    mels, imgs = sample_inputs(batch_size)
+    # Same call shape as _render: one face broadcast over the batch
+    imgs = imgs[:1].expand(batch_size, -1, -1, -1)
+    backend(mels, imgs) # warm-up (compile/ORT allocations)
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        backend(mels, imgs)
+        frames += batch_size
+    return frames / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--intra-op", type=int, default=None, help="torch/ORT intra-op threads")
+    parser.add_argument("--inter-op", type=int, default=None, help="torch/ORT inter-op threads")
+    parser.add_argument("--seconds", type=float, default=5, help="Timing window per measurement")
+    parser.add_argument("--checkpoint", default=None)
+    args = parser.parse_args()
+
+    configure_threads(args.intra_op, args.inter_op)
+
+    from core_models.lip_sync.wav2lip_inference import REPO_ROOT, Wav2LipRealEngine
+    checkpoint = args.checkpoint or os.path.join(REPO_ROOT, "checkpoints", "wav2lip_gan.pth")
+    # Only the eager model is needed; backends are built from it below
+    engine = Wav2LipRealEngine(checkpoint_path=checkpoint)
+    eager = EagerBackend(engine.model)
+
+    print(f"{'backend':12s} {'PSNR':>8s}  " + "  ".join(f"{'fps@' + str(b):>9s}" for b in args.batch_sizes))
+    baseline = {}
+    for name in args.backends:
+        try:
+            start = time.perf_counter()
+            backend = build_backend(name, engine.model, checkpoint, "cpu", engine.img_size, args.intra_op, args.inter_op)
+            build_seconds = time.perf_counter() - start
+            score = check_parity(backend, eager, engine.img_size)
+        except Exception as e:
+            print(f"{name:12s} unavailable: {e}")
+            continue
+        cells = []
+        for batch_size in args.batch_sizes:
+            fps = measure_fps(backend, batch_size, args.seconds)
+            baseline.setdefault(batch_size, fps)
+            cells.append(f"{fps:7.1f} ({fps / baseline[batch_size]:.2f}x)")
+        psnr_text = "inf" if score == float("inf") else f"{score:.1f}"
+        print(f"{name:12s} {psnr_text:>8s}  " + "  ".join(cells) + f"   [build {build_seconds:.1f}s]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark.
+
+1. Times `import api.server` in fresh interpreters (what uvicorn pays before it can
+   serve /health). Models are lazy, so this should not include any weight loading.
+2. With --load, also loads every registered model through the registry in a fresh
+   process and prints the per-model load time / memory that /health reports.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 5] [--load]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import json, time
+t = time.perf_counter()
+import api.server
+elapsed = time.perf_counter() - t
+from api.services.model_registry import get_model_registry
+print(json.dumps({"import_seconds": elapsed, "loaded": [n for n, s in get_model_registry().stats()["models"].items() if s["loaded"]]}))
+"""
+
+LOAD_SNIPPET = """
+import json
+from api.services.model_registry import get_model_registry
+registry = get_model_registry()
+for name in %r:
+    try:
+        registry.get(name)
+    except Exception as e:
+        pass
+print(json.dumps(registry.stats()))
+"""
+
+def run_snippet(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip()[-2000:])
+    # Engines print progress; the JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--load", action="store_true", help="Also load every registered model")
+    parser.add_argument("--models", nargs="+", default=["tts", "lip_sync", "stt", "speaker_encoder"])
+    args = parser.parse_args()
+
+    timings = []
+    for i in range(args.runs):
+        result = run_snippet(IMPORT_SNIPPET)
+        timings.append(result["import_seconds"])
+        if result["loaded"]:
+            print(f"WARNING: models loaded at import time: {result['loaded']}")
+    print(f"import api.server: median {statistics.median(timings):.3f}s "
+          f"(min {min(timings):.3f}s, max {max(timings):.3f}s, {args.runs} runs)")
+
+    if args.load:
+        stats = run_snippet(LOAD_SNIPPET % (args.models,))
+        for name, s in stats["models"].items():
+            if s.get("loaded"):
+                print(f"  {name:16s} {s['load_seconds']:7.2f}s  rss +{s['rss_delta_mb']} MB")
+            else:
+                print(f"  {name:16s} not loaded: {s.get('error', 'not requested')}")
+        print(f"Process RSS: {stats['process_rss_mb']} MB")
+
+if __name__ == "__main__":
+    main()
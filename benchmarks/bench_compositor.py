@@ -0,0 +1,105 @@
+"""
+Paste-back benchmark: legacy per-frame loop vs batched FrameCompositor.
+
+Runs on synthetic predictions so no checkpoint or audio is needed.
+Usage: python benchmarks/bench_compositor.py [--frames 250] [--size 1080]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_models.lip_sync.compositor import FrameCompositor
+
+SHARPEN_KERNEL = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
+
+
+def build_blend_mask(crop_w, crop_h):
+    mask = np.zeros((crop_h, crop_w), dtype=np.float32)
+    blend_start = int(crop_h * 0.5)
+    blend_end = int(crop_h * 0.8)
+    mask[blend_start:blend_end, :] = np.linspace(0, 1, blend_end - blend_start)[:, None]
+    mask[blend_end:, :] = 1.0
+    mask = cv2.GaussianBlur(mask, (21, 21), 11)
+    return np.repeat(mask[:, :, np.newaxis], 3, axis=2)
+
+
+def legacy_paste_back(preds, full_frame, face_rect):
+    """The original Wav2LipRealEngine.animate inner loop, kept verbatim for comparison."""
+    frames = []
+    for p in preds:
+        p = p.astype(np.uint8)
+        x1, y1, x2, y2 = face_rect
+        crop_w = x2 - x1
+        crop_h = y2 - y1
+        p_resized = cv2.resize(p, (crop_w, crop_h), interpolation=cv2.INTER_LANCZOS4)
+        p_resized = cv2.filter2D(p_resized, -1, SHARPEN_KERNEL)
+
+        mask_3c = build_blend_mask(crop_w, crop_h)
+        new_frame = full_frame.copy()
+
+        oy1 = max(0, y1); oy2 = min(full_frame.shape[0], y2)
+        ox1 = max(0, x1); ox2 = min(full_frame.shape[1], x2)
+        py1 = max(0, -y1)
+        py2 = py1 + (oy2 - oy1)
+        px1 = max(0, -x1)
+        px2 = px1 + (ox2 - ox1)
+
+        original_roi = new_frame[oy1:oy2, ox1:ox2].astype(np.float32)
+        prediction_roi = p_resized[py1:py2, px1:px2].astype(np.float32)
+        mask_roi = mask_3c[py1:py2, px1:px2]
+        blended_roi = original_roi * (1.0 - mask_roi) + prediction_roi * mask_roi
+
+        new_frame[oy1:oy2, ox1:ox2] = blended_roi.astype(np.uint8)
+        frames.append(cv2.cvtColor(new_frame, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=250, help="Number of predictions (25 fps -> 10 s)")
+    parser.add_argument("--size", type=int, default=1080, help="Avatar frame height/width in pixels")
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    full_frame = rng.integers(0, 256, (args.size, args.size, 3), dtype=np.uint8)
+    crop = args.size // 3
+    face_rect = (args.size // 3, args.size // 4, args.size // 3 + crop, args.size // 4 + crop)
+    preds = rng.uniform(0, 255, (args.frames, 96, 96, 3)).astype(np.float32)
+
+    start = time.perf_counter()
+    legacy_frames = []
+    for i in range(0, args.frames, args.batch):
+        legacy_frames.extend(legacy_paste_back(preds[i:i + args.batch], full_frame, face_rect))
+    legacy_time = time.perf_counter() - start
+
+    batched_time = 0.0
+    max_diff = 0
+    start = time.perf_counter()
+    compositor = FrameCompositor(full_frame, face_rect, build_blend_mask(crop, crop), max_batch=args.batch)
+    batched_time += time.perf_counter() - start
+    for i in range(0, args.frames, args.batch):
+        start = time.perf_counter()
+        frames = compositor.composite(preds[i:i + args.batch])
+        batched_time += time.perf_counter() - start
+        # Parity check is excluded from the timing
+        for j, frame in enumerate(frames):
+            diff = np.abs(frame.astype(np.int16) - legacy_frames[i + j].astype(np.int16)).max()
+            max_diff = max(max_diff, int(diff))
+
+    print(f"Frames: {args.frames} | Avatar: {args.size}x{args.size} | Crop: {crop}x{crop}")
+    print(f"Legacy loop : {args.frames / legacy_time:8.1f} fps ({legacy_time:.2f}s)")
+    print(f"Compositor  : {args.frames / batched_time:8.1f} fps ({batched_time:.2f}s)")
+    print(f"Speedup     : {legacy_time / batched_time:8.2f}x")
+    print(f"Max pixel diff vs legacy: {max_diff}")
+
+
+if __name__ == "__main__":
+    main()
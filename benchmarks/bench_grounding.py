@@ -0,0 +1,131 @@
+"""
+Grounding: local UILocator (OCR label index + template matching) vs the vision model.
+
+Draws a fake login page (labelled buttons plus a text-less gear icon), then asks
+"where is ..." questions through UILocator and reports per-query latency, the
+box found and whether it lands on the right element. Questions the locator isn't
+confident about are the ones that would go to the vision model.
+
+--ocr fake answers with the word boxes the page was drawn with (no tesseract needed,
+times the index/matching alone); --ocr tesseract runs real OCR.
+
+Usage: python benchmarks/bench_grounding.py [--ocr fake|tesseract] [--size 2560x1440] [--max-dim 1280]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.screen_capture import ScreenCapture
+from api.services.ui_locator import TesseractOCR, UIElement, UILocator
+from bench_screen_capture import FakeScreenSource
+
+BUTTONS = ["Login", "Sign Up", "Forgot password?", "Create Exam Room", "Manage Students", "Log Reports"]
+
+class FakeOCR:
+    """Returns the words the page was drawn with, scaled to the frame."""
+    def __init__(self, words, screen_width):
+        self.words = words
+        self.screen_width = screen_width
+        self.calls = 0
+
+    def read(self, image):
+        self.calls += 1
+        scale = image.size[0] / self.screen_width
+        return [UIElement(text, tuple(int(v * scale) for v in box), 0.95, "ocr", line)
+                for text, box, line in self.words]
+
+def draw_gear(draw, cx, cy, r):
+    for angle in range(0, 360, 45):
+        a = np.radians(angle)
+        draw.rectangle([cx + np.cos(a) * r - r / 4, cy + np.sin(a) * r - r / 4,
+                        cx + np.cos(a) * r + r / 4, cy + np.sin(a) * r + r / 4], fill=(70, 70, 90))
+    draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=(70, 70, 90))
+    draw.ellipse([cx - r / 2.5, cy - r / 2.5, cx + r / 2.5, cy + r / 2.5], fill=(245, 246, 248))
+
+def fake_login_page(width, height):
+    """Returns (image, word boxes, {element: box}) in screen pixels."""
+    image = Image.new("RGB", (width, height), (245, 246, 248))
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=height // 40)
+    except TypeError:
+        font = ImageFont.load_default()
+    words, elements = [], {}
+    for i, label in enumerate(BUTTONS):
+        x, y = width // 10 + (i % 2) * width // 3, height // 5 + (i // 2) * height // 6
+        w, h = width // 4, height // 12
+        draw.rectangle([x, y, x + w, y + h], fill=(30, 90, 200))
+        tx, ty = x + w // 10, y + h // 3
+        for word in label.split():
+            left, top, right, bottom = draw.textbbox((tx, ty), word, font=font)
+            draw.text((tx, ty), word, fill=(255, 255, 255), font=font)
+            words.append((word.lower(), (left, top, right - left, bottom - top), i))
+            tx = right + height // 120
+        elements[label.lower()] = (x, y, w, h)
+    r = height // 40
+    cx, cy = width - width // 12, height // 14
+    draw_gear(draw, cx, cy, r)
+    elements["settings icon"] = (cx - 2 * r, cy - 2 * r, 4 * r, 4 * r)
+    return image, words, elements
+
+def inside(box, element_box):
+    x, y, w, h = box
+    ex, ey, ew, eh = element_box
+    cx, cy = x + w / 2, y + h / 2
+    return ex <= cx <= ex + ew and ey <= cy <= ey + eh
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ocr", default="fake", choices=["fake", "tesseract"])
+    parser.add_argument("--size", default="2560x1440")
+    parser.add_argument("--max-dim", type=int, default=1280)
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.split("x"))
+    page, words, elements = fake_login_page(width, height)
+    capture = ScreenCapture(FakeScreenSource(page), max_dim=args.max_dim)
+    frame = capture.capture()
+    ocr = FakeOCR(words, width) if args.ocr == "fake" else TesseractOCR()
+
+    queries = [
+        ("where is the login button", "login"),
+        ("show me sign up", "sign up"),
+        ("highlight the forgot password link", "forgot password?"),
+        ("where is create exam room", "create exam room"),
+        ("find the manage students tab", "manage students"),
+        ("point to the settings icon", "settings icon"),
+        ("where is the shopping cart", None),
+    ]
+    with tempfile.TemporaryDirectory() as templates_dir:
+        x, y, w, h = elements["settings icon"]
+        page.crop((x, y, x + w, y + h)).save(os.path.join(templates_dir, "settings_icon.png"))
+        locator = UILocator(ocr=ocr, templates_dir=templates_dir)
+
+        start = time.perf_counter()
+        locator.labels(frame)
+        print(f"OCR + label index ({args.ocr}): {(time.perf_counter() - start) * 1000:.1f} ms (once per screen)")
+
+        scale = width / frame.image.size[0]
+        for query, expected in queries:
+            start = time.perf_counter()
+            element = locator.locate(frame, query)
+            ms = (time.perf_counter() - start) * 1000
+            if element is None:
+                verdict = "ok" if expected is None else "MISSED"
+                print(f"{query:38s}: {ms:6.1f} ms -> vision model fallback [{verdict}]")
+                continue
+            box = tuple(v * scale for v in element.box)
+            verdict = "ok" if expected and inside(box, elements[expected]) else "WRONG"
+            print(f"{query:38s}: {ms:6.1f} ms -> {element.source:8s} '{element.label}' ({element.confidence:.2f}) [{verdict}]")
+        print(locator.stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Intent router check + microbenchmark.
+
+1. Runs every case in benchmarks/intent_corpus.json through the compiled IntentRouter
+   and fails (exit 1) on any mismatch.
+2. Times the router against the old substring if-chain from AgentService (embedded
+   below for reference) and reports the cases where the two disagree.
+
+Usage: python benchmarks/bench_intents.py [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.intent_router import intent_router
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.json")
+
+def legacy_intent(text_lower):
+    """The pre-router substring chain, in its original order."""
+    if any(x in text_lower for x in ["where is", "show me", "highlight", "find the", "point to"]):
+        return "visual_grounding"
+    if any(x in text_lower for x in ["info about", "about this page", "about this website",
+                                     "what is on", "summary of", "describe this",
+                                     "what is going on", "tell me about it", "look at this"]):
+        return "vision_analysis"
+    if "clone this repo" in text_lower or "clone repository" in text_lower:
+        return "git_clone"
+    if "open" in text_lower or "start" in text_lower or "go to" in text_lower:
+        return "desktop_command"
+    if "sign up" in text_lower or "create account" in text_lower or "sign me up" in text_lower:
+        return "signup"
+    if "username is" in text_lower or "password is" in text_lower:
+        return "fill_form"
+    if "join exam" in text_lower or "take exam" in text_lower or "start exam" in text_lower:
+        return "join_exam"
+    if "dashboard" in text_lower:
+        return "dashboard"
+    if any(x in text_lower for x in ["create exam", "create an exam", "create a test", "create new exam", "new room", "create test", "make an exam"]):
+        return "create_exam"
+    if "manage student" in text_lower or "students" in text_lower:
+        return "manage_students"
+    if "logs" in text_lower or "report" in text_lower:
+        return "logs"
+    if "logout" in text_lower or "log out" in text_lower or "sign out" in text_lower:
+        return "logout"
+    if "home" in text_lower or "homepage" in text_lower or "main page" in text_lower:
+        return "home"
+    if "about us" in text_lower or "about company" in text_lower:
+        return "about_us"
+    if "log in" in text_lower or "login" in text_lower:
+        return "login"
+    if "stop" in text_lower:
+        return "stop"
+    if any(x in text_lower for x in ["hello", "hi", "hey"]):
+        return "greeting"
+    return None
+
+def time_it(fn, texts, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for t in texts:
+            fn(t)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(texts)) * 1e6 # us per utterance
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+    texts = [c["text"].lower() for c in corpus]
+
+    failures = 0
+    changed = []
+    for case, text in zip(corpus, texts):
+        got = intent_router.match(text)
+        if got != case["intent"]:
+            failures += 1
+            print(f"FAIL: '{case['text']}' -> {got} (expected {case['intent']})")
+        old = legacy_intent(text)
+        if old != got:
+            changed.append((case["text"], old, got))
+
+    print(f"Corpus: {len(corpus) - failures}/{len(corpus)} passed")
+    if changed:
+        print("Routing changes vs legacy chain:")
+        for text, old, new in changed:
+            print(f"  '{text}': {old} -> {new}")
+
+    # Long utterances hurt the old chain most (every branch rescans the whole string)
+    long_texts = texts + [t + " " + "please could you do that for me right now" * 4 for t in texts]
+
+    router_us = time_it(intent_router.match, long_texts, args.iterations)
+    legacy_us = time_it(legacy_intent, long_texts, args.iterations)
+    print(f"Legacy chain: {legacy_us:.2f} us/utterance")
+    print(f"Router:       {router_us:.2f} us/utterance ({legacy_us / router_us:.2f}x)")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Media serving: /static (StaticFiles) vs /media (content-versioned, immutable) for a
+repeated clip, as a caching client would see it.
+
+A client plays the same clip `--turns` times (the usual pre-generated answers) and
+seeks into it. With /static it revalidates every turn; with /media the URL is
+immutable, so after the first fetch it is served from cache. Reports requests and
+body bytes that reach the server, and seek (Range) latency.
+
+Runs in process with Starlette's TestClient: no network, so only bytes and
+request counts are meaningful.
+
+Usage: python benchmarks/bench_media.py [--size-mb 4] [--turns 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+from starlette.testclient import TestClient
+
+from api.services.media import MediaFiles, MediaVersions
+
+class CachingClient:
+    """Just enough of a browser cache: immutable entries are reused, others revalidated with If-None-Match."""
+    def __init__(self, client):
+        self.client = client
+        self.cache = {} # url -> (etag, immutable, body)
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, url):
+        cached = self.cache.get(url)
+        if cached and cached[1]:
+            return cached[2]
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(response.content)
+        if response.status_code == 304:
+            return cached[2]
+        immutable = "immutable" in response.headers.get("cache-control", "")
+        self.cache[url] = (response.headers.get("etag"), immutable, response.content)
+        return response.content
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=4)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--seeks", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        clip = os.path.join(root, "cache", "video", "ab" * 32 + ".mp4")
+        os.makedirs(os.path.dirname(clip))
+        with open(clip, "wb") as f:
+            f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+        size = os.path.getsize(clip)
+
+        versions = MediaVersions(root)
+        app = Starlette(routes=[
+            Mount("/media", MediaFiles(versions)),
+            Mount("/static", StaticFiles(directory=root)),
+        ])
+        client = TestClient(app)
+        urls = {
+            "static": f"/static/{versions.relpath(clip)}",
+            "media": f"/media/{versions.version(clip)}/{versions.relpath(clip)}",
+        }
+
+        for name, url in urls.items():
+            browser = CachingClient(client)
+            for _ in range(args.turns):
+                assert len(browser.get(url)) == size
+            print(f"{name:6s}: {args.turns} turns -> {browser.requests:3d} requests, {browser.bytes / 1024 / 1024:7.2f} MiB from the server")
+
+        # Seeks: random 256 KiB windows
+        url = urls["media"]
+        start = time.perf_counter()
+        for i in range(args.seeks):
+            offset = (i * 7919 * 4096) % max(1, size - 262144)
+            response = client.get(url, headers={"Range": f"bytes={offset}-{offset + 262143}"})
+            assert response.status_code == 206 and len(response.content) == 262144
+        print(f"seeks : {(time.perf_counter() - start) / args.seeks * 1000:.2f} ms per 256 KiB range request")
+
+if __name__ == "__main__":
+    main()
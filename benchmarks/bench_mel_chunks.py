@@ -0,0 +1,149 @@
+"""
+Microbenchmark: mel windowing + per-batch input preparation for Wav2Lip.
+
+Legacy: Python while-loop of mel slices, then np.array() + torch.FloatTensor() per
+batch and avatar_tensor.repeat(B, ...) for the face batch.
+New:    MelWindows (vectorized window offsets over a sliding_window_view of the
+time-major mel; each batch is one gather into float32), torch.from_numpy() and
+avatar_tensor.expand(B, ...).
+
+Checks that both produce the same model inputs, then times them on long audio, both
+in one pass and in the chunks animate_chunks renders.
+The tensor part is skipped if torch is not installed.
+
+Usage: python benchmarks/bench_mel_chunks.py [--seconds 60 300 900] [--batch-size 32] [--chunk-seconds 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_models.lip_sync.mel import MelWindows
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+MEL_STEPS_PER_SECOND = 80
+
+def legacy_mel_chunks(mel, fps=25):
+    """The pre-vectorization loop from Wav2LipRealEngine._mel_chunks."""
+    mel_chunks = []
+    mel_step_size = 16
+    mel_idx_multiplier = 80./fps
+    i = 0
+    while True:
+        start_idx = int(i * mel_idx_multiplier)
+        if start_idx + mel_step_size > len(mel[0]):
+            mel_chunks.append(mel[:, len(mel[0]) - mel_step_size:])
+            break
+        mel_chunks.append(mel[:, start_idx : start_idx + mel_step_size])
+        i += 1
+    return mel_chunks
+
+def legacy_batches(mel, face, batch_size):
+    mel_chunks = legacy_mel_chunks(mel)
+    for i in range(0, len(mel_chunks), batch_size):
+        curr = mel_chunks[i : i+batch_size]
+        B = len(curr)
+        input_mels = np.array(curr).reshape(B, 1, 80, 16)
+        if torch is not None:
+            yield torch.FloatTensor(input_mels), face.repeat(B, 1, 1, 1)
+        else:
+            yield input_mels, None
+
+def legacy_chunk(mel, start_frame, end_frame, fps=25):
+    """The pre-vectorization loop for one chunk's frames."""
+    mel_chunks = []
+    mel_step_size = 16
+    mel_idx_multiplier = 80./fps
+    i = start_frame
+    while i < end_frame:
+        start_idx = int(i * mel_idx_multiplier)
+        if start_idx + mel_step_size > len(mel[0]):
+            mel_chunks.append(mel[:, len(mel[0]) - mel_step_size:])
+            break
+        mel_chunks.append(mel[:, start_idx : start_idx + mel_step_size])
+        i += 1
+    return mel_chunks
+
+def legacy_chunked(mel, face, batch_size, chunk_frames):
+    total = len(legacy_mel_chunks(mel))
+    for start in range(0, total, chunk_frames):
+        mel_chunks = legacy_chunk(mel, start, start + chunk_frames)
+        for i in range(0, len(mel_chunks), batch_size):
+            yield np.array(mel_chunks[i : i+batch_size])[:, np.newaxis], None
+
+def new_batches(mel, face, batch_size, mel_chunks=None):
+    # _load_mel hands over librosa's (80, T) mel; MelWindows converts it once
+    mel_chunks = MelWindows(mel) if mel_chunks is None else mel_chunks
+    for i in range(0, len(mel_chunks), batch_size):
+        batch = mel_chunks[i : i+batch_size]
+        if torch is not None:
+            yield torch.from_numpy(batch).unsqueeze(1), face.expand(len(batch), -1, -1, -1)
+        else:
+            yield batch[:, np.newaxis], None
+
+def new_chunked(mel, face, batch_size, chunk_frames):
+    windows = MelWindows(mel)
+    for start in range(0, len(windows), chunk_frames):
+        yield from new_batches(mel, face, batch_size, windows.frames(start, start + chunk_frames))
+
+def consume(batches):
+    n = 0
+    for mels, imgs in batches:
+        n += len(mels)
+    return n
+
+def time_it(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, nargs="+", default=[60, 300, 900])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunk-seconds", type=float, default=3.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    face = torch.rand(1, 6, 96, 96) if torch is not None else None
+    if torch is None:
+        print("torch not installed: timing numpy preparation only")
+
+    for seconds in args.seconds:
+        # librosa mels come out as float64
+        mel = np.random.rand(80, int(seconds * MEL_STEPS_PER_SECOND))
+
+        # Parity: identical model inputs batch by batch
+        for (a_mels, a_imgs), (b_mels, b_imgs) in zip(legacy_batches(mel, face, args.batch_size), new_batches(mel, face, args.batch_size)):
+            assert np.allclose(np.asarray(a_mels), np.asarray(b_mels), atol=1e-6), "mel batches differ"
+            if torch is not None:
+                assert torch.equal(a_imgs, b_imgs), "face batches differ"
+
+        legacy = time_it(lambda: consume(legacy_batches(mel, face, args.batch_size)), args.repeats)
+        new = time_it(lambda: consume(new_batches(mel, face, args.batch_size)), args.repeats)
+        frames = consume(new_batches(mel, face, args.batch_size))
+        print(f"{seconds:6.0f}s audio ({frames} frames): legacy {legacy * 1000:8.2f} ms | "
+              f"vectorized {new * 1000:7.2f} ms | {legacy / new:5.1f}x")
+
+        chunk_frames = int(args.chunk_seconds * 25)
+        for a, b in zip(legacy_chunked(mel, None, args.batch_size, chunk_frames), new_chunked(mel, None, args.batch_size, chunk_frames)):
+            assert np.allclose(a[0], b[0], atol=1e-6), "chunked mel batches differ"
+        legacy = time_it(lambda: consume(legacy_chunked(mel, None, args.batch_size, chunk_frames)), args.repeats)
+        new = time_it(lambda: consume(new_chunked(mel, None, args.batch_size, chunk_frames)), args.repeats)
+        print(f"{'':6}  chunked ({args.chunk_seconds:g}s):       legacy {legacy * 1000:8.2f} ms | "
+              f"vectorized {new * 1000:7.2f} ms | {legacy / new:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Screen capture for the vision intents: legacy vs in-memory pipeline, on a fake screen.
+
+Legacy: screenshot saved as a full-resolution PNG under storage/, reopened with PIL
+and uploaded as-is. New: ScreenCapture keeps the frame in memory, downscales it to
+max_dim and encodes it once (JPEG/WebP).
+
+Also checks the perceptual-hash reuse through LLMClient (fake backend): an identical
+screen and one with a small change (a blinking cursor) should be answered from cache;
+a different page should not.
+
+Usage: python benchmarks/bench_screen_capture.py [--size 2560x1440] [--max-dim 1280] [--format JPEG]
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.llm_client import FakeLLMBackend, LLMClient
+from api.services.screen_capture import ScreenCapture, hamming
+
+
+class FakeScreenSource:
+    """Serves prepared PIL images in place of the desktop."""
+    def __init__(self, image):
+        self.image = image
+
+    def grab(self):
+        return self.image.copy()
+
+    def size(self):
+        return self.image.size
+
+def fake_page(width, height, seed):
+    """Something screen-like: flat panels, text-ish stripes, a photo-ish block."""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (width, height), (245, 246, 248))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width, height // 14], fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+    for row in range(40):
+        y = height // 10 + row * (height // 50)
+        draw.rectangle([width // 12, y, width // 12 + int(rng.integers(width // 4, width // 2)), y + height // 120], fill=(60, 60, 60))
+    photo = (rng.random((height // 3, width // 3, 3)) * 255).astype(np.uint8)
+    image.paste(Image.fromarray(photo), (width // 2, height // 5))
+    return image
+
+def legacy_capture(source, tmp_dir):
+    path = os.path.join(tmp_dir, "temp_vision.png")
+    source.grab().save(path)
+    image = Image.open(path)
+    image.load()
+    # What the SDK uploads for a PIL image: the full-resolution picture
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return len(buffer.getvalue())
+
+def time_it(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="2560x1440")
+    parser.add_argument("--max-dim", type=int, default=1280)
+    parser.add_argument("--format", default="JPEG")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.split("x"))
+    page = fake_page(width, height, seed=1)
+    source = FakeScreenSource(page)
+    capture = ScreenCapture(source, max_dim=args.max_dim, image_format=args.format, quality=args.quality)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy, legacy_bytes = time_it(lambda: legacy_capture(source, tmp_dir), args.repeats)
+    new, frame = time_it(capture.capture, args.repeats)
+    print(f"{width}x{height} screen")
+    print(f"legacy  PNG via disk : {legacy * 1000:7.1f} ms, upload {legacy_bytes / 1024:7.0f} KiB")
+    print(f"in-memory {args.format:5s}    : {new * 1000:7.1f} ms, upload {len(frame.data) / 1024:7.0f} KiB "
+          f"({frame.image.size[0]}x{frame.image.size[1]})")
+
+    # Change detection
+    backend = FakeLLMBackend(text="a description")
+    llm = LLMClient(backend)
+    describe = lambda f: asyncio.run(llm.generate("describe_screen", ["Describe", f.part()], image_hash=f.phash))
+    describe(frame)
+    cursor = page.copy()
+    ImageDraw.Draw(cursor).rectangle([width // 12 + 5, height // 10, width // 12 + 7, height // 10 + 20], fill=(0, 0, 0))
+    cases = [("same screen", page, True), ("cursor blink", cursor, True), ("other page", fake_page(width, height, seed=2), False)]
+    for label, image, expect_reuse in cases:
+        source.image = image
+        other = capture.capture()
+        calls = backend.calls
+        describe(other)
+        reused = backend.calls == calls
+        status = "ok" if reused == expect_reuse else "UNEXPECTED"
+        print(f"{label:13s}: hash distance {hamming(frame.phash, other.phash):2d} -> {'reuse' if reused else 're-analyze'} [{status}]")
+
+if __name__ == "__main__":
+    main()
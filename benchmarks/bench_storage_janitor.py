@@ -0,0 +1,76 @@
+"""
+Storage index and janitor at scale.
+
+Creates --files TTS-output-sized artifacts in the sharded layout (small files, so it
+runs anywhere), registers them in the SQLite index, then times:
+  - register() per artifact (what a request pays),
+  - a sweep that has to age out a fraction of them and enforce a size budget,
+  - reconcile() over the whole tree (startup),
+and shows the largest directory, which a flat layout would make --files entries long.
+
+Usage: python benchmarks/bench_storage_janitor.py [--files 20000] [--expired 0.3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.artifact_store import ArtifactStore
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=2048, help="bytes per artifact")
+    parser.add_argument("--expired", type=float, default=0.3, help="fraction older than max_age")
+    parser.add_argument("--budget-fraction", type=float, default=0.5, help="size budget as a fraction of what remains")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        remaining_mb = args.files * (1 - args.expired) * args.size / 1024 / 1024
+        store = ArtifactStore(root, index_path=os.path.join(root, "artifacts.db"), classes={"tts_outputs": {"max_age_hours": 1, "max_mb": remaining_mb * args.budget_fraction}})
+        payload = os.urandom(args.size)
+
+        start = time.perf_counter()
+        paths = []
+        for i in range(args.files):
+            path = store.path("tts_outputs", f"{i:08d}.wav")
+            with open(path, "wb") as f:
+                f.write(payload)
+            paths.append(path)
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for path in paths:
+            store.register(path, "tts_outputs")
+        register = time.perf_counter() - start
+        print(f"{args.files} artifacts: write {write / args.files * 1e6:.0f} us, register {register / args.files * 1e6:.0f} us each")
+
+        # Age some of them, pin a few
+        expired = int(args.files * args.expired)
+        with store._lock:
+            store._conn.executemany("UPDATE artifacts SET last_access = 0 WHERE path = ?",
+                                    [(store._rel(p),) for p in paths[:expired]])
+        for path in paths[expired:expired + 10]:
+            store.pin(path)
+
+        start = time.perf_counter()
+        removed = store.sweep()["tts_outputs"]
+        sweep = time.perf_counter() - start
+        stats = store.stats()["classes"]["tts_outputs"]
+        print(f"sweep     : {sweep:.2f} s, deleted {removed} ({expired} expired + LRU down to the budget), "
+              f"{stats['artifacts']} left ({stats['bytes'] / 1024 / 1024:.1f}/{stats['budget_bytes'] / 1024 / 1024:.1f} MiB), "
+              f"pinned intact: {all(os.path.exists(p) for p in paths[expired:expired + 10])}")
+
+        start = time.perf_counter()
+        store.reconcile()
+        print(f"reconcile : {time.perf_counter() - start:.2f} s")
+
+        largest = max(len(files) + len(dirs) for _, dirs, files in os.walk(store.class_dir("tts_outputs")))
+        print(f"largest directory: {largest} entries (flat layout: {args.files})")
+
+if __name__ == "__main__":
+    main()
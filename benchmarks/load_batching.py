@@ -0,0 +1,139 @@
+"""
+Load test for cross-request batching of lip-sync inference.
+
+N concurrent "renders" each push F frames through the model, either
+  - unbatched: every render runs its own forward passes (today's behavior), or
+  - batched:   through InferenceScheduler, for a sweep of max_wait_ms values.
+Reports throughput (frames/s), per-render latency (p50/p95) and average batch size.
+
+By default the model is a fake whose cost is a fixed per-call overhead plus a
+per-frame cost (--overhead-ms / --frame-ms), run under one lock like a model that
+already uses every core. With --real the actual Wav2Lip model is used with random
+inputs (needs the checkpoint).
+
+Usage: python benchmarks/load_batching.py [--renders 8] [--frames 100] [--waits 0 2 5 10] [--real]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_models.lip_sync.batch_scheduler import InferenceScheduler
+
+
+class FakeModel:
+    def __init__(self, overhead_ms, frame_ms):
+        self.overhead = overhead_ms / 1000.0
+        self.per_frame = frame_ms / 1000.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def forward(self, payloads):
+        sizes = [len(mels) for mels, _ in payloads]
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.overhead + self.per_frame * sum(sizes))
+        return [np.zeros((n, 96, 96, 3), dtype=np.float32) for n in sizes]
+
+    def make_image(self):
+        return None
+
+
+class RealModel:
+    def __init__(self):
+        import torch
+        from core_models.lip_sync.wav2lip import Wav2LipEngine
+        self.torch = torch
+        self.engine = Wav2LipEngine()
+        self.calls = 0
+
+    def forward(self, payloads):
+        self.calls += 1
+        return self.engine._forward_batch(payloads)
+
+    def make_image(self):
+        return self.torch.rand(1, 6, 96, 96).to(self.engine.device)
+
+
+def unbatched_render(model, frames, batch_size, image):
+    start = time.perf_counter()
+    for i in range(0, frames, batch_size):
+        n = min(batch_size, frames - i)
+        model.forward([(np.random.rand(n, 1, 80, 16).astype(np.float32), image)])
+    return time.perf_counter() - start
+
+def batched_render(scheduler, frames, item_frames, depth, image):
+    start = time.perf_counter()
+    with scheduler.session() as session:
+        pending = []
+        i = 0
+        while i < frames:
+            n = min(scheduler.item_frames(item_frames), frames - i)
+            i += n
+            pending.append(scheduler.submit(session, (np.random.rand(n, 1, 80, 16).astype(np.float32), image), n))
+            if len(pending) >= depth:
+                pending.pop(0).result()
+        for future in pending:
+            future.result()
+    return time.perf_counter() - start
+
+def run_load(render_fn, renders, stagger_ms):
+    with ThreadPoolExecutor(max_workers=renders) as pool:
+        start = time.perf_counter()
+        futures = []
+        for i in range(renders):
+            futures.append(pool.submit(render_fn))
+            time.sleep(stagger_ms / 1000.0)
+        latencies = [f.result() for f in futures]
+        wall = time.perf_counter() - start
+    return wall, latencies
+
+def report(label, model, frames_total, wall, latencies, calls_before, extra=""):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    print(f"{label:22s} {frames_total / wall:8.1f} fps | p50 {statistics.median(latencies):6.2f}s "
+          f"p95 {p95:6.2f}s | forward calls {model.calls - calls_before:4d}{extra}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=8, help="Concurrent renders")
+    parser.add_argument("--frames", type=int, default=100, help="Frames per render (25 fps)")
+    parser.add_argument("--stagger-ms", type=float, default=20, help="Delay between render arrivals")
+    parser.add_argument("--batch-size", type=int, default=32, help="Per-render batch size when unbatched")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--item-frames", type=int, default=8, help="Smallest work item a render submits")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 2, 5, 10])
+    parser.add_argument("--overhead-ms", type=float, default=15, help="Fake model: fixed cost per forward call")
+    parser.add_argument("--frame-ms", type=float, default=1.5, help="Fake model: cost per frame")
+    parser.add_argument("--real", action="store_true", help="Use the real Wav2Lip model")
+    args = parser.parse_args()
+
+    model = RealModel() if args.real else FakeModel(args.overhead_ms, args.frame_ms)
+    image = model.make_image()
+    frames_total = args.renders * args.frames
+    print(f"{args.renders} concurrent renders x {args.frames} frames ({'real model' if args.real else 'fake model'})")
+
+    calls = model.calls
+    wall, latencies = run_load(lambda: unbatched_render(model, args.frames, args.batch_size, image), args.renders, args.stagger_ms)
+    report("unbatched", model, frames_total, wall, latencies, calls)
+
+    for wait in args.waits:
+        scheduler = InferenceScheduler(model.forward, max_batch=args.max_batch, max_wait_ms=wait)
+        calls = model.calls
+        wall, latencies = run_load(lambda: batched_render(scheduler, args.frames, args.item_frames, args.depth, image), args.renders, args.stagger_ms)
+        stats = scheduler.stats()
+        scheduler.close()
+        report(f"batched wait={wait:g}ms", model, frames_total, wall, latencies, calls,
+               extra=f" | avg batch {stats['avg_batch_frames']:.1f} frames")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Load test for render coalescing: N identical concurrent requests must produce exactly
+one TTS call and one lip-sync render, and a failing render must fail every waiter.
+
+Uses fake engines and a throwaway cache directory, so no weights or network are needed.
+Usage: python benchmarks/load_coalescing.py [--requests 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.orchestrator import Orchestrator, render_flights
+from api.services.render_cache import RenderCache
+
+
+class FakeTTS:
+    engine_version = "fake-tts"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def synthesize_async(self, text, output_path, options):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        with open(output_path, "wb") as f:
+            f.write(text.encode())
+        return output_path
+
+
+class FakeLipSync:
+    engine_version = "fake-lipsync"
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def animate(self, image_path, audio_path, output_path):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.5) # Simulates seconds of torch/OpenCV work on the lip-sync pool
+        if self.fail:
+            raise RuntimeError("simulated render failure")
+        with open(output_path, "wb") as f:
+            f.write(b"\x00" * 1024)
+        return output_path
+
+
+async def run(n_requests, fail):
+    workdir = tempfile.mkdtemp(prefix="coalesce_")
+    avatar = os.path.join(workdir, "avatar.png")
+    with open(avatar, "wb") as f:
+        f.write(b"not really a png")
+
+    tts, lip_sync = FakeTTS(), FakeLipSync(fail=fail)
+    orchestrator = Orchestrator(tts=tts, lip_sync=lip_sync, cache=RenderCache(os.path.join(workdir, "cache")))
+    text = "I'm not sure I understood. Do you want to sign up or log in?"
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        orchestrator.render(avatar, text=text, voice_profile_id="en-US-ChristopherNeural", session_id=f"user_{i}")
+        for i in range(n_requests)
+    ], return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    paths = {r["video_path"] for r in results if not isinstance(r, Exception)}
+    return tts.calls, lip_sync.calls, errors, paths, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    tts_calls, lip_calls, errors, paths, elapsed = asyncio.run(run(args.requests, fail=False))
+    print(f"{args.requests} identical requests in {elapsed:.2f}s")
+    print(f"  TTS calls: {tts_calls} | Lip-sync renders: {lip_calls} | Distinct outputs: {len(paths)} | Errors: {len(errors)}")
+    assert tts_calls == 1 and lip_calls == 1 and len(paths) == 1 and not errors, "Requests were not coalesced"
+
+    tts_calls, lip_calls, errors, paths, elapsed = asyncio.run(run(args.requests, fail=True))
+    print(f"{args.requests} identical requests with a failing render in {elapsed:.2f}s")
+    print(f"  Lip-sync renders: {lip_calls} | Errors propagated: {len(errors)}")
+    assert lip_calls == 1 and len(errors) == args.requests, "Failure was not shared by every waiter"
+
+    print(f"Flights: {render_flights.stats()}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
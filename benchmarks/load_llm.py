@@ -0,0 +1,72 @@
+"""
+Load test for the LLM call layer (LLMClient) against the fake backend.
+
+Simulates vision turns where most calls take --base-ms but a fraction (--slow-rate)
+stall for --slow-ms (the tail we see from the real API), and compares hedging
+thresholds. --repeat-rate of the turns re-ask a question about a screen already
+seen (served from cache / coalesced).
+
+Usage: python benchmarks/load_llm.py [--turns 200] [--concurrency 8] [--hedges none 0.5 1.0]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.llm_client import FakeLLMBackend, LLMClient
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+async def run(client, turns, concurrency, repeat_rate, seed):
+    rng = random.Random(seed)
+    gate = asyncio.Semaphore(concurrency) # concurrent users
+    latencies = []
+
+    async def turn(i):
+        screen = rng.randrange(10) if rng.random() < repeat_rate else 1000 + i
+        async with gate:
+            start = time.perf_counter()
+            # Stand-in perceptual hash: 256 random bits per distinct screen
+            image_hash = random.Random(screen).getrandbits(256)
+            await client.generate("describe_screen", ["Describe", {"screen": screen}], image_hash=image_hash)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(turn(i) for i in range(turns)))
+    return time.perf_counter() - start, latencies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent users")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="LLMClient semaphore")
+    parser.add_argument("--base-ms", type=float, default=300)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--repeat-rate", type=float, default=0.3)
+    parser.add_argument("--hedges", nargs="+", default=["none", "0.5", "1.0"], help="hedge_after_seconds values")
+    args = parser.parse_args()
+
+    for hedge in args.hedges:
+        rng = random.Random(7)
+        latency = lambda: (args.slow_ms if rng.random() < args.slow_rate else args.base_ms) / 1000.0
+        backend = FakeLLMBackend(latency=latency)
+        client = LLMClient(backend, max_concurrency=args.max_concurrency,
+                           hedge_after_seconds=None if hedge == "none" else float(hedge))
+        wall, latencies = asyncio.run(run(client, args.turns, args.concurrency, args.repeat_rate, seed=1))
+        stats = client.stats()
+        print(f"hedge={hedge:5s} p50 {statistics.median(latencies) * 1000:6.0f} ms  p95 {percentile(latencies, 0.95) * 1000:6.0f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.0f} ms | backend calls {backend.calls:4d} "
+              f"(hedges {stats['hedges']}, won {stats['hedge_wins']}) | hit rate {stats['hit_rate']:.0%} | {wall:5.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test for the STT pool: N concurrent transcriptions against pools of different sizes.
+
+Reports throughput, end-to-end latency (p50/p95), rejections (503s) and the
+pool's own queue-depth / latency histograms, to pick instances, num_workers and max_queue.
+
+By default the engine is a fake that sleeps --decode-ms per call (faster-whisper
+releases the GIL while decoding, so threads overlap the same way). With --real
+and --audio FILE, real faster-whisper instances decode that file.
+
+Usage: python benchmarks/load_stt_pool.py [--requests 32] [--pools 1x1 1x2 2x1 2x2] [--max-queue 8]
+       python benchmarks/load_stt_pool.py --real --audio sample.wav --model-size base --cpu-threads 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.stt_pool import STTBusyError, STTPool
+
+
+class FakeEngine:
+    def __init__(self, decode_ms):
+        self.decode = decode_ms / 1000.0
+
+    def transcribe(self, audio, **options):
+        time.sleep(self.decode)
+        return "hello"
+
+
+async def run_load(pool, requests, audio, stagger_ms):
+    async def one():
+        start = time.perf_counter()
+        try:
+            await pool.transcribe(audio)
+        except STTBusyError:
+            return None
+        return time.perf_counter() - start
+
+    tasks = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(stagger_ms / 1000.0)
+    results = await asyncio.gather(*tasks)
+    return time.perf_counter() - start, results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--stagger-ms", type=float, default=10)
+    parser.add_argument("--pools", nargs="+", default=["1x1", "1x2", "2x1", "2x2"], help="instances x num_workers")
+    parser.add_argument("--max-queue", type=int, default=8)
+    parser.add_argument("--decode-ms", type=float, default=200, help="Fake engine: time per decode")
+    parser.add_argument("--real", action="store_true")
+    parser.add_argument("--audio", help="Audio file for --real")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--cpu-threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.real and not args.audio:
+        parser.error("--real needs --audio")
+
+    for spec in args.pools:
+        instances, workers = (int(n) for n in spec.split("x"))
+        if args.real:
+            from core_models.stt.whisper_engine import STTEngine
+            factory = lambda: STTEngine(args.model_size, compute_type=args.compute_type,
+                                        cpu_threads=args.cpu_threads, num_workers=workers)
+        else:
+            factory = lambda: FakeEngine(args.decode_ms)
+        pool = STTPool(factory, instances=instances, num_workers=workers, max_queue=args.max_queue)
+
+        wall, results = asyncio.run(run_load(pool, args.requests, args.audio, args.stagger_ms))
+        served = sorted(r for r in results if r is not None)
+        stats = pool.stats()
+        pool.shutdown()
+        if not served:
+            print(f"{spec:6s} every request rejected")
+            continue
+        p95 = served[min(len(served) - 1, int(round(0.95 * (len(served) - 1))))]
+        print(f"{spec:6s} {len(served) / wall:6.2f} req/s | p50 {statistics.median(served):6.2f}s p95 {p95:6.2f}s | "
+              f"rejected {stats['rejected']:3d} | queue depth p95 {stats['queue_depth']['p95']} | "
+              f"decode mean {stats['latency_seconds']['mean']}s")
+
+if __name__ == "__main__":
+    main()
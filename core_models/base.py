@@ -1,13 +1,48 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
+import asyncio
 import os
 
 class TTSEngine(ABC):
+    # Part of render cache keys: bump when output for the same input changes
+    engine_version = "1"
+
     @abstractmethod
     def synthesize(self, text: str, output_path: str, options: dict):
         """Convert text to audio file."""
         pass
 
+    async def synthesize_async(self, text: str, output_path: str, options: dict) -> str:
+        """
+        Awaitable version of synthesize. Engines with a native async backend should
+        override this; the default runs the blocking synthesize in a worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.synthesize, text, output_path, options)
+
+    async def stream_async(self, text: str, options: dict) -> AsyncIterator[bytes]:
+        """
+        Yield encoded audio chunks as they are produced, so downstream stages can start
+        before synthesis finishes. The default synthesizes the whole file first.
+        """
+        import tempfile
+        fd, tmp_path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            await self.synthesize_async(text, tmp_path, options)
+            with open(tmp_path, "rb") as f:
+                while True:
+                    chunk = f.read(64 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(tmp_path)
+
 class LipSyncEngine(ABC):
+    # Part of render cache keys: bump when output for the same input changes
+    engine_version = "1"
+
     @abstractmethod
     def animate(self, image_path: str, audio_path: str, output_path: str):
         """Generate a video of the face in image_path speaking the audio_path."""
@@ -0,0 +1,70 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PreparedAvatar:
+    """
+    Everything Wav2Lip needs about a static avatar that does not depend on the audio:
+    the decoded frame, the detected face rect, the resized crop, the (1, 6, 96, 96)
+    input tensor (already on the engine's device) and the blend mask used for paste-back.
+    """
+    def __init__(self, key, full_frame, face_rect, face_resized, input_tensor, blend_mask):
+        self.key = key
+        self.full_frame = full_frame
+        self.face_rect = face_rect
+        self.face_resized = face_resized
+        self.input_tensor = input_tensor
+        self.blend_mask = blend_mask
+
+
+class AvatarCache:
+    """
+    Content-addressed LRU cache of PreparedAvatar entries.
+    Keys are sha1(image bytes) + crop parameters, so the same portrait uploaded under
+    a different filename still hits, and changing the crop settings never returns a stale crop.
+    """
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, **crop_params) -> str:
+        digest = hashlib.sha1(image_bytes).hexdigest()
+        params = ",".join(f"{k}={crop_params[k]}" for k in sorted(crop_params))
+        return f"{digest}|{params}"
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: PreparedAvatar):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
@@ -0,0 +1,182 @@
+import math
+import os
+import time
+
+import numpy as np
+import torch
+
+# lip_sync.inference.backend values
+BACKENDS = ("eager", "torchscript", "compile", "onnx", "int8")
+
+# Parity check inputs: fixed seed so every worker checks the same thing
+PARITY_BATCH = 4
+PARITY_SEED = 1234
+
+# Fallback for lip_sync.inference.min_psnr (dB, 0-255 pixels) when settings don't set it
+DEFAULT_MIN_PSNR = 30.0
+
+def configure_threads(intra_op: int = None, inter_op: int = None):
+    """
+    Per-process torch thread pools. inter_op can only be set before torch starts any
+    parallel work, so it is best-effort (it is also applied to ONNX Runtime sessions).
+    """
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            print(f"Could not set inter-op threads ({e}), keeping {torch.get_num_interop_threads()}")
+
+def psnr(reference: np.ndarray, candidate: np.ndarray, peak: float = 255.0) -> float:
+    mse = float(np.mean((reference.astype(np.float64) - candidate.astype(np.float64)) ** 2))
+    if mse == 0:
+        return float("inf")
+    return 10 * math.log10(peak * peak / mse)
+
+def sample_inputs(batch: int = PARITY_BATCH, img_size: int = 96, device: str = "cpu"):
+    generator = torch.Generator().manual_seed(PARITY_SEED)
+    mels = torch.rand((batch, 1, 80, 16), generator=generator)
+    imgs = torch.rand((batch, 6, img_size, img_size), generator=generator)
+    return mels.to(device), imgs.to(device)
+
+
+class EagerBackend:
+    name = "eager"
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, mels, imgs):
+        with torch.no_grad():
+            return self.model(mels, imgs)
+
+
+class TorchScriptBackend(EagerBackend):
+    """Traced + frozen graph (fuses conv/bn and drops Python overhead per layer)."""
+    name = "torchscript"
+
+    def __init__(self, model, example_inputs):
+        with torch.no_grad():
+            traced = torch.jit.trace(model, example_inputs)
+            self.model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+
+class CompileBackend(EagerBackend):
+    """torch.compile (PyTorch 2.x); the first calls per batch shape pay the compile cost."""
+    name = "compile"
+
+    def __init__(self, model):
+        self.model = torch.compile(model)
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime session over an exported graph with a dynamic batch axis.
+    The export is cached next to the checkpoint and redone when the checkpoint changes.
+    """
+    name = "onnx"
+
+    def __init__(self, model, checkpoint_path, example_inputs, intra_op=None, inter_op=None, quantize=False):
+        import onnxruntime as ort
+
+        onnx_path = export_onnx(model, checkpoint_path, example_inputs)
+        if quantize:
+            onnx_path = quantize_onnx(onnx_path)
+            self.name = "int8"
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op:
+            options.intra_op_num_threads = int(intra_op)
+        if inter_op:
+            options.inter_op_num_threads = int(inter_op)
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.onnx_path = onnx_path
+
+    def __call__(self, mels, imgs):
+        # expand()ed face batches are stride-0 views: ORT needs real contiguous buffers
+        outputs = self.session.run(["pred"], {
+            "mel": np.ascontiguousarray(mels.cpu().numpy()),
+            "face": np.ascontiguousarray(imgs.cpu().numpy()),
+        })
+        return torch.from_numpy(outputs[0])
+
+
+def _is_stale(derived_path: str, source_path: str) -> bool:
+    return not os.path.exists(derived_path) or os.path.getmtime(derived_path) < os.path.getmtime(source_path)
+
+def export_onnx(model, checkpoint_path: str, example_inputs) -> str:
+    onnx_path = os.path.splitext(checkpoint_path)[0] + ".onnx"
+    if _is_stale(onnx_path, checkpoint_path):
+        print(f"Exporting Wav2Lip to ONNX: {onnx_path}")
+        tmp_path = onnx_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model, example_inputs, tmp_path,
+                input_names=["mel", "face"], output_names=["pred"],
+                dynamic_axes={"mel": {0: "batch"}, "face": {0: "batch"}, "pred": {0: "batch"}},
+                opset_version=17,
+            )
+        os.replace(tmp_path, onnx_path)
+    return onnx_path
+
+def quantize_onnx(onnx_path: str) -> str:
+    """Dynamic int8 (weights int8, activations quantized at runtime), which also covers the conv layers."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+    if _is_stale(int8_path, onnx_path):
+        print(f"Quantizing ONNX graph to int8: {int8_path}")
+        tmp_path = int8_path + ".tmp"
+        quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QUInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+def build_backend(name: str, model, checkpoint_path: str, device: str = "cpu", img_size: int = 96,
+                  intra_op: int = None, inter_op: int = None):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown lip_sync inference backend '{name}'. Available: {list(BACKENDS)}")
+    if name == "eager":
+        return EagerBackend(model)
+    example_inputs = sample_inputs(img_size=img_size, device=device)
+    if name == "torchscript":
+        return TorchScriptBackend(model, example_inputs)
+    if name == "compile":
+        return CompileBackend(model)
+    if device != "cpu":
+        raise ValueError(f"Backend '{name}' is CPU-only")
+    return OnnxBackend(model, checkpoint_path, example_inputs, intra_op, inter_op, quantize=(name == "int8"))
+
+def check_parity(backend, reference, img_size: int = 96, device: str = "cpu") -> float:
+    """PSNR (dB) of backend output vs. the eager reference on a fixed sample, in 0-255 pixel scale."""
+    mels, imgs = sample_inputs(img_size=img_size, device=device)
+    expected = reference(mels, imgs).cpu().numpy() * 255.
+    actual = backend(mels, imgs).cpu().numpy() * 255.
+    return psnr(expected, actual)
+
+def select_backend(name: str, model, checkpoint_path: str, device: str = "cpu", img_size: int = 96,
+                   min_psnr: float = DEFAULT_MIN_PSNR, intra_op: int = None, inter_op: int = None):
+    """
+    Build the configured backend and verify it against eager output.
+    Returns (backend, parity_psnr or None for eager).
+
+    Raises RuntimeError if the backend can't be built here or misses the PSNR threshold.
+    There is no silent fallback to eager: the backend is part of the video cache key, which
+    the server (before the model loads) and pre_generate_assets.py compute from the
+    configured name, so the backend in use must be the configured one.
+    """
+    eager = EagerBackend(model)
+    if name == "eager":
+        return eager, None
+    try:
+        start = time.perf_counter()
+        backend = build_backend(name, model, checkpoint_path, device, img_size, intra_op, inter_op)
+        score = check_parity(backend, eager, img_size, device)
+    except Exception as e:
+        raise RuntimeError(f"lip_sync backend '{name}' unavailable ({e}). Fix it or set lip_sync.inference.backend: eager") from e
+    if score < min_psnr:
+        raise RuntimeError(f"lip_sync backend '{name}' failed parity (PSNR {score:.1f} dB < {min_psnr} dB). "
+                           "Use another backend or set lip_sync.inference.backend: eager")
+    print(f"lip_sync backend '{name}' ready in {time.perf_counter() - start:.1f}s (parity PSNR {score:.1f} dB)")
+    return backend, score
@@ -0,0 +1,153 @@
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence
+import collections
+import threading
+import time
+
+
+class _WorkItem:
+    __slots__ = ("session", "payload", "size", "future")
+
+    def __init__(self, session, payload, size):
+        self.session = session
+        self.payload = payload
+        self.size = size
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """
+    Packs model work from concurrent renders into shared forward passes.
+
+    Each render thread submit()s work items (a few frames' worth of mel windows
+    for one avatar, sized by item_frames()) and gets a Future back. A single scheduler thread
+    collects items into one batch of up to max_batch frames, runs
+    run_batch(payloads) once and hands every item its slice of the output.
+
+    The trade-off knob is max_wait_ms: how long a partially filled batch is held
+    open for other renders to contribute. 0 means "run whatever is queued right
+    away" (lowest latency); larger values fill batches better under load. A batch
+    never waits when every active session already has work in it, so a single
+    render pays no extra latency.
+    """
+    def __init__(self, run_batch: Callable[[List[Any]], Sequence[Any]], max_batch: int = 32,
+                 max_wait_ms: float = 5.0, name: str = "lip-sync-batcher"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._active_sessions = 0
+        self._closed = False
+
+        # Stats
+        self.batches = 0
+        self.frames = 0
+        self.items = 0
+
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def session(self):
+        """Context manager marking one render as active (used to decide when waiting is pointless)."""
+        return _Session(self)
+
+    def item_frames(self, minimum: int = 1) -> int:
+        """
+        Suggested work item size: an equal share of a batch per active session.
+        A lone render submits full batches (no extra forward calls); under load
+        items shrink so several renders fit into each pass.
+        """
+        return max(1, min(self.max_batch, max(minimum, self.max_batch // max(1, self._active_sessions))))
+
+    def submit(self, session, payload: Any, size: int) -> Future:
+        if size > self.max_batch:
+            raise ValueError(f"Work item of {size} frames exceeds max_batch={self.max_batch}")
+        item = _WorkItem(session, payload, size)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("InferenceScheduler is closed")
+            self._queue.append(item)
+            self._cond.notify()
+        return item.future
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _collect(self) -> List[_WorkItem]:
+        """Block for the first item, then fill the batch until it is full, everyone is in, or max_wait expires."""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+
+            batch = []
+            frames = 0
+            sessions = set()
+            deadline = time.monotonic() + self.max_wait
+            while True:
+                # Take items in arrival order while they fit
+                while self._queue and frames + self._queue[0].size <= self.max_batch:
+                    item = self._queue.popleft()
+                    batch.append(item)
+                    frames += item.size
+                    sessions.add(item.session)
+                if frames >= self.max_batch or self._queue or self._closed:
+                    # Full, or the next item doesn't fit: run now
+                    break
+                if len(sessions) >= self._active_sessions:
+                    # Nobody else could contribute
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            try:
+                results = self.run_batch([item.payload for item in batch])
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            self.frames += sum(item.size for item in batch)
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "frames": self.frames,
+            "avg_batch_frames": (self.frames / self.batches) if self.batches else 0.0,
+            "active_sessions": self._active_sessions,
+            "queued_items": len(self._queue),
+        }
+
+
+class _Session:
+    def __init__(self, scheduler: InferenceScheduler):
+        self.scheduler = scheduler
+
+    def __enter__(self):
+        with self.scheduler._cond:
+            self.scheduler._active_sessions += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.scheduler._cond:
+            self.scheduler._active_sessions -= 1
+            # A batch waiting on this session can go now
+            self.scheduler._cond.notify()
+        return False
@@ -0,0 +1,47 @@
+import math
+import os
+
+
+class HLSPlaylist:
+    """
+    Minimal HLS (EVENT) media playlist that grows as segments are rendered.
+    Players poll it and start as soon as the first segment is listed;
+    finish() appends EXT-X-ENDLIST so they stop polling.
+
+    Nothing is written until the first segment is added: a playlist on disk always has
+    something to play, so its existence doubles as the "first segment ready" marker.
+    """
+    def __init__(self, path: str, target_duration: float):
+        self.path = path
+        self.target_duration = max(1, int(math.ceil(target_duration)))
+        self.segments = []
+        self.finished = False
+
+    def add_segment(self, segment_path: str, duration: float):
+        # Entries are relative to the playlist so the directory can be served from anywhere
+        self.segments.append((os.path.basename(segment_path), duration))
+        self._write()
+
+    def finish(self):
+        self.finished = True
+        self._write()
+
+    def _write(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for name, duration in self.segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(name)
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+
+        # Atomic replace so a polling player never reads a half-written playlist
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,59 @@
+import copy
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MEL_STEP_SIZE = 16 # mel frames per video frame window (Wav2Lip's syncnet input)
+
+def frame_count(mel, fps=25):
+    """
+    Number of video frames for a mel of T steps: one per window start int(i * 80 / fps),
+    up to and including the first window that runs past the end.
+    """
+    n_steps = mel.shape[1]
+    mel_idx_multiplier = 80./fps
+    i = np.arange(int(n_steps / mel_idx_multiplier) + 2)
+    return int(((i * mel_idx_multiplier).astype(np.int64) + MEL_STEP_SIZE <= n_steps).sum()) + 1
+
+
+class MelWindows:
+    """
+    The (80, 16) mel window of every video frame in [start_frame, end_frame), without
+    materializing them: consecutive windows overlap ~80%, so copying them all up front
+    would hold 5x the mel in memory.
+
+    Window start offsets are computed once, in one vectorized step, and windows are read
+    through a strided sliding_window_view of the full-utterance mel, so chunk
+    boundaries see the same audio context as a single-pass render. Indexing with a
+    slice gathers that batch as one (B, 80, 16) float32 array.
+
+    The mel is held time-major, (T, 80): a window is 16 consecutive rows (one 5 KB
+    block) and a batch of overlapping windows one short contiguous run. Windowed over
+    librosa's (80, T) layout, every window read 80 rows T steps apart, which on long
+    audio fell behind the old Python loop.
+    """
+    def __init__(self, mel, fps=25, start_frame=0, end_frame=None):
+        n_steps = mel.shape[1]
+        if n_steps < MEL_STEP_SIZE:
+            raise ValueError(f"Audio too short: {n_steps} mel steps, need at least {MEL_STEP_SIZE}")
+
+        frames = np.arange(frame_count(mel, fps))
+        # The last frame's window would run past the end: it uses the final 16 steps instead
+        self.starts = np.minimum((frames * (80./fps)).astype(np.int64), n_steps - MEL_STEP_SIZE)[start_frame:end_frame]
+
+        # The only copy: transposed and converted to the model dtype in one pass
+        self.mel = np.ascontiguousarray(np.asarray(mel).T, dtype=np.float32)
+        # (T - 15, 80, 16) read-only view, no copy
+        self._windows = sliding_window_view(self.mel, MEL_STEP_SIZE, axis=0)
+
+    def frames(self, start_frame=0, end_frame=None):
+        """The windows of a sub-range of these frames, sharing the mel and its offsets (nothing is recomputed)."""
+        view = copy.copy(self)
+        view.starts = self.starts[start_frame:end_frame]
+        return view
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return self._windows[self.starts[index]]
@@ -0,0 +1,13 @@
+# Kept free of heavy imports (torch, mediapipe) so the engine version can be
+# computed, e.g. for render cache keys, without loading the model
+
+IMG_SIZE = 96
+CROP_SCALE = 1.1 # Tighter crop (was 1.25) to improve resolution of lips in 96x96 box
+
+def engine_version_for(img_size=IMG_SIZE, crop_scale=CROP_SCALE, backend="eager"):
+    # Crop/resolution settings change the output, so they are part of the version.
+    # So does a non-eager backend (int8 in particular); eager keeps the original key.
+    version = f"wav2lip-gan-1|img={img_size}|crop={crop_scale}"
+    if backend != "eager":
+        version += f"|backend={backend}"
+    return version
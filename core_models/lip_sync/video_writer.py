@@ -0,0 +1,130 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from core_models.tracing import record
+
+
+def find_ffmpeg() -> str:
+    """Prefer the binary bundled with imageio-ffmpeg (a moviepy dependency), then ffmpeg on PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        pass
+    path = shutil.which("ffmpeg")
+    if path is None:
+        raise RuntimeError("ffmpeg not found. Install imageio-ffmpeg or put ffmpeg on PATH.")
+    return path
+
+
+class FFmpegVideoWriter:
+    """
+    Streams raw RGB frames into an ffmpeg/libx264 subprocess as they are produced.
+
+    Frames are written to ffmpeg's stdin, so encoding runs in parallel with inference
+    and memory stays flat regardless of clip length. The audio track is muxed in the
+    same pass and the file is only moved to output_path once ffmpeg exits cleanly.
+
+    Usage:
+        with FFmpegVideoWriter(path, width, height, fps=25, audio_path=wav) as writer:
+            writer.write_frames(batch) # (B, H, W, 3) uint8 RGB
+    """
+    def __init__(self, output_path: str, width: int, height: int, fps: int = 25,
+                 audio_path: str = None, crf: int = 23, preset: str = "veryfast",
+                 audio_offset: float = None, audio_duration: float = None,
+                 container: str = "mp4", timestamp_offset: float = None):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.frame_count = 0
+        self.encode_seconds = 0.0
+
+        out_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(out_dir, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(suffix=".ts" if container == "mpegts" else ".mp4", dir=out_dir)
+        os.close(fd)
+
+        cmd = [
+            find_ffmpeg(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        ]
+        if audio_path:
+            # Optional slice of the audio track (used for progressive/chunked renders)
+            if audio_offset:
+                cmd += ["-ss", f"{audio_offset:.3f}"]
+            if audio_duration:
+                cmd += ["-t", f"{audio_duration:.3f}"]
+            cmd += ["-i", audio_path]
+        cmd += [
+            # libx264 + yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+        ]
+        if audio_path:
+            # Trim audio to match video length
+            cmd += ["-c:a", "aac", "-shortest"]
+        if timestamp_offset:
+            # Keeps timestamps continuous across HLS segments
+            cmd += ["-output_ts_offset", f"{timestamp_offset:.3f}"]
+        cmd += ["-f", container, self._tmp_path]
+
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write_frames(self, frames):
+        """Write a (B, H, W, 3) or (H, W, 3) uint8 RGB array. The array may be reused afterwards."""
+        if frames.ndim == 3:
+            frames = frames[None, ...]
+        if frames.shape[1:] != (self.height, self.width, 3):
+            raise ValueError(f"Frame shape {frames.shape[1:]} does not match writer size {(self.height, self.width, 3)}")
+        start = time.perf_counter()
+        try:
+            self._proc.stdin.write(memoryview(frames if frames.flags.c_contiguous else frames.copy()))
+        except BrokenPipeError:
+            self._fail("ffmpeg exited while receiving frames")
+        # Time blocked on the pipe = time ffmpeg's encoder is behind
+        self.encode_seconds += time.perf_counter() - start
+        self.frame_count += frames.shape[0]
+
+    def close(self) -> str:
+        """Flush, wait for ffmpeg and publish the file at output_path."""
+        start = time.perf_counter()
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._proc.wait() != 0:
+            self._fail(f"ffmpeg exited with code {self._proc.returncode}")
+        self._stderr.close()
+        os.replace(self._tmp_path, self.output_path)
+        self.encode_seconds += time.perf_counter() - start
+        record("lip_sync.encode", self.encode_seconds)
+        return self.output_path
+
+    def abort(self):
+        """Kill ffmpeg and remove the partial file."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        self._stderr.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _fail(self, message):
+        self._stderr.seek(0)
+        details = self._stderr.read().decode(errors="replace").strip()[-2000:]
+        self.abort()
+        raise RuntimeError(f"{message}: {details}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
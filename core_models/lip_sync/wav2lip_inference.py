@@ -1,12 +1,12 @@
 import sys
 import os
+import collections
+import threading
+import time
 import torch
 import cv2
 import numpy as np
 import warnings
-import moviepy.video.io.ImageSequenceClip
-from moviepy.audio.io.AudioFileClip import AudioFileClip
-from moviepy.video.VideoClip import VideoClip
 import mediapipe as mp
 
 # Suppress warnings
@@ -23,20 +23,63 @@ except ImportError:
     pass
 
 from core_models.base import LipSyncEngine
+from core_models.lip_sync.avatar_cache import AvatarCache, PreparedAvatar
+from core_models.lip_sync.batch_scheduler import InferenceScheduler
+from core_models.lip_sync.compositor import FrameCompositor
+from core_models.lip_sync.video_writer import FFmpegVideoWriter
+from core_models.lip_sync.mel import MelWindows
+from core_models.lip_sync.settings import IMG_SIZE, CROP_SCALE, engine_version_for
+from core_models.lip_sync.backends import DEFAULT_MIN_PSNR, configure_threads, select_backend
+from core_models.tracing import record, span
 
 class Wav2LipRealEngine(LipSyncEngine):
-    def __init__(self, checkpoint_path=None):
+    def __init__(self, checkpoint_path=None, avatar_cache_size=16, batching=None, inference=None):
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.img_size = 96
+        self.img_size = IMG_SIZE
+        self.crop_scale = CROP_SCALE
+        
+        # Static avatars are re-used every turn, so face detection + preprocessing is cached
+        self.avatar_cache = AvatarCache(max_entries=avatar_cache_size)
         
         if checkpoint_path is None:
             checkpoint_path = os.path.join(REPO_ROOT, "checkpoints", "wav2lip_gan.pth")
             
+        # CPU inference settings: {"backend", "min_psnr", "intra_op_threads", "inter_op_threads"}
+        inference = inference or {}
+        intra_op = inference.get("intra_op_threads")
+        inter_op = inference.get("inter_op_threads")
+        configure_threads(intra_op, inter_op)
+        
         self.model = self._load_model(checkpoint_path)
         
+        # Accelerated backend, verified against eager output (loading fails if it can't match)
+        self.backend, self.backend_psnr = select_backend(
+            inference.get("backend", "eager"), self.model, checkpoint_path, self.device, self.img_size,
+            min_psnr=float(inference.get("min_psnr", DEFAULT_MIN_PSNR)), intra_op=intra_op, inter_op=inter_op,
+        )
+        
         # Initialize Mediapipe Face Detection
         self.mp_face_detection = mp.solutions.face_detection
         self.face_detection = self.mp_face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
+        # The MediaPipe graph is not safe to call from several worker threads at once
+        self._detect_lock = threading.Lock()
+        
+        # Optional cross-request batching: concurrent renders share forward passes.
+        # batching = {"enabled", "max_batch", "max_wait_ms", "min_item_frames", "pipeline_depth"}
+        batching = batching or {}
+        self.scheduler = None
+        if batching.get("enabled"):
+            self.batch_min_item_frames = int(batching.get("min_item_frames", 8))
+            self.batch_pipeline_depth = max(1, int(batching.get("pipeline_depth", 2)))
+            self.scheduler = InferenceScheduler(
+                self._forward_batch,
+                max_batch=int(batching.get("max_batch", 64)),
+                max_wait_ms=float(batching.get("max_wait_ms", 5)),
+            )
+
+    @property
+    def engine_version(self):
+        return engine_version_for(self.img_size, self.crop_scale, self.backend.name)
 
     def _load_model(self, path):
         if not os.path.exists(path):
@@ -56,7 +99,8 @@ class Wav2LipRealEngine(LipSyncEngine):
     def _get_face_rect(self, image):
         # Convert to RGB
         img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.face_detection.process(img_rgb)
+        with self._detect_lock:
+            results = self.face_detection.process(img_rgb)
         
         if not results.detections:
             return None
@@ -77,8 +121,7 @@ class Wav2LipRealEngine(LipSyncEngine):
         # Determine the size of the square crop
         # Use the maximum dimension of the detection + padding
         max_dim = max(w, h)
-        scale = 1.1 # Tighter crop (was 1.25) to improve resolution of lips in 96x96 box
-        crop_size = int(max_dim * scale)
+        crop_size = int(max_dim * self.crop_scale)
         
         # Calculate coordinates ensuring we stay within image bounds?
         # Ideally we pad with black if we go out of bounds, preventing distortion.
@@ -121,48 +164,37 @@ class Wav2LipRealEngine(LipSyncEngine):
             
         return image[y1:y2, x1:x2]
 
-    def _sharpen(self, img):
-        # Simple sharpening kernel
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        return cv2.filter2D(img, -1, kernel)
-
-    def animate(self, image_path: str, audio_path: str, output_path: str):
-        print(f"Starting animate: {image_path} + {audio_path}")
+    def _build_blend_mask(self, crop_w, crop_h):
+        # Soft Face Masking
+        mask = np.zeros((crop_h, crop_w), dtype=np.float32)
         
-        # 1. Load Audio and MEL
-        if not os.path.exists(audio_path):
-             raise FileNotFoundError(f"Audio not found: {audio_path}")
-
-        # Resample logic handled by repo's audio module usually, but we check
-        try:
-             wav = audio.load_wav(audio_path, 16000)
-             mel = audio.melspectrogram(wav)
-        except Exception as e:
-             print(f"Error processing audio: {e}")
-             raise
-
-        if np.isnan(mel.reshape(-1)).sum() > 0:
-            raise ValueError('Mel contains nan!')
+        # Gradient mask: blend from 50% to 80% of the crop height (mouth region)
+        blend_start = int(crop_h * 0.5) 
+        blend_end = int(crop_h * 0.8)
+        
+        mask[blend_start:blend_end, :] = np.linspace(0, 1, blend_end - blend_start)[:, None]
+        mask[blend_end:, :] = 1.0
+        
+        # Blur mask for smoothness
+        mask = cv2.GaussianBlur(mask, (21, 21), 11)
+        
+        # Expand to 3 channels
+        return np.repeat(mask[:, :, np.newaxis], 3, axis=2)
 
-        # 2. Prepare Mel Chunks
-        mel_chunks = []
-        fps = 25
-        mel_step_size = 16
-        mel_idx_multiplier = 80./fps 
-        
-        i = 0
-        while 1:
-            start_idx = int(i * mel_idx_multiplier)
-            if start_idx + mel_step_size > len(mel[0]):
-                mel_chunks.append(mel[:, len(mel[0]) - mel_step_size:])
-                break
-            mel_chunks.append(mel[:, start_idx : start_idx + mel_step_size])
-            i += 1
+    def _prepare_avatar(self, image_path):
+        """
+        Returns a PreparedAvatar for image_path, running face detection and
+        preprocessing only the first time a given image (by content) is seen.
+        """
+        with open(image_path, "rb") as f:
+            image_bytes = f.read()
             
-        print(f"Generated {len(mel_chunks)} audio chunks (video frames).")
+        key = AvatarCache.make_key(image_bytes, img_size=self.img_size, crop_scale=self.crop_scale)
+        cached = self.avatar_cache.get(key)
+        if cached is not None:
+            return cached
             
-        # 3. Load Image and Detect Face
-        full_frame = cv2.imread(image_path)
+        full_frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
         if full_frame is None:
             raise ValueError(f"Could not read image: {image_path}")
             
@@ -177,112 +209,205 @@ class Wav2LipRealEngine(LipSyncEngine):
         # Use Lanczos for downscaling to preserve details
         face_img_resized = cv2.resize(face_img, (self.img_size, self.img_size), interpolation=cv2.INTER_LANCZOS4)
         
-        # 4. Inference Loop
-        # We need to create a batch of frames (repeated static image)
+        # Wav2Lip image input: (1, 6, 96, 96) -> Masked Image + Reference Image concatenated channel-wise
+        #   Lower half of masked image is 0.
+        gen_img_input = face_img_resized.copy()
+        gen_img_input[self.img_size//2:, :] = 0
+        
+        input_img = np.concatenate((gen_img_input, face_img_resized), axis=2) / 255.
+        input_img = input_img.transpose(2, 0, 1)[np.newaxis, ...] # (1, 6, 96, 96)
+        input_tensor = torch.FloatTensor(input_img).to(self.device)
+        
+        x1, y1, x2, y2 = face_rect
+        blend_mask = self._build_blend_mask(x2 - x1, y2 - y1)
+        
+        prepared = PreparedAvatar(key, full_frame, face_rect, face_img_resized, input_tensor, blend_mask)
+        self.avatar_cache.put(key, prepared)
+        return prepared
+
+    def _load_mel(self, audio_path):
+        if not os.path.exists(audio_path):
+             raise FileNotFoundError(f"Audio not found: {audio_path}")
+
+        # Resample logic handled by repo's audio module usually, but we check
+        try:
+             wav = audio.load_wav(audio_path, 16000)
+             mel = audio.melspectrogram(wav)
+        except Exception as e:
+             print(f"Error processing audio: {e}")
+             raise
+
+        if np.isnan(mel.reshape(-1)).sum() > 0:
+            raise ValueError('Mel contains nan!')
+        # MelWindows converts it to the model dtype (and its layout) in one pass
+        return mel
+
+    def _mel_chunks(self, mel, fps=25, start_frame=0, end_frame=None):
+        """
+        One (80, 16) mel window per video frame, as a MelWindows sequence (slicing it
+        gathers a (B, 80, 16) batch). start_frame/end_frame select a sub-range of frames
+        (or call .frames() on the result); windows are always cut from the full-utterance
+        mel so chunk boundaries see the same audio context as a single-pass render.
+        """
+        return MelWindows(mel, fps, start_frame, end_frame)
+
+    def _forward_batch(self, payloads):
+        """
+        Scheduler callback: one forward pass over work items from any number of renders.
+        payloads: [(mels (n, 1, 80, 16) float32, avatar input tensor (1, 6, 96, 96)), ...]
+        Returns each item's (n, 96, 96, 3) predictions in 0-255.
+        """
+        sizes = [len(mels) for mels, _ in payloads]
+        input_mels = torch.from_numpy(np.concatenate([mels for mels, _ in payloads])).to(self.device)
+        input_imgs = torch.cat([img.expand(n, -1, -1, -1) for (_, img), n in zip(payloads, sizes)])
+        
+        preds = self.backend(input_mels, input_imgs)
+        preds = preds.cpu().numpy().transpose(0, 2, 3, 1) * 255.
+        return np.split(preds, np.cumsum(sizes)[:-1])
+
+    def _render_batched(self, avatar, mel_chunks, writer):
+        """_render via the shared scheduler: fair-share work items, a couple in flight so compositing overlaps inference."""
+        compositor = FrameCompositor(avatar.full_frame, avatar.face_rect, avatar.blend_mask, max_batch=self.scheduler.max_batch)
+        
+        with self.scheduler.session() as session:
+            pending = collections.deque()
+            # Inference here is time spent waiting on the scheduler (queueing + shared forward passes)
+            timings = {"lip_sync.inference": 0.0, "lip_sync.composite": 0.0}
+            
+            def _drain_one():
+                start = time.perf_counter()
+                preds = pending.popleft().result()
+                mid = time.perf_counter()
+                frames = compositor.composite(preds)
+                timings["lip_sync.inference"] += mid - start
+                timings["lip_sync.composite"] += time.perf_counter() - mid
+                writer.write_frames(frames)
+                
+            i = 0
+            while i < len(mel_chunks):
+                # Item size follows the number of concurrent renders (a lone render submits full batches)
+                n = self.scheduler.item_frames(self.batch_min_item_frames)
+                mels = mel_chunks[i : i+n][:, np.newaxis]
+                i += len(mels)
+                pending.append(self.scheduler.submit(session, (mels, avatar.input_tensor), len(mels)))
+                if len(pending) >= self.batch_pipeline_depth:
+                    _drain_one()
+            while pending:
+                _drain_one()
+        for stage, seconds in timings.items():
+            record(stage, seconds)
+
+    def _render(self, avatar, mel_chunks, writer, batch_size=32):
+        """Run the model over mel_chunks and stream composited frames into writer."""
+        if self.scheduler is not None:
+            return self._render_batched(avatar, mel_chunks, writer)
+            
         # Wav2Lip inputs:
         #   indiv_mels: (B, 1, 80, 16)
-        #   x: (B, 6, 96, 96) -> Masked Image + Reference Image concatenated channel-wise
-        #      Top half of masked image is 0.
+        #   x: (B, 6, 96, 96) -> prepared once per avatar, broadcast per batch
         
-        generated_frames = []
-        batch_size = 32 # Can increase for GPU
-        
-        gen_img_input = face_img_resized.copy()
-        # Mask lower half
-        gen_img_input[self.img_size//2:, :] = 0
+        # Mask, clipped coords and output buffer are set up once; each batch is blended in one pass
+        compositor = FrameCompositor(avatar.full_frame, avatar.face_rect, avatar.blend_mask, max_batch=batch_size)
         
-        # Prepare batch tensors
-        # Repeats of the same processed face input
-        # Concatenate (Masked, Reference) channel-wise -> 3+3 = 6 channels
-        batch_input_img = np.concatenate((gen_img_input, face_img_resized), axis=2) / 255.
-        batch_input_img = batch_input_img.transpose(2, 0, 1) # (6, 96, 96)
-        batch_input_img = batch_input_img[np.newaxis, ...] # (1, 6, 96, 96)
+        # On GPU, stage each batch through one reusable pinned buffer so the copy is async
+        staging = None
+        if self.device == 'cuda':
+            staging = torch.empty((batch_size, 1, 80, 16), dtype=torch.float32).pin_memory()
         
-        print("Running inference...")
+        # Accumulated over batches, recorded once per render
+        inference_seconds = 0.0
+        composite_seconds = 0.0
         
         for i in range(0, len(mel_chunks), batch_size):
-            # Get mel batch
-            curr_mel_chunks = mel_chunks[i : i+batch_size]
-            B = len(curr_mel_chunks)
+            start = time.perf_counter()
+            # One gather straight into float32 (B, 80, 16), wrapped without a copy
+            input_mels = torch.from_numpy(mel_chunks[i : i+batch_size]).unsqueeze(1)
+            B = len(input_mels)
             
-            # Prepare Mels
-            input_mels = np.array(curr_mel_chunks) #(B, 80, 16)
-            input_mels = input_mels.reshape(B, 1, 80, 16)
-            input_mels = torch.FloatTensor(input_mels).to(self.device)
+            if staging is not None:
+                staging[:B].copy_(input_mels)
+                input_mels = staging[:B].to(self.device, non_blocking=True)
             
-            # Prepare Images (Repeat B times)
-            input_imgs = np.tile(batch_input_img, (B, 1, 1, 1))
-            input_imgs = torch.FloatTensor(input_imgs).to(self.device)
+            # Same face for every frame: a stride-0 view instead of B copies
+            input_imgs = avatar.input_tensor.expand(B, -1, -1, -1)
             
-            with torch.no_grad():
-                # Model returns (B, 3, 96, 96) with values 0-1
-                preds = self.model(input_mels, input_imgs)
-                
+            # Model returns (B, 3, 96, 96) with values 0-1 (eager, TorchScript, ONNX... see backends.py)
+            preds = self.backend(input_mels, input_imgs)
             preds = preds.cpu().numpy().transpose(0, 2, 3, 1) * 255.
+            mid = time.perf_counter()
             
-            # Paste back logic
-            for p in preds:
-                p = p.astype(np.uint8)
-                
-                # Resize prediction back to the crop size using Lanczos
-                x1, y1, x2, y2 = face_rect
-                crop_w = x2 - x1
-                crop_h = y2 - y1
-                p_resized = cv2.resize(p, (crop_w, crop_h), interpolation=cv2.INTER_LANCZOS4)
-                
-                # Optional: Mild sharpening to counter blur
-                p_resized = self._sharpen(p_resized)
-                
-                # Soft Face Masking
-                mask = np.zeros((crop_h, crop_w), dtype=np.float32)
-                
-                # Gradient mask: blend from 50% to 80% of the crop height (mouth region)
-                blend_start = int(crop_h * 0.5) 
-                blend_end = int(crop_h * 0.8)
-                
-                mask[blend_start:blend_end, :] = np.linspace(0, 1, blend_end - blend_start)[:, None]
-                mask[blend_end:, :] = 1.0
-                
-                # Blur mask for smoothness
-                mask = cv2.GaussianBlur(mask, (21, 21), 11)
-                
-                # Expand to 3 channels
-                mask_3c = np.repeat(mask[:, :, np.newaxis], 3, axis=2)
-                
-                new_frame = full_frame.copy()
-                
-                # Safe coords logic
-                oy1 = max(0, y1); oy2 = min(full_frame.shape[0], y2)
-                ox1 = max(0, x1); ox2 = min(full_frame.shape[1], x2)
-                
-                py1 = max(0, -y1) 
-                py2 = py1 + (oy2 - oy1)
-                px1 = max(0, -x1)
-                px2 = px1 + (ox2 - ox1)
-                
-                # Regions
-                original_roi = new_frame[oy1:oy2, ox1:ox2].astype(np.float32)
-                prediction_roi = p_resized[py1:py2, px1:px2].astype(np.float32)
-                mask_roi = mask_3c[py1:py2, px1:px2]
-                
-                # Blend: Result = Original * (1-Mask) + Prediction * Mask
-                blended_roi = original_roi * (1.0 - mask_roi) + prediction_roi * mask_roi
-                
-                new_frame[oy1:oy2, ox1:ox2] = blended_roi.astype(np.uint8)
-                generated_frames.append(cv2.cvtColor(new_frame, cv2.COLOR_BGR2RGB))
-                
-        # 5. Save Video with Audio
-        print(f"Saving video to {output_path}")
-        clip = moviepy.video.io.ImageSequenceClip.ImageSequenceClip(generated_frames, fps=fps)
-        audio_clip = AudioFileClip(audio_path)
-        
-        # Trim audio to match video length if needed, or vice-versa
-        # Usually we want full audio
-        if audio_clip.duration > clip.duration:
-             audio_clip = audio_clip.subclipped(0, clip.duration)
-             
-        final_clip = clip.with_audio(audio_clip)
-        final_clip.write_videofile(output_path, codec='libx264', audio_codec='aac', logger=None)
+            # Paste back logic (batched), then hand the batch straight to the encoder
+            frames = compositor.composite(preds)
+            inference_seconds += mid - start
+            composite_seconds += time.perf_counter() - mid
+            writer.write_frames(frames)
+            
+        record("lip_sync.inference", inference_seconds)
+        record("lip_sync.composite", composite_seconds)
+
+    def animate(self, image_path: str, audio_path: str, output_path: str):
+        print(f"Starting animate: {image_path} + {audio_path}")
+        fps = 25
+        
+        # 1. Load Audio and MEL
+        # 2. Prepare Mel Chunks
+        with span("lip_sync.mel"):
+            mel = self._load_mel(audio_path)
+            mel_chunks = self._mel_chunks(mel, fps)
+        print(f"Generated {len(mel_chunks)} audio chunks (video frames).")
+            
+        # 3. Load Image and Detect Face (cached per avatar content)
+        with span("lip_sync.face_prep"):
+            avatar = self._prepare_avatar(image_path)
+        
+        # 4. Inference Loop
+        # Frames are streamed into ffmpeg batch by batch (audio muxed in the same pass),
+        # so encoding overlaps inference and no frame list is held in memory
+        frame_h, frame_w = avatar.full_frame.shape[:2]
+        print("Running inference...")
         
+        with FFmpegVideoWriter(output_path, frame_w, frame_h, fps=fps, audio_path=audio_path) as writer:
+            self._render(avatar, mel_chunks, writer)
+                
+        print(f"Saved video to {output_path}")
         print("Done.")
         return output_path
+
+    def animate_chunks(self, image_path: str, audio_path: str, output_dir: str,
+                       first_chunk_seconds: float = 1.0, chunk_seconds: float = 3.0):
+        """
+        Progressive variant of animate: renders the clip as a sequence of MPEG-TS
+        segments (each with its slice of the audio) and yields
+        (index, segment_path, duration_seconds) as soon as each one is encoded.
+        The first chunk is kept short so playback can start quickly.
+        """
+        print(f"Starting chunked animate: {image_path} + {audio_path}")
+        fps = 25
+        os.makedirs(output_dir, exist_ok=True)
+        
+        with span("lip_sync.mel"):
+            # Windowed once for the whole clip; each chunk takes a view of its frames
+            windows = self._mel_chunks(self._load_mel(audio_path), fps)
+            total_frames = len(windows)
+        with span("lip_sync.face_prep"):
+            avatar = self._prepare_avatar(image_path)
+        frame_h, frame_w = avatar.full_frame.shape[:2]
+        
+        start_frame = 0
+        index = 0
+        while start_frame < total_frames:
+            seconds = first_chunk_seconds if index == 0 else chunk_seconds
+            end_frame = min(total_frames, start_frame + max(1, int(round(seconds * fps))))
+            mel_chunks = windows.frames(start_frame, end_frame)
+            
+            segment_path = os.path.join(output_dir, f"segment_{index:05d}.ts")
+            with FFmpegVideoWriter(
+                segment_path, frame_w, frame_h, fps=fps, audio_path=audio_path,
+                audio_offset=start_frame / fps, audio_duration=(end_frame - start_frame) / fps,
+                container="mpegts", timestamp_offset=start_frame / fps,
+            ) as writer:
+                self._render(avatar, mel_chunks, writer)
+                
+            yield index, segment_path, (end_frame - start_frame) / fps
+            start_frame = end_frame
+            index += 1
@@ -0,0 +1,52 @@
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+from core_models.stt.streaming import WHISPER_SAMPLE_RATE
+
+# Frame used for the silence check (same size as the streaming VAD's)
+CHECK_FRAME_MS = 30
+
+def decode_audio(fileobj: BinaryIO, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes an uploaded clip (WebM/Opus, Ogg, WAV, MP3...) straight from a file object
+    to float32 mono at sample_rate, the array faster-whisper takes as-is.
+    Same PyAV path faster-whisper uses for file paths, minus the temp file.
+    Raises ValueError if the data can't be decoded.
+    """
+    import av
+
+    fileobj.seek(0)
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    chunks = []
+    try:
+        with av.open(fileobj, mode="r", metadata_errors="ignore") as container:
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+        # Drain samples the resampler is still holding
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+    except (av.error.FFmpegError, IndexError, StopIteration) as e:
+        # IndexError/StopIteration: container without an audio stream
+        raise ValueError(f"Could not decode audio: {e}") from e
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+def clip_problem(audio: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE,
+                 min_duration_ms: int = 300, silence_db: float = -50.0) -> Optional[str]:
+    """
+    Cheap pre-check before spending a Whisper decode on a clip.
+    Returns "too_short", "silent" (no 30 ms frame louder than silence_db dBFS) or None if it's worth transcribing.
+    """
+    if len(audio) < sample_rate * min_duration_ms / 1000:
+        return "too_short"
+    frame = max(1, int(sample_rate * CHECK_FRAME_MS / 1000))
+    usable = len(audio) - len(audio) % frame
+    frames = audio[:usable].reshape(-1, frame) if usable else audio.reshape(1, -1)
+    loudest = float(np.sqrt(np.max(np.mean(np.square(frames, dtype=np.float64), axis=1))))
+    if 20 * np.log10(loudest + 1e-10) < silence_db:
+        return "silent"
+    return None
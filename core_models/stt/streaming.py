@@ -0,0 +1,106 @@
+import collections
+
+import numpy as np
+
+from core_models.stt.vad import EnergyVAD
+
+WHISPER_SAMPLE_RATE = 16000
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class UtteranceStream:
+    """
+    Cuts a live PCM16 mono stream into utterances with a VAD and says when to decode.
+
+    feed(bytes) returns a list of events:
+      {"type": "speech_start"}
+      {"type": "partial", "audio": float32 16 kHz}  utterance so far, every partial_interval_ms of speech
+      {"type": "final", "audio": float32 16 kHz}    the complete utterance, as soon as the VAD sees it end
+    Decoding itself is left to the caller (it belongs on the STT pool, not here).
+    """
+    def __init__(self, input_rate: int = WHISPER_SAMPLE_RATE, vad: EnergyVAD = None,
+                 partial_interval_ms: int = 800, pre_roll_ms: int = 300,
+                 trailing_silence_ms: int = 200, max_utterance_s: float = 30.0):
+        self.input_rate = input_rate
+        self.vad = vad or EnergyVAD(sample_rate=WHISPER_SAMPLE_RATE)
+        frame_ms = 1000.0 * self.vad.frame_size / WHISPER_SAMPLE_RATE
+        self.partial_interval = int(WHISPER_SAMPLE_RATE * partial_interval_ms / 1000)
+        self.trailing_frames = int(trailing_silence_ms / frame_ms)
+        self.max_samples = int(WHISPER_SAMPLE_RATE * max_utterance_s)
+
+        # Frames kept from before speech was confirmed, so the first syllable isn't clipped
+        self._pre_roll = collections.deque(maxlen=max(1, int(pre_roll_ms / frame_ms)) + self.vad.start_frames)
+        self._utterance = []
+        self._utterance_samples = 0
+        self._since_partial = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._odd_byte = b""
+
+    def _resample(self, audio: np.ndarray) -> np.ndarray:
+        if self.input_rate == WHISPER_SAMPLE_RATE or len(audio) == 0:
+            return audio
+        n_out = int(round(len(audio) * WHISPER_SAMPLE_RATE / self.input_rate))
+        return np.interp(
+            np.linspace(0, len(audio) - 1, n_out), np.arange(len(audio)), audio
+        ).astype(np.float32)
+
+    def feed(self, data: bytes):
+        data = self._odd_byte + data
+        if len(data) % 2:
+            data, self._odd_byte = data[:-1], data[-1:]
+        else:
+            self._odd_byte = b""
+
+        audio = np.concatenate([self._pending, self._resample(pcm16_to_float(data))])
+        frame_size = self.vad.frame_size
+        n_frames = len(audio) // frame_size
+        self._pending = audio[n_frames * frame_size:]
+
+        events = []
+        for i in range(n_frames):
+            frame = audio[i * frame_size:(i + 1) * frame_size]
+            event = self.vad.update(frame)
+            if not self.vad.in_speech and event is None:
+                self._pre_roll.append(frame)
+                continue
+
+            if event == "start":
+                self._utterance = list(self._pre_roll) + [frame]
+                self._utterance_samples = sum(len(f) for f in self._utterance)
+                self._since_partial = 0
+                self._pre_roll.clear()
+                events.append({"type": "speech_start"})
+                continue
+
+            self._utterance.append(frame)
+            self._utterance_samples += len(frame)
+            self._since_partial += len(frame)
+
+            if event == "end" or self._utterance_samples >= self.max_samples:
+                events.append(self._final())
+            elif self._since_partial >= self.partial_interval:
+                self._since_partial = 0
+                events.append({"type": "partial", "audio": np.concatenate(self._utterance)})
+        return events
+
+    def _final(self):
+        # Drop most of the silence that confirmed the end of speech
+        frames = self._utterance
+        if self.vad.in_speech:
+            # Cut at max length: keep listening, the next frames start a new utterance
+            self.vad.reset()
+        else:
+            frames = frames[:max(1, len(frames) - self.vad.end_frames + self.trailing_frames)]
+        self._utterance = []
+        self._utterance_samples = 0
+        self._since_partial = 0
+        return {"type": "final", "audio": np.concatenate(frames)}
+
+    def flush(self):
+        """End of stream: the utterance in progress (if any) as a final event."""
+        if not self._utterance:
+            return []
+        self.vad.reset()
+        return [{"type": "final", "audio": np.concatenate(self._utterance)}]
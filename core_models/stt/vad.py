@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Frame-energy voice activity detector for streaming 16 kHz mono float32 audio.
+
+    Each frame counts as speech when its level (dBFS) is above both an absolute floor
+    and the tracked background noise level plus a margin. An utterance starts after
+    start_ms of consecutive speech and ends after end_silence_ms of consecutive
+    non-speech, so short pauses between words don't cut it.
+    """
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, threshold_db: float = -45.0,
+                 margin_db: float = 10.0, start_ms: int = 90, end_silence_ms: int = 500):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.start_frames = max(1, int(math.ceil(start_ms / frame_ms)))
+        self.end_frames = max(1, int(math.ceil(end_silence_ms / frame_ms)))
+        self.reset()
+
+    def reset(self):
+        self.noise_db = self.threshold_db - self.margin_db
+        self.in_speech = False
+        self._run = 0 # consecutive frames contradicting the current state
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        level_db = 20 * math.log10(rms + 1e-10)
+        speech = level_db > max(self.threshold_db, self.noise_db + self.margin_db)
+        if not speech:
+            # Track the background level from non-speech frames only
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level_db
+        return speech
+
+    def update(self, frame: np.ndarray):
+        """Feed one frame of frame_size samples. Returns "start", "end" or None."""
+        speech = self._is_speech(frame)
+        if speech == self.in_speech:
+            self._run = 0
+            return None
+        self._run += 1
+        if self._run < (self.end_frames if self.in_speech else self.start_frames):
+            return None
+        self.in_speech = speech
+        self._run = 0
+        return "start" if speech else "end"
@@ -1,26 +1,47 @@
 from faster_whisper import WhisperModel
+from core_models.tracing import span
 import os
 import torch
 
 class STTEngine:
-    def __init__(self, model_size="base", device="cpu"):
-        print(f"Loading Whisper STT Model: {model_size} on {device}...")
-        compute_type = "int8"
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
-        print("Whisper Model Loaded.")
-
-    def transcribe(self, audio_path: str) -> str:
+    def __init__(self, model_size="base", device="cpu", compute_type="int8", cpu_threads=0, num_workers=1):
         """
-        Transcribes audio file to text.
+        cpu_threads: CTranslate2 threads per decode (0 = its default).
+        num_workers: decodes this one model can run at the same time; transcribe() calls
+        from more threads than this queue inside CTranslate2.
         """
-        segments, info = self.model.transcribe(
-            audio_path, 
-            beam_size=5, 
-            language="en", 
-            vad_filter=False
+        print(f"Loading Whisper STT Model: {model_size} on {device} ({compute_type}, {cpu_threads or 'default'} threads x {num_workers} workers)...")
+        self.model = WhisperModel(
+            model_size, device=device, compute_type=compute_type,
+            cpu_threads=int(cpu_threads or 0), num_workers=max(1, int(num_workers)),
         )
+        self.engine_version = f"faster-whisper|{model_size}|{compute_type}"
+        print("Whisper Model Loaded.")
 
-        text = " ".join([segment.text for segment in segments])
+    def transcribe(self, audio_path: str, beam_size: int = 5, greedy: bool = False) -> str:
+        """
+        Transcribes audio (file path, or float32 16 kHz mono array) to text.
+        greedy=True trades accuracy for latency: single hypothesis, no temperature
+        fallback, no timestamps (used for streaming partials).
+        """
+        options = {"beam_size": beam_size}
+        if greedy:
+            options = {
+                "beam_size": 1,
+                "best_of": 1,
+                "temperature": 0.0,
+                "condition_on_previous_text": False,
+                "without_timestamps": True,
+            }
+        with span("stt.partial" if greedy else "stt"):
+            segments, info = self.model.transcribe(
+                audio_path, 
+                language="en", 
+                vad_filter=False,
+                **options
+            )
+            # segments is lazy: decoding happens while iterating
+            text = " ".join([segment.text for segment in segments])
         return text.strip()
 
 # Singleton instance
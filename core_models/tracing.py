@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+import contextvars
+import functools
+import time
+
+# Per-request span list. Worker threads see it when the work is submitted with
+# in_context() (ExecutionLayer.run and the STT pool do this).
+_current_trace = contextvars.ContextVar("interactgen_trace", default=None)
+# Called with (stage, seconds) for every span, traced request or not (feeds /metrics)
+_listeners: List[Callable[[str, float], None]] = []
+
+class Trace:
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = [] # list.append is atomic, threads can add to it
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage (summed over repeats), in first-seen order."""
+        totals = {}
+        for name, seconds in list(self.spans):
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+def start_trace():
+    """Begins a trace for the current context. Returns (trace, token for end_trace)."""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+def add_listener(fn: Callable[[str, float], None]):
+    _listeners.append(fn)
+
+def record(stage: str, seconds: float):
+    """Adds a finished span (for timings accumulated by hand, e.g. over a batch loop)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append((stage, seconds))
+    for fn in _listeners:
+        fn(stage, seconds)
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+def in_context(fn: Callable, *args, **kwargs) -> Callable:
+    """fn bound to a copy of the caller's context, for running on another thread."""
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -1,33 +1,64 @@
 from core_models.base import TTSEngine
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
 import edge_tts
 import asyncio
+import os
+import uuid
+
+DEFAULT_VOICE = "en-US-ChristopherNeural"
 
 class EdgeTTSEngine(TTSEngine):
-    def synthesize(self, text: str, output_path: str, options: dict) -> str:
+    engine_version = "edge-tts-1"
+
+    def __init__(self, communicate_cls=None):
+        # Injectable for tests: any class with Communicate(text, voice).stream() yielding
+        # {"type": "audio", "data": bytes} dicts works as a local stand-in.
+        self.communicate_cls = communicate_cls or edge_tts.Communicate
+
+    def _voice(self, options: dict) -> str:
+        # Fallback to a good default if None provided
+        return (options or {}).get("voice_profile") or DEFAULT_VOICE
+
+    async def stream_async(self, text: str, options: dict) -> AsyncIterator[bytes]:
         """
-        Synthesizes speech using Microsoft Edge's Neural TTS.
-        Blocks until completion (uses asyncio.run internally).
+        Yields audio chunks from Microsoft Edge's Neural TTS as they arrive over the websocket.
         """
-        voice = options.get("voice_profile", "en-US-ChristopherNeural")
-        if not voice:
-            # Fallback to a good default if None provided
-            voice = "en-US-ChristopherNeural"
-            
+        voice = self._voice(options)
         print(f"Synthesizing '{text[:20]}...' with {voice}")
         
-        async def _run_tts():
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(output_path)
+        communicate = self.communicate_cls(text, voice)
+        async for chunk in communicate.stream():
+            if chunk.get("type") == "audio":
+                yield chunk["data"]
 
+    async def synthesize_async(self, text: str, output_path: str, options: dict) -> str:
+        """
+        Synthesizes speech natively on the caller's event loop.
+        Audio is streamed to a temp file and renamed into place, so readers never see a partial file.
+        """
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.part"
         try:
-            asyncio.run(_run_tts())
-        except Exception as e:
-            # Fallback for already running event loops (e.g. inside uvicorn specific contexts)
-            # though asyncio.run usually creates a new one. 
-            # If called from async context, user should await specific async method, 
-            # but our base class interface is sync.
-            import nest_asyncio
-            nest_asyncio.apply()
-            asyncio.run(_run_tts())
-            
+            with open(tmp_path, "wb") as f:
+                async for data in self.stream_async(text, options):
+                    f.write(data)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         return output_path
+
+    def synthesize(self, text: str, output_path: str, options: dict) -> str:
+        """
+        Blocking wrapper around synthesize_async for scripts and worker threads.
+        Async callers should await synthesize_async directly.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.synthesize_async(text, output_path, options))
+            
+        # Called from inside a running loop: run on a private loop in a helper thread
+        # instead of patching the global loop with nest_asyncio.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.synthesize_async(text, output_path, options)).result()
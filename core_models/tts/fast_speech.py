@@ -3,6 +3,8 @@ import time
 import shutil
 
 class FastSpeech2Engine(TTSEngine):
+    engine_version = "fastspeech2-mock-1"
+
     def synthesize(self, text: str, output_path: str, options: dict):
         print(f"Synthesizing text: {text} with options: {options}")
         # Simulate processing time
@@ -1,12 +1,80 @@
 from core_models.base import VoiceCloningEngine
-import time
-import uuid
+from typing import Callable, List, Sequence, Union
+import numpy as np
+
+from core_models.stt.streaming import WHISPER_SAMPLE_RATE
+
+# resemblyzer's GE2E encoder: 256-d, L2-normalized d-vectors (cosine similarity = dot product)
+EMBEDDING_DIM = 256
+# Partial-utterance windows per forward pass when embedding many clips at once
+MAX_FORWARD_BATCH = 64
 
 class SpeakerEncoder(VoiceCloningEngine):
+    """
+    d-vector speaker embeddings on CPU (resemblyzer's pretrained GE2E encoder, loaded once).
+
+    A clip is cut into overlapping ~1.6 s windows, every window is embedded and the
+    normalized mean is the clip's d-vector. embed_batch() packs the windows of many
+    clips into shared forward passes, for bulk enrollment.
+
+    embed_speaker() keeps the VoiceCloningEngine contract: it enrolls the clip with
+    the enroll callback (the voice profile store) and returns the profile id.
+    """
+    engine_version = "resemblyzer-ge2e-256"
+
+    def __init__(self, device: str = "cpu", enroll: Callable[[np.ndarray, dict], str] = None):
+        import torch
+        from resemblyzer import VoiceEncoder
+        self.torch = torch
+        self.encoder = VoiceEncoder(device)
+        self.enroll = enroll
+
+    def _prepare(self, audio: Union[str, np.ndarray], sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+        # Resample to 16 kHz, normalize volume, trim long silences
+        from resemblyzer import preprocess_wav
+        if isinstance(audio, str):
+            return preprocess_wav(audio)
+        return preprocess_wav(np.asarray(audio, dtype=np.float32), source_sr=sample_rate)
+
+    def _partial_mels(self, wav: np.ndarray) -> np.ndarray:
+        from resemblyzer.audio import wav_to_mel_spectrogram
+        wav_slices, mel_slices = self.encoder.compute_partial_slices(len(wav))
+        needed = wav_slices[-1].stop
+        if needed >= len(wav):
+            wav = np.pad(wav, (0, needed - len(wav)), "constant")
+        mel = wav_to_mel_spectrogram(wav)
+        return np.array([mel[s] for s in mel_slices])
+
+    def embed(self, audio: Union[str, np.ndarray], sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+        """float32 (EMBEDDING_DIM,) d-vector of one clip (file path, or float32 mono samples at sample_rate)."""
+        return self.embed_batch([audio], sample_rate)[0]
+
+    def embed_batch(self, clips: Sequence[Union[str, np.ndarray]], sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+        """float32 (len(clips), EMBEDDING_DIM): one d-vector per clip, windows of all clips batched together."""
+        if not clips:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        partials = [self._partial_mels(self._prepare(clip, sample_rate)) for clip in clips]
+        counts = [len(p) for p in partials]
+        mels = np.concatenate(partials)
+
+        outputs = []
+        with self.torch.no_grad():
+            for i in range(0, len(mels), MAX_FORWARD_BATCH):
+                batch = self.torch.from_numpy(mels[i:i + MAX_FORWARD_BATCH]).to(self.encoder.device)
+                outputs.append(self.encoder(batch).cpu().numpy())
+        windows = np.concatenate(outputs)
+
+        embeddings = np.stack([chunk.mean(axis=0) for chunk in np.split(windows, np.cumsum(counts)[:-1])])
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings.astype(np.float32)
+
     def embed_speaker(self, audio_path: str) -> str:
-        print(f"Embedding speaker from {audio_path}")
-        time.sleep(0.5)
-        
-        # MOCK: Return a fake profile ID or path to embedding file
-        # In reality, this would run a specific encoder model
-        return str(uuid.uuid4())
+        if self.enroll is None:
+            raise RuntimeError("SpeakerEncoder has no profile store to enroll into")
+        return self.enroll(self.embed(audio_path), {"source": audio_path})
+
+    @staticmethod
+    def combine(embeddings: List[np.ndarray]) -> np.ndarray:
+        """One speaker d-vector from several clips of the same speaker."""
+        mean = np.mean(np.asarray(embeddings, dtype=np.float32), axis=0)
+        return (mean / np.linalg.norm(mean)).astype(np.float32)
@@ -41,9 +41,9 @@ function App() {
             const response = await axios.post(`${API_BASE}/render`, formData, {
                 headers: { 'Content-Type': 'multipart/form-data' }
             });
-            // The backend returns a relative URL usually, assume we need to prepend hostname if not full
-            // But based on our mock, it returns /static/...
-            setVideoUrl(`http://localhost:8000${response.data.video_url}`);
+            // Absolute when the server has media.base_url set (the default), relative otherwise
+            const videoUrl = response.data.video_url;
+            setVideoUrl(videoUrl.startsWith("http") ? videoUrl : `http://localhost:8000${videoUrl}`);
         } catch (err) {
             console.error(err);
             setError("Failed to generate video. Please try again.");
@@ -7,6 +7,13 @@ export default function VirtualGuide({ apiBase = "http://localhost:8000" }) {
     const [busy, setBusy] = useState(false);
     const audioRef = useRef();
 
+    // One conversation per browser tab (multi-turn state on the server is keyed by it)
+    const sessionId = useRef(null);
+    if (sessionId.current === null) {
+        sessionId.current = sessionStorage.getItem("vg-session-id") || crypto.randomUUID();
+        sessionStorage.setItem("vg-session-id", sessionId.current);
+    }
+
     // Auto-scroll transcript
     const transcriptRef = useRef(null);
     useEffect(() => {
@@ -23,7 +30,7 @@ export default function VirtualGuide({ apiBase = "http://localhost:8000" }) {
             const res = await fetch(`${apiBase}/agent/parse`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ text, context: { current_page: window.location.pathname } }),
+                body: JSON.stringify({ text, context: { current_page: window.location.pathname }, session_id: sessionId.current }),
             });
             const body = await res.json();
 
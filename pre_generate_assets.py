@@ -1,11 +1,18 @@
-import asyncio
+import argparse
+import hashlib
+import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 
 # Add root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from api.services.orchestrator import Orchestrator
+from api.config import get_config
+from api.services.orchestrator import make_render_keys
+from api.services.render_cache import PREGEN_MANIFEST, file_digest
 
 # Pre-defined generic responses
 # ID -> Text
@@ -31,29 +38,176 @@ PREDEFINED_RESPONSES = {
 AVATAR_PATH = os.path.abspath("frontend/react-app/public/assets/male_business_portrait_v1.png")
 VOICE = "en-US-ChristopherNeural"
 
-async def generate_assets():
-    if not os.path.exists(AVATAR_PATH):
-        print(f"Error: Avatar not found at {AVATAR_PATH}")
+# --- Worker side (one process per worker, models loaded once in the initializer) ---
+_worker = {}
+
+def _init_worker(cache_root, manifest_path, storage_root, torch_threads):
+    from core_models.tts.edge_tts_engine import EdgeTTSEngine
+    from core_models.lip_sync.wav2lip import Wav2LipEngine
+    from api.services.render_cache import RenderCache
+    
+    # Same backend as the server, but split the cores between workers instead of
+    # every worker grabbing all of them
+    inference = dict(get_config().get("lip_sync", {}).get("inference") or {})
+    inference["intra_op_threads"] = torch_threads
+    inference["inter_op_threads"] = 1
+    _worker["tts"] = EdgeTTSEngine()
+    _worker["lip_sync"] = Wav2LipEngine(inference=inference)
+    _worker["cache"] = RenderCache(root=cache_root, manifest_path=manifest_path, storage_root=storage_root)
+
+def _render_item(job):
+    """
+    Renders one (text, voice, avatar) item straight into the render cache, skipping whatever
+    the cache already holds. Returns (item_id, audio_path, video_path); audio_path is None when
+    the video was cached but its audio had been evicted.
+    """
+    from api.services.voice_profiles import voice_options
+    
+    cache = _worker["cache"]
+    audio_tier, video_tier = cache.tier("audio"), cache.tier("video")
+    
+    # Rendered by the server or an earlier run (the manifest may be new or lost)
+    audio_path = audio_tier.peek(job["audio_key"], ".wav")
+    video_path = video_tier.peek(job["video_key"], ".mp4")
+    if video_path is not None:
+        return job["item_id"], audio_path, video_path
+    
+    if audio_path is None:
+        tmp_path = audio_tier.tmp_path_for(job["audio_key"], ".wav")
+        _worker["tts"].synthesize(job["text"], tmp_path, voice_options(job["voice"]))
+        audio_path = audio_tier.commit(job["audio_key"], ".wav", tmp_path)
+        
+    tmp_path = video_tier.tmp_path_for(job["video_key"], ".mp4")
+    try:
+        _worker["lip_sync"].animate(job["avatar"], audio_path, tmp_path)
+        video_path = video_tier.commit(job["video_key"], ".mp4", tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return job["item_id"], audio_path, video_path
+
+# --- Driver side ---
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(path, manifest):
+    # Written after every item so an interrupted run resumes where it stopped
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def build_jobs(responses, avatars, voices):
+    """Expands the response catalog over the avatar x voice matrix."""
+    from core_models.tts.edge_tts_engine import EdgeTTSEngine
+    from core_models.lip_sync.settings import engine_version_for
+    
+    inference = get_config().get("lip_sync", {}).get("inference") or {}
+    lip_sync_version = engine_version_for(backend=inference.get("backend", "eager"))
+    jobs = []
+    for avatar in avatars:
+        avatar_digest = file_digest(avatar)
+        avatar_name = os.path.splitext(os.path.basename(avatar))[0]
+        for voice in voices:
+            for response_id, text in responses.items():
+                audio_key, video_key = make_render_keys(
+                    EdgeTTSEngine.engine_version, lip_sync_version, avatar_digest,
+                    text=text, voice_profile_id=voice
+                )
+                jobs.append({
+                    "item_id": f"{response_id}@{avatar_name}@{voice}",
+                    "text": text,
+                    "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                    "voice": voice,
+                    "avatar": avatar,
+                    "audio_key": audio_key,
+                    "video_key": video_key,
+                })
+    return jobs
+
+def is_up_to_date(entry, job, storage_root):
+    # Stale if the text, voice, avatar or engine version changed (-> different video_key) or the file is gone
+    return (
+        entry is not None
+        and entry.get("video_key") == job["video_key"]
+        and bool(entry.get("video_path"))
+        and os.path.exists(os.path.join(storage_root, entry["video_path"]))
+    )
+
+def manifest_entry(job, audio_path, video_path, storage_root):
+    """Manifest record for a rendered item. Paths are relative to the storage root, never absolute server paths."""
+    return {
+        "text": job["text"],
+        "text_hash": job["text_hash"],
+        "voice": job["voice"],
+        "avatar": os.path.basename(job["avatar"]),
+        "video_key": job["video_key"],
+        "audio_path": os.path.relpath(audio_path, storage_root) if audio_path else None,
+        "video_path": os.path.relpath(video_path, storage_root),
+        "generated_at": time.time(),
+    }
+
+def generate_assets(avatars, voices, workers, force=False):
+    missing = [a for a in avatars if not os.path.exists(a)]
+    if missing:
+        print(f"Error: Avatar not found at {missing}")
         return
 
-    orchest = Orchestrator()
-    
-    print(f"Starting Pre-generation for {len(PREDEFINED_RESPONSES)} items...")
-    
-    for session_id, text in PREDEFINED_RESPONSES.items():
-        print(f"Generating: [{session_id}] -> '{text}'")
-        try:
-            # We enforce the session_id to match our key
-            # This creates storage/sessions/generic_sure/final_video.mp4
-            video_path, _ = await orchest.render_pipeline(
-                image_path=AVATAR_PATH,
-                text=text,
-                voice_profile_id=VOICE,
-                session_id=session_id
-            )
-            print(f"  -> Generated at: {video_path}")
-        except Exception as e:
-            print(f"  -> FAILED: {e}")
+    cfg = get_config()
+    cache_root = cfg.get("render_cache", {}).get("root", "storage/cache")
+    storage_root = cfg.get("media", {}).get("root", "storage")
+    os.makedirs(cache_root, exist_ok=True)
+    # Also the render cache's pin list: files in it are never evicted
+    manifest_path = cfg.get("render_cache", {}).get("manifest_path", PREGEN_MANIFEST)
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    # Older runs wrote it into the cache root, where /media served it with absolute server paths.
+    # Nothing is lost: the clips it listed are still in the cache and found there again
+    legacy_path = os.path.join(cache_root, os.path.basename(manifest_path))
+    if os.path.exists(legacy_path) and os.path.abspath(legacy_path) != os.path.abspath(manifest_path):
+        os.remove(legacy_path)
+    manifest = load_manifest(manifest_path)
+    
+    jobs = build_jobs(PREDEFINED_RESPONSES, avatars, voices)
+    todo = [j for j in jobs if force or not is_up_to_date(manifest.get(j["item_id"]), j, storage_root)]
+    
+    print(f"Pre-generation: {len(jobs)} items ({len(avatars)} avatars x {len(voices)} voices), "
+          f"{len(jobs) - len(todo)} up to date, {len(todo)} to render on {workers} workers.")
+    if not todo:
+        return
+        
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    jobs_by_id = {j["item_id"]: j for j in todo}
+    start = time.time()
+    failed = 0
+    
+    # spawn: torch/MediaPipe are not fork-safe
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(cache_root, manifest_path, storage_root, torch_threads)) as pool:
+        futures = {pool.submit(_render_item, job): job["item_id"] for job in todo}
+        for future in as_completed(futures):
+            item_id = futures[future]
+            try:
+                _, audio_path, video_path = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  -> FAILED [{item_id}]: {e}")
+                continue
+            manifest[item_id] = manifest_entry(jobs_by_id[item_id], audio_path, video_path, storage_root)
+            save_manifest(manifest_path, manifest)
+            print(f"  -> [{item_id}] {video_path}")
+            
+    print(f"Rendered {len(todo) - failed}/{len(todo)} items in {time.time() - start:.1f}s. Manifest: {manifest_path}")
 
 if __name__ == "__main__":
-    asyncio.run(generate_assets())
+    parser = argparse.ArgumentParser(description="Warm the render cache with the predefined responses.")
+    parser.add_argument("--avatars", nargs="+", default=[AVATAR_PATH], help="Avatar images to render")
+    parser.add_argument("--voices", nargs="+", default=[VOICE], help="Voices to render")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes (each loads Wav2Lip once)")
+    parser.add_argument("--force", action="store_true", help="Re-render everything, ignoring the manifest")
+    args = parser.parse_args()
+    
+    generate_assets([os.path.abspath(a) for a in args.avatars], args.voices, args.workers, args.force)
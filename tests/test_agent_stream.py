@@ -0,0 +1,72 @@
+"""WebSocket /agent/audio/stream control messages and STT failures, with a fake STT model."""
+import json
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routers import agent
+
+class FakeSTT:
+    def __init__(self, fail_partials=False):
+        self.fail_partials = fail_partials
+        self.calls = []
+
+    async def transcribe(self, audio, beam_size=5, greedy=False):
+        self.calls.append((beam_size, greedy))
+        if greedy and self.fail_partials:
+            raise RuntimeError("decoder crashed")
+        return ""
+
+class FakeRegistry:
+    def __init__(self, stt):
+        self.stt = stt
+
+    async def aget(self, name):
+        return self.stt
+
+def _client(monkeypatch, stt):
+    monkeypatch.setattr(agent, "get_model_registry", lambda: FakeRegistry(stt))
+    app = FastAPI()
+    app.include_router(agent.router, prefix="/agent")
+    return TestClient(app)
+
+def _speech(seconds=1.5, rate=16000):
+    """A loud tone followed by silence: one utterance for the VAD."""
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (0.5 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2")
+    return tone.tobytes() + np.zeros(rate, dtype="<i2").tobytes()
+
+def _until(ws, kind):
+    while True:
+        message = ws.receive_json()
+        if message["type"] == kind:
+            return message
+
+def test_bad_control_message_is_an_error_event(monkeypatch):
+    with _client(monkeypatch, FakeSTT()).websocket_connect("/agent/audio/stream") as ws:
+        ws.send_text("{not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_text(json.dumps(["config"]))
+        assert ws.receive_json()["type"] == "error"
+        ws.send_text(json.dumps({"type": "config", "beam_size": "wide"}))
+        assert ws.receive_json()["type"] == "error"
+        # The connection is still usable
+        ws.send_text(json.dumps({"type": "end"}))
+
+def test_beam_size_is_capped(monkeypatch):
+    stt = FakeSTT()
+    with _client(monkeypatch, stt).websocket_connect("/agent/audio/stream") as ws:
+        ws.send_text(json.dumps({"type": "config", "beam_size": 10000, "partials": False}))
+        ws.send_bytes(_speech())
+        _until(ws, "final")
+        ws.send_text(json.dumps({"type": "end"}))
+    assert stt.calls == [(agent.get_config()["stt"].get("max_beam_size", 10), False)]
+
+def test_partial_decode_failure_is_reported(monkeypatch):
+    stt = FakeSTT(fail_partials=True)
+    with _client(monkeypatch, stt).websocket_connect("/agent/audio/stream") as ws:
+        ws.send_bytes(_speech(seconds=3))
+        error = _until(ws, "error")
+        assert error["detail"] == "decoder crashed" and error["utterance"] == 1
+        ws.send_text(json.dumps({"type": "end"}))
@@ -0,0 +1,32 @@
+"""Vision intents take the screen capture on the execution layer, not on the event loop."""
+import asyncio
+import threading
+
+from api.services import agent_service as agent_module
+from api.services.agent_service import AgentService
+
+class FakeFrame:
+    phash = 0
+
+    def part(self):
+        return {"mime_type": "image/jpeg", "data": b""}
+
+class FakeCapture:
+    def __init__(self):
+        self.threads = []
+
+    def capture(self):
+        self.threads.append(threading.current_thread().name)
+        return FakeFrame()
+
+class FakeLLM:
+    async def generate(self, kind, parts, **kwargs):
+        return "A login page."
+
+def test_vision_analysis_captures_off_the_loop(monkeypatch):
+    capture = FakeCapture()
+    monkeypatch.setattr(agent_module, "get_screen_capture", lambda: capture)
+    agent = AgentService(llm=FakeLLM())
+    response = asyncio.run(agent._intent_vision_analysis("describe this", "describe this", {}, "s1"))
+    assert response["render"]["text"] == "A login page."
+    assert len(capture.threads) == 1 and capture.threads[0].startswith("exec-screen_capture")
@@ -0,0 +1,48 @@
+"""ArtifactStore index placement and janitor sweep."""
+import os
+import time
+
+from api.services.artifact_store import ArtifactStore
+
+def _write(store, kind, name, size=100):
+    path = store.path(kind, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    store.register(path, kind)
+    return path
+
+def test_default_index_is_outside_the_served_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ArtifactStore("storage")
+    assert os.path.abspath(store.index_path) == str(tmp_path / "data" / "artifacts.db")
+    assert not os.path.abspath(store.index_path).startswith(store.root + os.sep)
+
+def test_sweep_ages_out_and_keeps_pins(tmp_path):
+    store = ArtifactStore(str(tmp_path / "storage"), index_path=str(tmp_path / "artifacts.db"),
+                          classes={"tts_outputs": {"max_age_hours": 1, "max_mb": None}})
+    old = _write(store, "tts_outputs", "old.wav")
+    pinned = _write(store, "tts_outputs", "pinned.wav")
+    fresh = _write(store, "tts_outputs", "fresh.wav")
+    store.pin(pinned)
+    with store._lock:
+        store._conn.execute("UPDATE artifacts SET last_access = 0 WHERE path != ?", (store._rel(fresh),))
+    assert store.sweep()["tts_outputs"] == 1
+    assert not os.path.exists(old) and os.path.exists(pinned) and os.path.exists(fresh)
+
+def test_path_for_creates_nothing(tmp_path):
+    store = ArtifactStore(str(tmp_path / "storage"), index_path=str(tmp_path / "artifacts.db"))
+    path = store.path_for("streams", "a" * 64)
+    assert not os.path.exists(store.class_dir("streams"))
+    assert store.path("streams", "a" * 64) == path and os.path.isdir(os.path.dirname(path))
+
+def test_legacy_session_dirs_are_reclaimed(tmp_path):
+    store = ArtifactStore(str(tmp_path / "storage"), index_path=str(tmp_path / "artifacts.db"))
+    session_dir = tmp_path / "storage" / "sessions" / "6f1c0c1e-0000-4000-8000-000000000000"
+    session_dir.mkdir(parents=True)
+    (session_dir / "index.m3u8").write_text("#EXTM3U\n")
+    old = time.time() - 48 * 3600
+    os.utime(session_dir / "index.m3u8", (old, old))
+    os.utime(session_dir, (old, old))
+    assert store.reconcile() == 1
+    assert store.sweep()["sessions"] == 1
+    assert not session_dir.exists()
@@ -0,0 +1,65 @@
+"""EdgeTTSEngine against a local stand-in for edge_tts.Communicate (no network)."""
+import asyncio
+
+from core_models.tts.edge_tts_engine import DEFAULT_VOICE, EdgeTTSEngine
+
+class FakeCommunicate:
+    """Records what it was asked for and streams canned chunks, like edge_tts.Communicate.stream()."""
+    created = []
+
+    def __init__(self, text, voice):
+        self.text = text
+        self.voice = voice
+        FakeCommunicate.created.append(self)
+
+    async def stream(self):
+        yield {"type": "WordBoundary", "offset": 0, "text": "hello"}
+        for word in self.text.split():
+            yield {"type": "audio", "data": word.encode() + b"|"}
+
+class FailingCommunicate(FakeCommunicate):
+    async def stream(self):
+        yield {"type": "audio", "data": b"partial"}
+        raise ConnectionError("websocket closed")
+
+async def _collect(engine, text, options):
+    return [chunk async for chunk in engine.stream_async(text, options)]
+
+def test_stream_yields_audio_chunks_only():
+    engine = EdgeTTSEngine(communicate_cls=FakeCommunicate)
+    chunks = asyncio.run(_collect(engine, "hello there", {"voice_profile": "en-GB-RyanNeural"}))
+    assert chunks == [b"hello|", b"there|"]
+    assert FakeCommunicate.created[-1].voice == "en-GB-RyanNeural"
+
+def test_default_voice():
+    engine = EdgeTTSEngine(communicate_cls=FakeCommunicate)
+    asyncio.run(_collect(engine, "hi", None))
+    assert FakeCommunicate.created[-1].voice == DEFAULT_VOICE
+
+def test_synthesize_async_writes_file(tmp_path):
+    engine = EdgeTTSEngine(communicate_cls=FakeCommunicate)
+    out = tmp_path / "out.mp3"
+    assert asyncio.run(engine.synthesize_async("a b c", str(out), {})) == str(out)
+    assert out.read_bytes() == b"a|b|c|"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.mp3"]
+
+def test_synthesize_async_leaves_no_partial_file(tmp_path):
+    engine = EdgeTTSEngine(communicate_cls=FailingCommunicate)
+    out = tmp_path / "out.mp3"
+    try:
+        asyncio.run(engine.synthesize_async("a", str(out), {}))
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("expected the stream error to propagate")
+    assert list(tmp_path.iterdir()) == []
+
+def test_blocking_synthesize_inside_running_loop(tmp_path):
+    engine = EdgeTTSEngine(communicate_cls=FakeCommunicate)
+    out = tmp_path / "out.mp3"
+
+    async def caller():
+        return engine.synthesize("x y", str(out), {})
+
+    asyncio.run(caller())
+    assert out.read_bytes() == b"x|y|"
@@ -0,0 +1,46 @@
+"""IntentRouter against the golden corpus in benchmarks/intent_corpus.json."""
+import json
+import os
+
+import pytest
+
+from api.services.intent_router import app_router, intent_router
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "intent_corpus.json")
+
+with open(CORPUS_PATH) as f:
+    CORPUS = json.load(f)
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["text"] for c in CORPUS])
+def test_corpus(case):
+    assert intent_router.match(case["text"]) == case["intent"]
+    matches = intent_router.matches(case["text"])
+    assert (matches[0] if matches else None) == case["intent"]
+
+@pytest.mark.parametrize("text", [c["text"] for c in CORPUS] + [
+    "Hi!", "(open) chrome", "sign-up", "go\tto   the dashboard", "x\nstop", "_hi", "hi_there", "1hi",
+])
+def test_ascii_scan_matches_lookbehind_scan(text):
+    """The separator-led regex used for ASCII text finds the same phrases as the general one."""
+    lower = text.lower()
+    expected = [m.lastgroup for m in intent_router._pattern.finditer(lower)]
+    assert [m.lastgroup for m in intent_router._scan(text)] == expected
+
+def test_non_ascii_text():
+    assert intent_router.match("héllo, please open the dashboard") == "dashboard"
+    assert intent_router.match("café hi") == "greeting"
+    assert intent_router.match("éhi") is None
+
+def test_word_boundaries():
+    assert intent_router.match("this is it") is None
+    assert intent_router.match("sign-up") is None
+    assert intent_router.match("Sign   up") == "signup"
+
+def test_one_intent_per_word_start():
+    # "start exam" belongs to join_exam; the generic "start" doesn't fire at the same place
+    assert intent_router.matches("start exam") == ["join_exam"]
+    assert intent_router.matches("start exam then open notepad") == ["join_exam", "desktop_command"]
+
+def test_app_router():
+    assert set(app_router.matches("open vs code and chrome")) == {"vscode", "chrome"}
+    assert app_router.matches("open the codebase") == []
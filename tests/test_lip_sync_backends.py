@@ -0,0 +1,31 @@
+"""select_backend: a configured backend is used as-is or loading fails (it is part of the cache key)."""
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from core_models.lip_sync import backends
+from core_models.lip_sync.backends import EagerBackend, select_backend
+
+class TinyModel(torch.nn.Module):
+    """Same call signature as Wav2Lip, any shapes."""
+    def forward(self, mels, imgs):
+        return imgs[:, :3] * 0.5
+
+class NoisyBackend(EagerBackend):
+    name = "torchscript"
+
+    def __call__(self, mels, imgs):
+        return super().__call__(mels, imgs) + 0.2
+
+def test_eager():
+    backend, score = select_backend("eager", TinyModel(), "unused.pth")
+    assert backend.name == "eager" and score is None
+
+def test_unavailable_backend_is_fatal():
+    with pytest.raises(RuntimeError, match="lip_sync backend 'nope' unavailable"):
+        select_backend("nope", TinyModel(), "unused.pth")
+
+def test_parity_failure_is_fatal(monkeypatch):
+    monkeypatch.setattr(backends, "build_backend", lambda name, model, *args: NoisyBackend(model))
+    with pytest.raises(RuntimeError, match="failed parity"):
+        select_backend("torchscript", TinyModel(), "unused.pth", min_psnr=30.0)
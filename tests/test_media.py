@@ -0,0 +1,47 @@
+"""Byte ranges on /media (parse_range and what MediaFiles answers)."""
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from api.services.media import MediaFiles, MediaVersions, parse_range
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-", (0, 1000)),
+    ("bytes=5-9", (5, 10)),
+    ("bytes=900-5000", (900, 1000)),
+    ("bytes=-5", (995, 1000)),
+    ("bytes=-5000", (0, 1000)),
+    ("bytes=500-100", None),   # last < first: invalid, ignored
+    ("bytes=0-1,5-6", None),   # several ranges: allowed to ignore
+    ("bytes=x-1", None),
+    ("bytes=-", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+@pytest.mark.parametrize("header", ["bytes=-0", "bytes=1000-", "bytes=2000-3000"])
+def test_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+@pytest.fixture
+def client(tmp_path):
+    clip = tmp_path / "outputs" / "clip.wav"
+    os.makedirs(clip.parent)
+    clip.write_bytes(bytes(range(256)) * 4)
+    versions = MediaVersions(str(tmp_path))
+    app = Starlette(routes=[Mount("/media", MediaFiles(versions))])
+    return TestClient(app), f"/media/{versions.version(str(clip))}/outputs/clip.wav"
+
+def test_responses(client):
+    client, url = client
+    assert client.get(url, headers={"Range": "bytes=-0"}).status_code == 416
+    response = client.get(url, headers={"Range": "bytes=500-100"})
+    assert response.status_code == 200 and len(response.content) == 1024
+    response = client.get(url, headers={"Range": "bytes=1020-"})
+    assert response.status_code == 206 and response.headers["content-range"] == "bytes 1020-1023/1024"
@@ -0,0 +1,41 @@
+"""MelWindows against the original Python windowing loop."""
+import numpy as np
+import pytest
+
+from core_models.lip_sync.mel import MelWindows
+
+def legacy_mel_chunks(mel, fps=25, start_frame=0, end_frame=None):
+    mel_chunks = []
+    i = start_frame
+    while end_frame is None or i < end_frame:
+        start_idx = int(i * 80./fps)
+        if start_idx + 16 > len(mel[0]):
+            mel_chunks.append(mel[:, len(mel[0]) - 16:])
+            break
+        mel_chunks.append(mel[:, start_idx : start_idx + 16])
+        i += 1
+    return mel_chunks
+
+@pytest.mark.parametrize("n_steps", [16, 17, 100, 1203])
+def test_matches_legacy_windows(n_steps):
+    mel = np.random.rand(80, n_steps)
+    windows = MelWindows(mel)
+    expected = np.array(legacy_mel_chunks(mel), dtype=np.float32)
+    assert len(windows) == len(expected)
+    for i in range(0, len(windows), 32):
+        batch = windows[i : i+32]
+        assert batch.dtype == np.float32 and batch.shape[1:] == (80, 16)
+        assert np.array_equal(batch, expected[i : i+32])
+
+def test_frame_ranges_match_legacy_chunks():
+    mel = np.random.rand(80, 2000)
+    windows = MelWindows(mel)
+    for start, end in [(0, 25), (25, 100), (550, 10_000)]:
+        expected = np.array(legacy_mel_chunks(mel, start_frame=start, end_frame=end), dtype=np.float32).reshape(-1, 80, 16)
+        assert np.array_equal(windows.frames(start, end)[:], expected)
+        assert np.array_equal(MelWindows(mel, start_frame=start, end_frame=end)[:], expected)
+    assert len(windows) == len(legacy_mel_chunks(mel))
+
+def test_too_short():
+    with pytest.raises(ValueError):
+        MelWindows(np.zeros((80, 15)))
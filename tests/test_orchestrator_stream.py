@@ -0,0 +1,83 @@
+"""Orchestrator.render_stream with fake engines: playlist publication, cache reuse, pool, cleanup."""
+import asyncio
+import os
+import threading
+
+import pytest
+
+from api.services.artifact_store import ArtifactStore
+from api.services.orchestrator import Orchestrator
+from api.services.render_cache import RenderCache
+from core_models.lip_sync.hls import HLSPlaylist
+
+class FakeTTS:
+    engine_version = "fake-tts"
+
+    async def synthesize_async(self, text, output_path, options):
+        with open(output_path, "wb") as f:
+            f.write(text.encode())
+        return output_path
+
+class FakeLipSync:
+    engine_version = "fake-lipsync"
+
+    def __init__(self):
+        self.threads = []
+        self.animated = 0
+
+    def animate(self, image_path, audio_path, output_path):
+        self.animated += 1
+        with open(output_path, "wb") as f:
+            f.write(b"\x00" * 1024)
+
+    def animate_chunks(self, image_path, audio_path, output_dir, first_chunk_seconds=1.0, chunk_seconds=3.0):
+        self.threads.append(threading.current_thread().name)
+        for index in range(3):
+            path = os.path.join(output_dir, f"segment_{index:03d}.ts")
+            with open(path, "wb") as f:
+                f.write(b"\x47" * 188)
+            yield index, path, chunk_seconds
+
+def _orchestrator(tmp_path):
+    avatar = tmp_path / "avatar.png"
+    avatar.write_bytes(b"not really a png")
+    lip_sync = FakeLipSync()
+    orchestrator = Orchestrator(
+        tts=FakeTTS(), lip_sync=lip_sync, cache=RenderCache(str(tmp_path / "cache")),
+        artifacts=ArtifactStore(str(tmp_path / "storage"), index_path=str(tmp_path / "artifacts.db")),
+    )
+    return orchestrator, lip_sync, str(avatar)
+
+def test_playlist_is_written_with_its_first_segment(tmp_path):
+    path = str(tmp_path / "index.m3u8")
+    playlist = HLSPlaylist(path, target_duration=3)
+    assert not os.path.exists(path)
+    playlist.add_segment(str(tmp_path / "segment_000.ts"), 1.0)
+    with open(path) as f:
+        assert "segment_000.ts" in f.read()
+
+def test_stream_renders_on_its_own_pool(tmp_path):
+    orchestrator, lip_sync, avatar = _orchestrator(tmp_path)
+    result = asyncio.run(orchestrator.render_stream(avatar, text="hello there"))
+    assert result["video_path"] is None
+    with open(result["playlist_path"]) as f:
+        assert "segment_000.ts" in f.read()
+    assert lip_sync.threads[0].startswith("exec-lip_sync_stream")
+
+def test_rendered_video_is_returned_instead_of_a_stream(tmp_path):
+    orchestrator, lip_sync, avatar = _orchestrator(tmp_path)
+    rendered = asyncio.run(orchestrator.render(avatar, text="hello there"))
+    result = asyncio.run(orchestrator.render_stream(avatar, text="hello there"))
+    assert result["video_path"] == rendered["video_path"]
+    assert result["playlist_path"] is None
+    assert lip_sync.threads == [] and lip_sync.animated == 1
+
+def test_failed_stream_leaves_no_directories(tmp_path):
+    orchestrator, lip_sync, avatar = _orchestrator(tmp_path)
+
+    async def fail(text, output_path, options):
+        raise RuntimeError("tts down")
+    orchestrator.tts.synthesize_async = fail
+    with pytest.raises(RuntimeError):
+        asyncio.run(orchestrator.render_stream(avatar, text="hello there"))
+    assert not os.path.exists(orchestrator.artifacts.class_dir("streams"))
@@ -0,0 +1,83 @@
+"""pre_generate_assets with fake engines: cache reuse, voice options, the private manifest and its pins."""
+import os
+
+import numpy as np
+
+import pre_generate_assets as pregen
+from api.services import voice_profiles
+from api.services.render_cache import RenderCache, cache_key
+from api.services.voice_profiles import VoiceProfileStore
+
+class FakeTTS:
+    def __init__(self):
+        self.calls = []
+
+    def synthesize(self, text, output_path, options):
+        self.calls.append(options)
+        with open(output_path, "wb") as f:
+            f.write(text.encode())
+        return output_path
+
+class FakeLipSync:
+    def __init__(self):
+        self.animated = 0
+
+    def animate(self, image_path, audio_path, output_path):
+        self.animated += 1
+        with open(output_path, "wb") as f:
+            f.write(b"\x00" * 1024)
+
+def _job(voice="en-US-ChristopherNeural"):
+    return {
+        "item_id": f"generic_done@avatar@{voice}",
+        "text": "Done.",
+        "text_hash": "0" * 64,
+        "voice": voice,
+        "avatar": "/srv/app/avatars/avatar.png",
+        "audio_key": cache_key("audio", voice),
+        "video_key": cache_key("video", voice),
+    }
+
+def _workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(voice_profiles, "_voice_profiles", VoiceProfileStore(str(tmp_path / "profiles"), dim=4))
+    cache = RenderCache(str(tmp_path / "storage" / "cache"))
+    monkeypatch.setattr(pregen, "_worker", {"tts": FakeTTS(), "lip_sync": FakeLipSync(), "cache": cache})
+    return pregen._worker
+
+def test_cached_video_is_not_rendered_again(tmp_path, monkeypatch):
+    worker = _workers(tmp_path, monkeypatch)
+    job = _job()
+    _, audio_path, video_path = pregen._render_item(job)
+    assert worker["lip_sync"].animated == 1 and len(worker["tts"].calls) == 1
+
+    # e.g. a lost manifest: the clip is found in the cache, nothing is synthesized or rendered
+    assert pregen._render_item(job) == (job["item_id"], audio_path, video_path)
+    assert worker["lip_sync"].animated == 1 and len(worker["tts"].calls) == 1
+
+def test_enrolled_profiles_synthesize_with_their_voice_and_embedding(tmp_path, monkeypatch):
+    worker = _workers(tmp_path, monkeypatch)
+    profile_id, _ = voice_profiles._voice_profiles.enroll(np.array([1, 0, 0, 0], dtype=np.float32), {"voice": "en-GB-SoniaNeural"})
+    pregen._render_item(_job(voice=profile_id))
+    options = worker["tts"].calls[0]
+    assert options["voice_profile"] == "en-GB-SoniaNeural"
+    assert np.allclose(options["speaker_embedding"], [1, 0, 0, 0])
+
+def test_manifest_paths_are_relative_and_pin_clips(tmp_path, monkeypatch):
+    _workers(tmp_path, monkeypatch)
+    storage_root = str(tmp_path / "storage")
+    job = _job()
+    _, audio_path, video_path = pregen._render_item(job)
+
+    entry = pregen.manifest_entry(job, audio_path, video_path, storage_root)
+    assert not any(os.path.isabs(entry[field]) for field in ("avatar", "audio_path", "video_path"))
+    assert entry["video_path"] == os.path.relpath(video_path, storage_root)
+    assert pregen.is_up_to_date(entry, job, storage_root)
+
+    manifest_path = str(tmp_path / "data" / "pregen_manifest.json")
+    os.makedirs(os.path.dirname(manifest_path))
+    pregen.save_manifest(manifest_path, {job["item_id"]: entry})
+    cache = RenderCache(os.path.join(storage_root, "cache"), manifest_path=manifest_path, storage_root=storage_root)
+    assert cache.pinned.paths() == {os.path.abspath(audio_path), os.path.abspath(video_path)}
+
+    os.remove(video_path)
+    assert not pregen.is_up_to_date(entry, job, storage_root)
@@ -0,0 +1,103 @@
+"""Session store backends and ConversationManager on top of them."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.services.conversation_manager import ConversationManager
+from api.services.session_store import MemorySessionStore, RedisSessionStore, SessionStore, SQLiteSessionStore
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+class StubRedis:
+    """The slice of redis.Redis that RedisSessionStore uses, for when fakeredis isn't installed."""
+    def __init__(self):
+        self.data = {} # key -> (expires_at, bytes)
+        self.ttls = {}
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (time.time() + ex if ex else float("inf"), value.encode() if isinstance(value, str) else value)
+        self.ttls[key] = ex
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def ttl(self, key):
+        return self.ttls.get(key, -2) if key in self.data else -2
+
+def _redis_client():
+    return fakeredis.FakeRedis() if fakeredis is not None else StubRedis()
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl_seconds=60)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    return RedisSessionStore(ttl_seconds=60, client=_redis_client())
+
+def test_round_trip(store):
+    assert store.get("a") is None
+    store.set("a", {"intent": "git_clone", "data": {"n": 1}})
+    value = store.get("a")
+    assert value == {"intent": "git_clone", "data": {"n": 1}}
+    # Callers get a copy
+    value["data"]["n"] = 2
+    assert store.get("a")["data"]["n"] == 1
+    store.delete("a")
+    assert store.get("a") is None
+
+def test_redis_keys_are_prefixed_with_ttl():
+    client = _redis_client()
+    store = RedisSessionStore(ttl_seconds=90, key_prefix="test:", client=client)
+    store.set("abc", {"step": "x"})
+    assert client.get("test:abc") is not None
+    assert 0 < client.ttl("test:abc") <= 90
+    assert client.get("abc") is None
+
+def test_expiry(tmp_path):
+    for store in (MemorySessionStore(ttl_seconds=0.05), SQLiteSessionStore(str(tmp_path / "s.db"), ttl_seconds=0.05)):
+        store.set("a", {"x": 1})
+        time.sleep(0.1)
+        assert store.get("a") is None
+
+def test_memory_store_is_lru_bounded():
+    store = MemorySessionStore(max_sessions=2)
+    store.set("a", {})
+    store.set("b", {})
+    store.get("a")
+    store.set("c", {})
+    assert store.get("b") is None and store.get("a") == {} and store.evictions == 1
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+def test_conversation_manager_runs_blocking_stores_off_the_loop(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    threads = []
+    get = store.get
+    store.get = lambda key: threads.append(threading.current_thread()) or get(key)
+    manager = ConversationManager(store)
+
+    async def turn():
+        await manager.set_intent("s1", "git_clone", "ask_directory")
+        await manager.update_state("s1", {"step": "done"})
+        state = await manager.get_state("s1")
+        await manager.clear_state("s1")
+        return state, await manager.get_state("s1")
+
+    state, cleared = asyncio.run(turn())
+    assert state == {"intent": "git_clone", "step": "done", "data": {}}
+    assert cleared is None
+    assert threads and threading.main_thread() not in threads
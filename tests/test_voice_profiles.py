@@ -0,0 +1,63 @@
+"""VoiceProfileStore shared by several stores (worker processes) on one directory."""
+import multiprocessing
+import os
+
+import numpy as np
+
+from api.services.voice_profiles import EMBEDDINGS_FILE, VoiceProfileStore
+
+DIM = 16
+
+def _unit(seed):
+    v = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+def test_enroll_and_get(tmp_path):
+    store = VoiceProfileStore(str(tmp_path), dim=DIM)
+    profile_id, similarity = store.enroll(_unit(1), {"voice": "en-GB-RyanNeural"})
+    assert similarity is None
+    profile = store.get(profile_id)
+    assert profile["voice"] == "en-GB-RyanNeural"
+    np.testing.assert_allclose(profile["embedding"], _unit(1))
+    # Same voice again maps to the existing profile
+    assert store.enroll(_unit(1))[0] == profile_id
+    assert len(store) == 1
+
+def test_other_store_sees_new_profiles(tmp_path):
+    a = VoiceProfileStore(str(tmp_path), dim=DIM)
+    b = VoiceProfileStore(str(tmp_path), dim=DIM)
+    profile_id, _ = a.enroll(_unit(1))
+    assert profile_id in b
+    assert b.nearest(_unit(1), k=1)[0][0] == profile_id
+    # b enrolls from the rows on disk, not the empty store it opened
+    other_id, _ = b.enroll(_unit(2))
+    assert a.get(other_id)["row"] == 1
+    np.testing.assert_allclose(a.get(other_id)["embedding"], _unit(2))
+
+def test_crashed_append_is_dropped(tmp_path):
+    store = VoiceProfileStore(str(tmp_path), dim=DIM)
+    store.enroll(_unit(1))
+    with open(os.path.join(str(tmp_path), EMBEDDINGS_FILE), "ab") as f:
+        f.write(b"\0" * (DIM * 4 + 3))
+    profile_id, _ = store.enroll(_unit(2))
+    assert store.get(profile_id)["row"] == 1
+    np.testing.assert_allclose(VoiceProfileStore(str(tmp_path), dim=DIM).get(profile_id)["embedding"], _unit(2))
+
+def _enroll_worker(root, seeds):
+    store = VoiceProfileStore(root, dim=DIM)
+    for seed in seeds:
+        store.enroll(_unit(seed), {"seed": seed})
+
+def test_concurrent_processes_get_distinct_rows(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_enroll_worker, args=(str(tmp_path), range(i * 10, i * 10 + 10))) for i in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(60)
+        assert p.exitcode == 0
+    store = VoiceProfileStore(str(tmp_path), dim=DIM)
+    assert len(store) == 40
+    for profile_id in store.profiles:
+        profile = store.get(profile_id)
+        np.testing.assert_allclose(profile["embedding"], _unit(profile["seed"]), rtol=1e-6)